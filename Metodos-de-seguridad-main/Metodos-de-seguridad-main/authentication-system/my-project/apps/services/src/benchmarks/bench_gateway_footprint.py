@@ -0,0 +1,74 @@
+"""Arranque y memoria: la pasarela con los tres servicios vs. tres procesos.
+
+Lanza `gateway.py --check` una vez con faceid, totp y sms_otp juntos y otra
+vez por cada servicio solo (lo más parecido a los tres main.py por separado,
+con el mismo intérprete y las mismas librerías). Cada proceso imprime su
+informe JSON al terminar de arrancar; se comparan el tiempo de arranque
+(importaciones + start_services) y la RSS, además del tiempo de pared de cada
+proceso incluido el arranque del intérprete.
+
+Uso (desde src/):
+    python benchmarks/bench_gateway_footprint.py
+    python benchmarks/bench_gateway_footprint.py --repeat 5 --mongo-uri mongodb://localhost:27017
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+SRC_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+GATEWAY = os.path.join(SRC_DIR, 'gateway.py')
+SERVICES = ['faceid', 'totp', 'sms_otp']
+
+
+def run_check(services, env):
+    started = time.perf_counter()
+    result = subprocess.run([sys.executable, GATEWAY, '--check', '--services', ','.join(services)],
+                            cwd=SRC_DIR, env=env, capture_output=True, text=True, timeout=300)
+    wall = time.perf_counter() - started
+    if result.returncode != 0:
+        raise RuntimeError(f"gateway --check {services} falló:\n{result.stderr[-2000:]}")
+    report = json.loads(result.stdout.strip().splitlines()[-1])
+    report['wall_s'] = wall
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--mongo-uri', default=os.environ.get("MONGO_URI", "mongomock://"))
+    args = parser.parse_args()
+
+    env = dict(os.environ, MONGO_URI=args.mongo_uri, SMS_PROVIDER=os.environ.get("SMS_PROVIDER", "memory"))
+
+    combined = [run_check(SERVICES, env) for _ in range(args.repeat)]
+    separate = [[run_check([name], env) for name in SERVICES] for _ in range(args.repeat)]
+
+    def median(values):
+        return statistics.median(values)
+
+    print(f"MongoDB {args.mongo_uri}, {args.repeat} repeticiones (mediana)")
+    print(f"{'':<22} {'arranque':>10} {'pared':>10} {'RSS':>10}")
+    for i, name in enumerate(SERVICES):
+        print(f"  {name + ' solo':<20} "
+              f"{median(r[i]['startup_s'] for r in separate):9.3f}s "
+              f"{median(r[i]['wall_s'] for r in separate):9.3f}s "
+              f"{median(r[i]['rss_kb'] for r in separate) / 1024:8.1f}MB")
+    sep_startup = median(sum(p['startup_s'] for p in r) for r in separate)
+    sep_wall = median(sum(p['wall_s'] for p in r) for r in separate)
+    sep_rss = median(sum(p['rss_kb'] for p in r) for r in separate)
+    print(f"{'3 procesos (suma)':<22} {sep_startup:9.3f}s {sep_wall:9.3f}s {sep_rss / 1024:8.1f}MB")
+
+    gw_startup = median(r['startup_s'] for r in combined)
+    gw_wall = median(r['wall_s'] for r in combined)
+    gw_rss = median(r['rss_kb'] for r in combined)
+    print(f"{'pasarela (1 proceso)':<22} {gw_startup:9.3f}s {gw_wall:9.3f}s {gw_rss / 1024:8.1f}MB")
+    print(f"Ahorro: {(1 - gw_rss / sep_rss) * 100:.0f}% de RSS, "
+          f"{(1 - gw_wall / sep_wall) * 100:.0f}% de tiempo de pared")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,155 @@
+"""Coste del registro en el hilo de la petición: print() síncrono vs. shared/structured_logging.
+
+1. Por evento: lo que paga quien registra
+   - print:       el banner de 5 líneas que escribían las rutas de sms_otp (stdout síncrono)
+   - info:        log.info con campos (se encola; formato y escritura en el listener)
+   - debug-off:   log.debug con el nivel en INFO (no se crea registro)
+   - debug-1/100: log.debug con nivel DEBUG y muestreo 1 de cada 100
+2. Extremo a extremo: latencia de /register + /verify-otp de sms_otp (cliente
+   de pruebas de Flask, mongomock, proveedor SMS en memoria) en un subproceso
+   por configuración: LOG_LEVEL=OFF, INFO y DEBUG sin muestreo.
+
+La salida (stdout del print, stderr del listener) va a `--sink`: por defecto
+un fichero temporal en disco, o /dev/null con --sink devnull.
+
+Uso (desde src/):
+    python benchmarks/bench_logging.py
+    python benchmarks/bench_logging.py --events 50000 --requests 3000
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+SRC_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SMS_DIR = os.path.join(SRC_DIR, 'sms_otp')
+LEVELS = ('OFF', 'INFO', 'DEBUG')
+
+
+def percentiles(values):
+    values = sorted(values)
+    pick = lambda p: values[min(len(values) - 1, int(len(values) * p))] * 1e6
+    return {'p50_us': round(pick(0.50), 1), 'p95_us': round(pick(0.95), 1), 'p99_us': round(pick(0.99), 1),
+            'mean_us': round(statistics.fmean(values) * 1e6, 1)}
+
+
+# --- 1. por evento (subproceso: el logging raíz se configura una sola vez) --
+
+def child_events(events, sink):
+    import logging
+    sys.path.insert(0, SRC_DIR)
+    from shared import structured_logging
+
+    out = open(sink, 'a', buffering=1)
+    structured_logging.configure_logging(stream=out)
+    log = structured_logging.get_logger('bench.logging')
+    data = {'email': 'user@example.com', 'phone_number': '+34600123456'}
+
+    def banner():
+        print("=" * 50, file=out)
+        print("📝 REGISTRO - Datos recibidos:", file=out)
+        print(f"   Email: {data.get('email')}", file=out)
+        print(f"   Teléfono: {data.get('phone_number')}", file=out)
+        print("=" * 50, file=out)
+
+    def info():
+        log.info('register', email=data.get('email'), phone_number=data.get('phone_number'))
+
+    def debug():
+        log.debug('decode_image', dtype='uint8', shape=(480, 640, 3))
+
+    cases = [('print', banner, logging.INFO), ('info', info, logging.INFO),
+             ('debug-off', debug, logging.INFO), ('debug-1/100', debug, logging.DEBUG)]
+    results = {}
+    for name, fn, level in cases:
+        logging.getLogger().setLevel(level)
+        timings = []
+        for _ in range(events):
+            start = time.perf_counter()
+            fn()
+            timings.append(time.perf_counter() - start)
+        structured_logging.flush()
+        results[name] = percentiles(timings)
+    results['dropped'] = structured_logging.stats()['dropped']
+    print(json.dumps(results))
+
+
+# --- 2. extremo a extremo ---------------------------------------------------
+
+def child_requests(requests, sink):
+    # stderr (listener) al sink antes de importar nada
+    fd = os.open(sink, os.O_WRONLY | os.O_APPEND | os.O_CREAT)
+    os.dup2(fd, 2)
+    stdout = os.dup(1)
+    os.dup2(fd, 1)
+    sys.path.insert(0, SMS_DIR)
+    import main as sms_main
+    from shared import structured_logging
+
+    client = sms_main.app.test_client()
+    timings = []
+    for i in range(requests):
+        phone, email = f"+3460{i:07d}", f"u{i}@example.com"
+        start = time.perf_counter()
+        client.post('/register', json={'email': email, 'password': 'x', 'phone_number': phone})
+        code = sms_main.sms_service.last_otp(phone)
+        response = client.post('/verify-otp', json={'email': email, 'otp': code})
+        timings.append(time.perf_counter() - start)
+        assert response.status_code == 200, response.get_json()
+        # el proveedor en memoria guarda todos los mensajes
+        sms_main.sms_service.clear()
+    structured_logging.flush()
+    result = percentiles(timings[requests // 10:])
+    result['dropped'] = structured_logging.stats()['dropped']
+    os.write(stdout, (json.dumps(result) + '\n').encode())
+
+
+def run_child(args, sink, env=None):
+    command = [sys.executable, os.path.abspath(__file__), '--sink-path', sink,
+               '--events', str(args.events), '--requests', str(args.requests), '--child', args.child]
+    output = subprocess.run(command, env=env, capture_output=True, text=True, timeout=600)
+    if output.returncode != 0:
+        raise RuntimeError(output.stderr[-2000:])
+    return json.loads(output.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--events', type=int, default=20000)
+    parser.add_argument('--requests', type=int, default=1000)
+    parser.add_argument('--sink', choices=['file', 'devnull'], default='file')
+    parser.add_argument('--child', choices=['events', 'requests'], help=argparse.SUPPRESS)
+    parser.add_argument('--sink-path', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child == 'events':
+        return child_events(args.events, args.sink_path)
+    if args.child == 'requests':
+        return child_requests(args.requests, args.sink_path)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        sink = os.devnull if args.sink == 'devnull' else os.path.join(tmp, 'log.txt')
+
+        args.child = 'events'
+        events = run_child(args, sink)
+        print(f"Por evento ({args.events} eventos, salida a {args.sink}):")
+        for name in ('print', 'info', 'debug-off', 'debug-1/100'):
+            r = events[name]
+            print(f"  {name:<12} p50 {r['p50_us']:7.1f} µs  p99 {r['p99_us']:7.1f} µs  media {r['mean_us']:7.1f} µs")
+
+        args.child = 'requests'
+        print(f"\n/register + /verify-otp ({args.requests} iteraciones, sms_otp con mongomock):")
+        for level in LEVELS:
+            env = dict(os.environ, MONGO_URI="mongomock://", SMS_PROVIDER="memory", SMS_DISPATCH_WORKERS="0",
+                       RATE_LIMIT_ENABLED="0", PENDING_STORE="memory", LOG_LEVEL=level, LOG_DEBUG_SAMPLE="1")
+            r = run_child(args, sink, env)
+            print(f"  LOG_LEVEL={level:<6} p50 {r['p50_us'] / 1000:6.2f} ms  p95 {r['p95_us'] / 1000:6.2f} ms  "
+                  f"p99 {r['p99_us'] / 1000:6.2f} ms  descartados {r['dropped']}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,154 @@
+"""Coste de shared/metrics en el hilo de la petición.
+
+1. Por operación: lo que paga el código instrumentado
+   - inc:       outcome(...).inc() de un contador ya etiquetado
+   - observe:   observe() de un hijo de histograma (búsqueda del bucket + cerrojo)
+   - timer:     `with stage_timer(...).time():` alrededor de nada
+   - labels:    resolver el hijo en cada llamada (lo que evitan los hijos a nivel de módulo)
+   - render:    GET /metrics con todas las series de un proceso con los tres servicios
+2. Extremo a extremo: latencia de /register + /verify-otp de sms_otp (cliente
+   de pruebas de Flask, mongomock, proveedor SMS en memoria) en un subproceso
+   con METRICS_ENABLED=0 y otro con METRICS_ENABLED=1.
+
+Uso (desde src/):
+    python benchmarks/bench_metrics.py
+    python benchmarks/bench_metrics.py --ops 200000 --requests 3000
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+SRC_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SMS_DIR = os.path.join(SRC_DIR, 'sms_otp')
+
+
+def percentiles(values):
+    values = sorted(values)
+    pick = lambda p: values[min(len(values) - 1, int(len(values) * p))] * 1e6
+    return {'p50_us': round(pick(0.50), 2), 'p95_us': round(pick(0.95), 2), 'p99_us': round(pick(0.99), 2),
+            'mean_us': round(statistics.fmean(values) * 1e6, 2)}
+
+
+# --- 1. por operación -------------------------------------------------------
+
+def child_ops(ops):
+    sys.path.insert(0, SRC_DIR)
+    from shared import metrics
+
+    counter = metrics.outcome('bench', 'op', 'ok')
+    stage = metrics.stage_timer('bench', 'stage')
+
+    def inc():
+        counter.inc()
+
+    def observe():
+        stage.observe(0.0123)
+
+    def timer():
+        with stage.time():
+            pass
+
+    def labels():
+        metrics.STAGE_SECONDS.labels(service='bench', stage='stage').observe(0.0123)
+
+    results = {}
+    for name, fn in (('inc', inc), ('observe', observe), ('timer', timer), ('labels', labels)):
+        # el bucle en sí se resta con una llamada vacía
+        start = time.perf_counter()
+        for _ in range(ops):
+            fn()
+        elapsed = time.perf_counter() - start
+        start = time.perf_counter()
+        for _ in range(ops):
+            pass
+        results[name] = round((elapsed - (time.perf_counter() - start)) / ops * 1e9, 1)
+
+    # series de los tres servicios, como en la pasarela
+    for service in ('faceid', 'totp', 'sms_otp'):
+        for i in range(12):
+            metrics.HTTP_REQUEST_SECONDS.labels(service=service, endpoint=f'e{i}', method='POST', status=200).observe(0.01)
+            metrics.stage_timer(service, f's{i}').observe(0.01)
+            metrics.outcome(service, f'o{i}', 'ok').inc()
+    timings = []
+    for _ in range(200):
+        start = time.perf_counter()
+        body = metrics.REGISTRY.render()
+        timings.append(time.perf_counter() - start)
+    results['render'] = percentiles(timings)
+    results['render_bytes'] = len(body)
+    print(json.dumps(results))
+
+
+# --- 2. extremo a extremo ---------------------------------------------------
+
+def child_requests(requests):
+    sys.path.insert(0, SMS_DIR)
+    stdout = os.dup(1)
+    devnull = os.open(os.devnull, os.O_WRONLY)
+    os.dup2(devnull, 1)
+    import main as sms_main
+
+    client = sms_main.app.test_client()
+    timings = []
+    for i in range(requests):
+        phone, email = f"+3460{i:07d}", f"u{i}@example.com"
+        start = time.perf_counter()
+        client.post('/register', json={'email': email, 'password': 'x', 'phone_number': phone})
+        code = sms_main.sms_service.last_otp(phone)
+        response = client.post('/verify-otp', json={'email': email, 'otp': code})
+        timings.append(time.perf_counter() - start)
+        assert response.status_code == 200, response.get_json()
+        sms_main.sms_service.clear()
+    result = percentiles(timings[requests // 10:])
+    result['metrics_status'] = client.get('/metrics').status_code
+    os.write(stdout, (json.dumps(result) + '\n').encode())
+
+
+def run_child(args, env=None):
+    command = [sys.executable, os.path.abspath(__file__), '--ops', str(args.ops),
+               '--requests', str(args.requests), '--child', args.child]
+    output = subprocess.run(command, env=env, capture_output=True, text=True, timeout=600)
+    if output.returncode != 0:
+        raise RuntimeError(output.stderr[-2000:])
+    return json.loads(output.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--ops', type=int, default=100000)
+    parser.add_argument('--requests', type=int, default=1000)
+    parser.add_argument('--child', choices=['ops', 'requests'], help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child == 'ops':
+        return child_ops(args.ops)
+    if args.child == 'requests':
+        return child_requests(args.requests)
+
+    args.child = 'ops'
+    ops = run_child(args, dict(os.environ, METRICS_ENABLED="1"))
+    print(f"Por operación ({args.ops} llamadas, media):")
+    for name in ('inc', 'observe', 'timer', 'labels'):
+        print(f"  {name:<8} {ops[name]:7.1f} ns")
+    r = ops['render']
+    print(f"  render   p50 {r['p50_us']:7.1f} µs  p99 {r['p99_us']:7.1f} µs  ({ops['render_bytes']} bytes)")
+
+    args.child = 'requests'
+    print(f"\n/register + /verify-otp ({args.requests} iteraciones, sms_otp con mongomock):")
+    results = {}
+    for enabled in ("0", "1"):
+        env = dict(os.environ, MONGO_URI="mongomock://", SMS_PROVIDER="memory", SMS_DISPATCH_WORKERS="0",
+                   RATE_LIMIT_ENABLED="0", PENDING_STORE="memory", LOG_LEVEL="OFF", METRICS_ENABLED=enabled)
+        r = results[enabled] = run_child(args, env)
+        print(f"  METRICS_ENABLED={enabled}  p50 {r['p50_us'] / 1000:6.3f} ms  p95 {r['p95_us'] / 1000:6.3f} ms  "
+              f"p99 {r['p99_us'] / 1000:6.3f} ms  /metrics -> {r['metrics_status']}")
+    overhead = results["1"]['p50_us'] - results["0"]['p50_us']
+    print(f"Sobrecoste en la mediana: {overhead:+.1f} µs ({overhead / results['0']['p50_us'] * 100:+.1f}%)")
+
+
+if __name__ == '__main__':
+    main()
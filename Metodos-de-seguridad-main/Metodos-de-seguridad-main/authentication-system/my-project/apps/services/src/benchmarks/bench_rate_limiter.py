@@ -0,0 +1,99 @@
+"""Sobrecoste del limitador de peticiones por petición.
+
+1. check() directo: microsegundos por llamada con el backend en memoria y con
+   el de Mongo (mongomock por defecto, o --mongo-uri para un mongod real).
+2. Extremo a extremo: una app Flask mínima con y sin install_rate_limiter,
+   con límites altos para que todas las peticiones pasen.
+
+Uso (desde src/):
+    python benchmarks/bench_rate_limiter.py --iterations 20000
+    python benchmarks/bench_rate_limiter.py --mongo-uri mongodb://localhost:27017
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import Flask, jsonify, request
+
+from shared.rate_limiter import (RateLimiter, rule, install_rate_limiter, InMemoryRateLimitBackend,
+                                 MongoRateLimitBackend, SLIDING_WINDOW)
+
+ENDPOINT = '/verify-otp'
+HIGH_LIMIT = 10**9
+
+
+def build_rules():
+    return [
+        rule('bench_email', [ENDPOINT], 'email', HIGH_LIMIT, 60),
+        rule('bench_ip', [ENDPOINT], 'ip', HIGH_LIMIT, 60, algorithm=SLIDING_WINDOW),
+    ]
+
+
+def bench_check(limiter, iterations, distinct_keys):
+    start = time.perf_counter()
+    for i in range(iterations):
+        limiter.check(ENDPOINT, {'ip': f"10.0.{i % 250}.{i % distinct_keys % 250}",
+                                 'email': f"user{i % distinct_keys}@example.com"})
+    return (time.perf_counter() - start) / iterations * 1e6
+
+
+def build_app(limiter=None):
+    app = Flask(__name__)
+    app.secret_key = 'bench'
+
+    @app.route(ENDPOINT, methods=['POST'])
+    def verify():
+        # Como las vistas reales: el body se parsea una vez y Flask lo cachea
+        data = request.get_json()
+        return jsonify({'valid': False, 'email': data.get('email')}), 200
+
+    if limiter is not None:
+        install_rate_limiter(app, limiter)
+    return app
+
+
+def bench_http(app, iterations, distinct_keys):
+    client = app.test_client()
+    start = time.perf_counter()
+    for i in range(iterations):
+        client.post(ENDPOINT, json={'email': f"user{i % distinct_keys}@example.com", 'otp': '123456'})
+    return (time.perf_counter() - start) / iterations * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--iterations', type=int, default=20000)
+    parser.add_argument('--keys', type=int, default=1000, help="claves distintas (usuarios)")
+    parser.add_argument('--mongo-uri', help="mongod real para el backend Mongo (por defecto mongomock)")
+    args = parser.parse_args()
+
+    if args.mongo_uri:
+        from pymongo import MongoClient
+        db = MongoClient(args.mongo_uri)['rate_limit_bench']
+    else:
+        import mongomock
+        db = mongomock.MongoClient()['rate_limit_bench']
+    db['rate_limits'].drop()
+    mongo_iterations = max(args.iterations // 10, 100)
+
+    memory_us = bench_check(RateLimiter(InMemoryRateLimitBackend(), build_rules()), args.iterations, args.keys)
+    mongo_us = bench_check(RateLimiter(MongoRateLimitBackend(db), build_rules()), mongo_iterations, args.keys)
+    print(f"check() en memoria:  {memory_us:8.2f} µs/petición (2 reglas)")
+    print(f"check() Mongo:       {mongo_us:8.2f} µs/petición (2 reglas, {'mongod' if args.mongo_uri else 'mongomock'})")
+
+    http_iterations = max(args.iterations // 4, 100)
+    baseline = bench_http(build_app(), http_iterations, args.keys)
+    limited = bench_http(build_app(RateLimiter(InMemoryRateLimitBackend(), build_rules())), http_iterations, args.keys)
+    print(f"Flask sin limitador: {baseline:8.2f} µs/petición")
+    print(f"Flask con limitador: {limited:8.2f} µs/petición  (+{limited - baseline:.2f} µs, "
+          f"{(limited / baseline - 1) * 100:.1f}%)")
+
+    if args.mongo_uri:
+        db.client.drop_database('rate_limit_bench')
+
+
+if __name__ == '__main__':
+    main()
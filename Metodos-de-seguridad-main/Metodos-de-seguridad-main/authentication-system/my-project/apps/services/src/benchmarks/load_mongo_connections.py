@@ -0,0 +1,115 @@
+"""Prueba de carga: conexiones a MongoDB con un cliente por petición vs. pool compartido.
+
+Simula N peticiones concurrentes que hacen lo mismo que /api/health de faceid
+(ping + una lectura en users). En modo "per-request" cada petición crea su
+propio MongoClient como hacía get_repo(); en modo "shared" todas usan
+shared/mongo_connection. Se comparan las conexiones abiertas en el servidor
+(serverStatus.connections.totalCreated) y la latencia.
+
+Uso:
+    python benchmarks/load_mongo_connections.py --requests 2000 --threads 32
+    MONGO_MAX_POOL_SIZE=16 python benchmarks/load_mongo_connections.py --mode shared
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+from pymongo import MongoClient
+
+from shared.mongo_connection import (MONGO_URI, MONGO_DB_NAME, PoolStatsListener,
+                                     get_mongo_client, pool_stats, close_all)
+
+
+def server_connections(client):
+    try:
+        return client.admin.command('serverStatus')['connections']
+    except Exception:
+        return None
+
+
+def request_per_client(uri, db_name, listener):
+    client = MongoClient(uri, event_listeners=[listener])
+    try:
+        client.admin.command('ping')
+        client[db_name]['users'].find_one({}, {'_id': 1})
+    finally:
+        client.close()
+
+
+def request_shared(uri, db_name, listener):
+    client = get_mongo_client(uri)
+    client.admin.command('ping')
+    client[db_name]['users'].find_one({}, {'_id': 1})
+
+
+def run(mode, args):
+    listener = PoolStatsListener()
+    handler = request_per_client if mode == 'per-request' else request_shared
+    probe = MongoClient(args.uri)
+    before = server_connections(probe)
+
+    def timed(_):
+        start = time.perf_counter()
+        handler(args.uri, args.db, listener)
+        return (time.perf_counter() - start) * 1000
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.threads) as executor:
+        latencies = np.array(list(executor.map(timed, range(args.requests))))
+    elapsed = time.perf_counter() - start
+
+    after = server_connections(probe)
+    probe.close()
+
+    result = {
+        'mode': mode,
+        'requests': args.requests,
+        'threads': args.threads,
+        'elapsed_s': round(elapsed, 3),
+        'requests_per_s': round(args.requests / elapsed, 1),
+        'p50_ms': round(float(np.percentile(latencies, 50)), 2),
+        'p95_ms': round(float(np.percentile(latencies, 95)), 2),
+        'p99_ms': round(float(np.percentile(latencies, 99)), 2),
+    }
+    if before and after:
+        result['server_connections_created'] = after['totalCreated'] - before['totalCreated']
+        result['server_connections_current'] = after['current']
+    if mode == 'per-request':
+        result['client_pool'] = listener.stats()
+    else:
+        result['client_pool'] = pool_stats()
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--uri', default=MONGO_URI)
+    parser.add_argument('--db', default=MONGO_DB_NAME)
+    parser.add_argument('--requests', type=int, default=1000)
+    parser.add_argument('--threads', type=int, default=32)
+    parser.add_argument('--mode', choices=['per-request', 'shared', 'both'], default='both')
+    args = parser.parse_args()
+
+    modes = ['per-request', 'shared'] if args.mode == 'both' else [args.mode]
+    results = []
+    for mode in modes:
+        result = run(mode, args)
+        results.append(result)
+        print(json.dumps(result, indent=2))
+    close_all()
+
+    if len(results) == 2 and 'server_connections_created' in results[0]:
+        legacy, shared = results
+        print(f"\nConexiones creadas en el servidor: {legacy['server_connections_created']} -> "
+              f"{shared['server_connections_created']}  |  "
+              f"p95 {legacy['p95_ms']} ms -> {shared['p95_ms']} ms")
+
+
+if __name__ == '__main__':
+    main()
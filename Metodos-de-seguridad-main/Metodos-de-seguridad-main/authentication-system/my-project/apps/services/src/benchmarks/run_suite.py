@@ -0,0 +1,533 @@
+"""Suite de benchmarks reproducible de faceid, totp y sms_otp, sin red ni servicios externos.
+
+Cada servicio se mide en su propio subproceso (los tres usan los mismos
+paquetes de primer nivel) contra sustitutos locales:
+
+  - MongoDB: mongomock (o un mongod local con --mongo-uri)
+  - SMS: el proveedor en memoria (SMS_PROVIDER=memory), sin cola de envíos
+  - faceid: encodings sintéticos (numpy con semilla) para el 1:N y las rutas;
+    imágenes generadas con OpenCV o las de --images para face_processor
+
+Casos:
+  faceid.decode/detect/encode/process_face_image[WxH]   etapas de face_processor
+  faceid.match_exact[n=N], faceid.match_ivf[n=N]        1:N (FaceMatcher, IVFFaceIndex)
+  faceid.http.register/login_face/login_password        rutas con el cliente de pruebas
+  totp.verify_code[valid|invalid], totp.qr[formato]     OTPGenerator y QRGeneratorAdapter
+  totp.http.register_validate, totp.http.qr[...]
+  sms_otp.generate_otp, sms_otp.verify_otp[...]         SMSOTPGenerator sobre MongoOTPStore
+  sms_otp.http.register_verify
+
+Lo que no se puede medir aquí (p. ej. face_recognition sin instalar, o
+ningún rostro en las imágenes sintéticas) queda en "skipped" con el motivo.
+Los tiempos son milisegundos por llamada (p50, p95, media, mínimo).
+
+Uso (desde src/):
+    python benchmarks/run_suite.py --output base.json
+    python benchmarks/run_suite.py --output new.json --only totp,sms_otp
+    python benchmarks/run_suite.py --compare base.json new.json --threshold 0.15
+"""
+import argparse
+import base64
+import importlib.metadata
+import importlib.util
+import itertools
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import uuid
+from datetime import datetime, timezone
+
+SRC_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+GROUPS = ('faceid', 'totp', 'sms_otp')
+PACKAGES = ('numpy', 'cv2', 'face_recognition', 'flask', 'pymongo', 'mongomock', 'pyotp', 'qrcode', 'PIL')
+IMAGE_SIZES = ((640, 480), (1280, 720), (1920, 1080))
+
+# Mismo entorno para todas las ejecuciones: sin pools de procesos, cachés de
+# resultados ni limitador, para que se mida el trabajo y no el acierto
+SUITE_ENV = {
+    'MONGO_URI': 'mongomock://',
+    'SMS_PROVIDER': 'memory',
+    'SMS_DISPATCH_WORKERS': '0',
+    'PENDING_STORE': 'memory',
+    'RATE_LIMIT_ENABLED': '0',
+    'LOG_LEVEL': 'OFF',
+    'FACEID_WORKERS': '0',
+    'FACEID_ENCODING_CACHE_SIZE': '0',
+    'FACEID_GALLERY_SYNC_SECONDS': '3600',
+    'TOTP_QR_RENDER_WORKERS': '0',
+    'QR_CACHE_SIZE': '0',
+    'TOTP_VERIFIER_CACHE_SIZE': '0',
+    'PYTHONHASHSEED': '0',
+}
+
+
+def summarize(timings):
+    values = sorted(timings)
+    pick = lambda p: values[min(len(values) - 1, int(len(values) * p))] * 1000
+    return {
+        'n': len(values),
+        'p50_ms': round(pick(0.50), 4),
+        'p95_ms': round(pick(0.95), 4),
+        'mean_ms': round(statistics.fmean(values) * 1000, 4),
+        'min_ms': round(values[0] * 1000, 4)
+    }
+
+
+def measure(fn, samples, inner=1, warmup=None):
+    """`samples` medidas de `inner` llamadas cada una (para operaciones de
+    microsegundos); devuelve ms por llamada"""
+    for _ in range(max(1, samples // 10) if warmup is None else warmup):
+        fn()
+    timings = []
+    for _ in range(samples):
+        start = time.perf_counter()
+        for _ in range(inner):
+            fn()
+        timings.append((time.perf_counter() - start) / inner)
+    return summarize(timings)
+
+
+class Suite:
+    """Resultados de un grupo: {caso: estadísticas} y {caso: motivo}"""
+
+    def __init__(self, scale, seed):
+        self.scale = scale
+        self.seed = seed
+        self.results = {}
+        self.skipped = {}
+        # Identidades únicas por ejecución (con un mongod local puede haber datos previos)
+        self.run_id = uuid.uuid4().hex[:8]
+
+    def samples(self, count):
+        return max(5, int(count * self.scale))
+
+    def add(self, name, stats, **extra):
+        stats.update(extra)
+        self.results[name] = stats
+
+    def skip(self, name, reason):
+        self.skipped[name] = reason
+
+
+def use_service(name):
+    sys.path.insert(0, os.path.join(SRC_DIR, name))
+    sys.path.append(SRC_DIR)
+
+
+# --- faceid -----------------------------------------------------------------
+
+def synthetic_encoding(rng):
+    return rng.normal(0, 0.1, 128)
+
+
+def make_users(n, rng):
+    return [{
+        '_id': i,
+        'email': f'user{i}@example.com',
+        'first_name': f'User {i}',
+        'secret_encoding': synthetic_encoding(rng)
+    } for i in range(n)]
+
+
+def synthetic_image(width, height, rng):
+    """JPEG con fondo, ruido y una silueta de cara (no la reconoce un detector real)"""
+    import cv2
+    import numpy as np
+
+    gradient = np.linspace(40, 200, width, dtype=np.float32)
+    image = np.repeat(np.tile(gradient, (height, 1))[:, :, None], 3, axis=2)
+    image += rng.normal(0, 12, image.shape)
+    image = np.clip(image, 0, 255).astype(np.uint8)
+    center, axes = (width // 2, height // 2), (height // 6, height // 4)
+    cv2.ellipse(image, center, axes, 0, 0, 360, (140, 170, 210), -1)
+    for dx in (-axes[0] // 2, axes[0] // 2):
+        cv2.circle(image, (center[0] + dx, center[1] - axes[1] // 4), max(2, axes[0] // 8), (40, 40, 40), -1)
+    cv2.ellipse(image, (center[0], center[1] + axes[1] // 2), (axes[0] // 3, axes[1] // 10), 0, 0, 180, (60, 60, 120), 2)
+    ok, encoded = cv2.imencode('.jpg', image, [cv2.IMWRITE_JPEG_QUALITY, 90])
+    return encoded.tobytes()
+
+
+def load_images(args, rng):
+    """[(etiqueta, bytes del fichero)]: los de --images o los sintéticos"""
+    if args.images:
+        images = []
+        for name in sorted(os.listdir(args.images)):
+            if name.lower().endswith(('.jpg', '.jpeg', '.png', '.webp')):
+                with open(os.path.join(args.images, name), 'rb') as f:
+                    images.append((name, f.read()))
+        return images
+    return [(f'{width}x{height}', synthetic_image(width, height, rng)) for width, height in IMAGE_SIZES]
+
+
+def bench_face_processor(suite, args, rng):
+    if importlib.util.find_spec('face_recognition') is None:
+        suite.skip('faceid.face_processor', 'face_recognition no está instalado')
+        return
+
+    from domain import face_processor as fp
+
+    for label, data in load_images(args, rng):
+        payload = base64.b64encode(data).decode('ascii')
+        suite.add(f'faceid.decode[{label}]', measure(lambda: fp.decode_image(payload), suite.samples(50)),
+                  bytes=len(data))
+
+        image = fp.decode_image(payload)
+        rgb = fp.cv2.cvtColor(image, fp.cv2.COLOR_BGR2RGB)
+
+        def detect():
+            small, scale = fp.downscale_for_detection(rgb)
+            locations = fp.detect_faces(small)
+            return [fp.scale_face_location(loc, scale, rgb.shape) for loc in locations] if scale != 1.0 else locations
+
+        faces = detect()
+        suite.add(f'faceid.detect[{label}]', measure(detect, suite.samples(10), warmup=1),
+                  detector=fp.DETECTOR, faces=len(faces))
+
+        if len(faces) == 1:
+            def encode():
+                crop, box = fp.crop_for_encoding(rgb, faces[0])
+                return fp.face_recognition.face_encodings(crop, [box], num_jitters=fp.NUM_JITTERS,
+                                                          model=fp.ENCODING_MODEL)
+            suite.add(f'faceid.encode[{label}]', measure(encode, suite.samples(10), warmup=1))
+        else:
+            suite.skip(f'faceid.encode[{label}]', f'{len(faces)} rostros detectados (hace falta 1; ver --images)')
+
+        suite.add(f'faceid.process_face_image[{label}]',
+                  measure(lambda: fp.process_face_image(payload), suite.samples(10), warmup=1))
+
+
+def bench_face_matching(suite, args, rng):
+    from domain.face_matcher import FaceMatcher
+    from infraestructure.ivf_face_index import IVFFaceIndex
+
+    for n in args.gallery_sizes:
+        users = make_users(n, rng)
+        # sondas cerca de usuarios al azar, como un login real
+        probes = [users[int(i)]['secret_encoding'] + rng.normal(0, 0.01, 128) for i in rng.integers(n, size=64)]
+        probe = itertools.cycle(probes)
+
+        suite.add(f'faceid.gallery_build[n={n}]',
+                  measure(lambda: FaceMatcher.from_users(users), suite.samples(10), warmup=1))
+        matcher = FaceMatcher.from_users(users)
+        suite.add(f'faceid.match_exact[n={n}]',
+                  measure(lambda: matcher.search(next(probe), k=1), suite.samples(200), inner=5 if n <= 1000 else 1))
+
+        index = IVFFaceIndex.from_users(users, seed=suite.seed)
+        suite.add(f'faceid.match_ivf[n={n}]',
+                  measure(lambda: index.search(next(probe), k=1), suite.samples(200), inner=5 if n <= 1000 else 1))
+
+
+def bench_faceid_http(suite, args, rng):
+    if importlib.util.find_spec('face_recognition') is None:
+        suite.skip('faceid.http', 'face_recognition no está instalado (lo importa el controlador)')
+        return
+
+    import main as faceid_main
+    from adapters.http import flask_controller as controller
+
+    faceid_main.start_services()
+    # Encoder sintético: el cuerpo "image" es "user:<i>" o "probe:<i>"; las
+    # etapas de imagen ya se miden arriba, aquí la ruta, la galería y Mongo
+    encodings = {}
+
+    def synthetic_encoder(image_data):
+        kind, _, index = image_data.partition(':')
+        base = encodings.setdefault(int(index), synthetic_encoding(rng))
+        encoding = base if kind == 'user' else base + rng.normal(0, 0.01, 128)
+        return encoding, None, {}
+
+    controller.get_face_encoder = lambda: synthetic_encoder
+    client = controller.app.test_client()
+    users = suite.samples(200)
+    counter = itertools.count()
+
+    def register():
+        i = next(counter)
+        response = client.post('/api/register', json={
+            'first_name': f'User {i}', 'email': f'{suite.run_id}.{i}@example.com',
+            'password': 'x', 'image': f'user:{i}'
+        })
+        assert response.status_code == 201, response.get_json()
+
+    suite.add('faceid.http.register', measure(register, users, warmup=0))
+    registered = next(counter)
+
+    probe = itertools.cycle(range(registered))
+
+    def login_face():
+        response = client.post('/api/login/face', json={'image': f'probe:{next(probe)}'})
+        assert response.status_code == 200, response.get_json()
+
+    suite.add('faceid.http.login_face', measure(login_face, suite.samples(200)), gallery=registered)
+
+    def login_password():
+        i = next(probe)
+        response = client.post('/api/login/password', json={'email': f'{suite.run_id}.{i}@example.com', 'password': 'x'})
+        assert response.status_code == 200, response.get_json()
+
+    suite.add('faceid.http.login_password', measure(login_password, suite.samples(200)))
+
+
+def run_faceid(suite, args):
+    import numpy as np
+    use_service('faceid')
+    bench_face_processor(suite, args, np.random.default_rng(suite.seed))
+    bench_face_matching(suite, args, np.random.default_rng(suite.seed))
+    bench_faceid_http(suite, args, np.random.default_rng(suite.seed))
+
+
+# --- totp -------------------------------------------------------------------
+
+def run_totp(suite, args):
+    import random
+
+    import pyotp
+
+    use_service('totp')
+    from domain.otp_generator import OTPGenerator
+    from adapters.http.qr_generator_adapter import QRGeneratorAdapter
+    from ports.qr_service_port import QR_FORMATS
+
+    secret = base64.b32encode(random.Random(suite.seed).randbytes(20)).decode('ascii')
+    generator = OTPGenerator(secret=secret)
+    code = pyotp.TOTP(secret).now()
+    wrong = f"{(int(code) + 500000) % 1000000:06d}"
+    suite.add('totp.verify_code[valid]', measure(lambda: generator.verify_code(code), suite.samples(200), inner=20))
+    suite.add('totp.verify_code[invalid]', measure(lambda: generator.verify_code(wrong), suite.samples(200), inner=20))
+
+    adapter = QRGeneratorAdapter()
+    uri = generator.generate_uri('bench@example.com', 'MyApp')
+    for fmt in QR_FORMATS:
+        suite.add(f'totp.qr[{fmt}]', measure(lambda: adapter.render(uri, fmt), suite.samples(50)),
+                  bytes=len(adapter.render(uri, fmt)))
+
+    import main as totp_main
+    totp_main.start_services()
+    client = totp_main.app.test_client()
+    counter = itertools.count()
+
+    def register_validate():
+        i = next(counter)
+        response = client.post('/register', json={'email': f'{suite.run_id}.{i}@example.com', 'password': 'x',
+                                                  'first_name': f'User {i}'})
+        otp = pyotp.parse_uri(response.get_json()['otp_uri']).now()
+        response = client.post('/validate', json={'code': otp})
+        assert response.get_json().get('valid') is True, response.get_json()
+
+    suite.add('totp.http.register_validate', measure(register_validate, suite.samples(200)))
+
+    # la sesión se queda con el último usuario registrado
+    suite.add('totp.http.qr[png]', measure(lambda: client.get('/qr'), suite.samples(100)))
+    etag = client.get('/qr?format=svg').headers['ETag']
+    suite.add('totp.http.qr[304]', measure(lambda: client.get('/qr?format=svg', headers={'If-None-Match': etag}),
+                                           suite.samples(200)))
+
+
+# --- sms_otp ----------------------------------------------------------------
+
+def run_sms_otp(suite, args):
+    use_service('sms_otp')
+    from domain.sms_otp_generator import SMSOTPGenerator
+    from infrastructure.mongo_otp_store import MongoOTPStore
+    from shared.mongo_connection import get_database
+
+    generator = SMSOTPGenerator(MongoOTPStore(get_database(), collection_name=f'bench_otps_{suite.run_id}'))
+    count = suite.samples(300)
+    phones = [f"+3460{i:07d}" for i in range(count * 2)]
+    codes = {}
+    generate_phone = iter(phones)
+
+    def generate():
+        phone = next(generate_phone)
+        codes[phone] = generator.generate_otp(phone)
+
+    suite.add('sms_otp.generate_otp', measure(generate, count, warmup=count // 10))
+
+    pending = iter(list(codes.items()))
+    suite.add('sms_otp.verify_otp[valid]', measure(lambda: generator.verify_otp(*next(pending)), count, warmup=0))
+    # mismos teléfonos, código ya consumido
+    used = itertools.cycle(list(codes.items()))
+    suite.add('sms_otp.verify_otp[used]', measure(lambda: generator.verify_otp(*next(used)), count))
+
+    import main as sms_main
+    client = sms_main.app.test_client()
+    counter = itertools.count()
+
+    def register_verify():
+        i = next(counter)
+        phone, email = f"+3461{i:07d}", f"{suite.run_id}.{i}@example.com"
+        client.post('/register', json={'email': email, 'password': 'x', 'phone_number': phone})
+        code = sms_main.sms_service.last_otp(phone)
+        response = client.post('/verify-otp', json={'email': email, 'otp': code})
+        assert response.status_code == 200, response.get_json()
+        # el proveedor en memoria guarda todos los mensajes
+        sms_main.sms_service.clear()
+
+    suite.add('sms_otp.http.register_verify', measure(register_verify, suite.samples(200)))
+
+
+RUNNERS = {'faceid': run_faceid, 'totp': run_totp, 'sms_otp': run_sms_otp}
+
+
+# --- ejecución --------------------------------------------------------------
+
+def run_child(args):
+    # Los servicios escriben su arranque con print: stdout al vacío y el JSON por el original
+    stdout = os.dup(1)
+    devnull = os.open(os.devnull, os.O_WRONLY)
+    os.dup2(devnull, 1)
+    suite = Suite(args.scale, args.seed)
+    RUNNERS[args.child](suite, args)
+    os.write(stdout, (json.dumps({'results': suite.results, 'skipped': suite.skipped}) + '\n').encode())
+
+
+def package_versions():
+    """Versión instalada de cada paquete (None si falta), sin importarlos"""
+    distributions = importlib.metadata.packages_distributions()
+    versions = {}
+    for name in PACKAGES:
+        versions[name] = None
+        for distribution in distributions.get(name, ()):
+            try:
+                versions[name] = importlib.metadata.version(distribution)
+                break
+            except importlib.metadata.PackageNotFoundError:
+                continue
+    return versions
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=SRC_DIR, capture_output=True,
+                              text=True, timeout=30).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def run_suite(args):
+    env = dict(os.environ, **SUITE_ENV)
+    if args.mongo_uri:
+        env['MONGO_URI'] = args.mongo_uri
+    report = {
+        'meta': {
+            'started_at': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            'commit': git_commit(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'packages': package_versions(),
+            'mongo_uri': env['MONGO_URI'] if env['MONGO_URI'].startswith('mongomock') else 'mongod',
+            'seed': args.seed,
+            'scale': args.scale,
+            'gallery_sizes': args.gallery_sizes,
+            'images': 'custom' if args.images else 'synthetic'
+        },
+        'results': {},
+        'skipped': {}
+    }
+
+    for group in args.only:
+        started = time.perf_counter()
+        command = [sys.executable, os.path.abspath(__file__), '--child', group, '--seed', str(args.seed),
+                   '--scale', str(args.scale), '--gallery-sizes', *map(str, args.gallery_sizes)]
+        if args.images:
+            command += ['--images', args.images]
+        output = subprocess.run(command, env=env, capture_output=True, text=True, timeout=3600)
+        if output.returncode != 0:
+            raise RuntimeError(f"{group} falló:\n{output.stderr[-3000:]}")
+        child = json.loads(output.stdout.strip().splitlines()[-1])
+        report['results'].update(child['results'])
+        report['skipped'].update(child['skipped'])
+        print(f"{group}: {len(child['results'])} casos, {len(child['skipped'])} omitidos "
+              f"({time.perf_counter() - started:.1f}s)", file=sys.stderr)
+    return report
+
+
+def print_report(report):
+    for name, stats in report['results'].items():
+        print(f"  {name:<40} p50 {stats['p50_ms']:10.4f} ms  p95 {stats['p95_ms']:10.4f} ms  n={stats['n']}",
+              file=sys.stderr)
+    for name, reason in report['skipped'].items():
+        print(f"  {name:<40} omitido: {reason}", file=sys.stderr)
+
+
+# --- comparación ------------------------------------------------------------
+
+def compare(base, new, metric, threshold, min_delta_ms):
+    """Imprime la comparación y devuelve los casos que empeoran más de `threshold`
+    (relativo) y de `min_delta_ms` (absoluto, para no marcar ruido de microsegundos)"""
+    for key in ('python', 'platform', 'cpu_count', 'packages', 'mongo_uri', 'scale', 'images'):
+        if base['meta'].get(key) != new['meta'].get(key):
+            print(f"⚠️  Entornos distintos ({key}): {base['meta'].get(key)} -> {new['meta'].get(key)}")
+
+    regressions = []
+    print(f"{'caso':<40} {'base':>12} {'nuevo':>12} {'cambio':>9}")
+    for name in sorted(set(base['results']) | set(new['results'])):
+        if name not in new['results']:
+            print(f"{name:<40} {'':>12} {'(falta)':>12}")
+            continue
+        if name not in base['results']:
+            print(f"{name:<40} {'(nuevo)':>12} {new['results'][name][metric]:10.4f}ms")
+            continue
+        old_value, new_value = base['results'][name][metric], new['results'][name][metric]
+        change = (new_value - old_value) / old_value if old_value else 0.0
+        flag = ''
+        if change > threshold and new_value - old_value > min_delta_ms:
+            flag = '  REGRESIÓN'
+            regressions.append(name)
+        elif change < -threshold and old_value - new_value > min_delta_ms:
+            flag = '  mejora'
+        print(f"{name:<40} {old_value:10.4f}ms {new_value:10.4f}ms {change * 100:+8.1f}%{flag}")
+
+    print(f"\n{len(regressions)} regresiones ({metric}, umbral {threshold * 100:.0f}% y {min_delta_ms} ms)")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--output', help="fichero JSON de resultados (por defecto, stdout)")
+    parser.add_argument('--only', default=','.join(GROUPS), help="servicios separados por comas")
+    parser.add_argument('--scale', type=float, default=1.0, help="multiplica el número de muestras (0.2 = rápido)")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--gallery-sizes', type=int, nargs='+', default=[100, 1000, 10000])
+    parser.add_argument('--images', help="directorio con fotos reales para las etapas de face_processor")
+    parser.add_argument('--mongo-uri', help="mongod local en lugar de mongomock")
+    parser.add_argument('--compare', nargs=2, metavar=('BASE', 'NUEVO'), help="compara dos ficheros de resultados")
+    parser.add_argument('--metric', default='p50_ms', choices=['p50_ms', 'p95_ms', 'mean_ms', 'min_ms'])
+    parser.add_argument('--threshold', type=float, default=0.10, help="empeoramiento relativo que cuenta como regresión")
+    parser.add_argument('--min-delta-ms', type=float, default=0.005)
+    parser.add_argument('--child', choices=GROUPS, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        return run_child(args)
+
+    if args.compare:
+        with open(args.compare[0]) as f:
+            base = json.load(f)
+        with open(args.compare[1]) as f:
+            new = json.load(f)
+        regressions = compare(base, new, args.metric, args.threshold, args.min_delta_ms)
+        sys.exit(1 if regressions else 0)
+
+    args.only = [name.strip() for name in args.only.split(',') if name.strip()]
+    unknown = set(args.only) - set(GROUPS)
+    if unknown:
+        parser.error(f"servicios desconocidos: {', '.join(sorted(unknown))}")
+
+    report = run_suite(args)
+    print_report(report)
+    data = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(data + '\n')
+    else:
+        print(data)
+
+
+if __name__ == '__main__':
+    main()
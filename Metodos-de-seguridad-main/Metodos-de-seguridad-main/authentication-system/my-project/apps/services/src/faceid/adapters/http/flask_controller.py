@@ -1,5 +1,5 @@
 import os
-import sys 
+import json
 from flask import Flask, request, jsonify, session
 from flask_cors import CORS
 
@@ -8,23 +8,91 @@ from application.register_usecase import RegisterUseCase
 from application.login_face_usecase import LoginFaceUseCase
 from application.login_password_usecase import LoginPasswordUseCase
 from application.user_management_usecase import UserManagementUseCase
+from application.batch_register_usecase import BatchRegisterUseCase, encode_sequentially
+from application.stream_login_face_usecase import StreamLoginFaceUseCase
+from application.metrics import GALLERY_USERS, FACE_POOL_IN_FLIGHT
 from infraestructure.mongo_user_repository import MongoUserRepository # (Respeta tu nombre "infraestructure")
+from infraestructure.face_gallery import FaceGallery
+from infraestructure.ivf_face_index import IVFFaceIndex
+from infraestructure.face_worker_pool import FaceWorkerPool, FaceWorkerPoolBusyError, FaceWorkerTimeoutError
+from domain.face_matcher import FaceMatcher
+from domain.face_processor import process_face_image, encoding_cache
+from shared.mongo_connection import pool_stats
+from shared.metrics import install_metrics
+from shared.structured_logging import get_logger
+
+log = get_logger('faceid.routes')
 
 app = Flask(__name__)
 app.config["SECRET_KEY"] = os.environ.get("FLASK_SECRET_KEY", "faceid-clave-local-segura")
 CORS(app, supports_credentials=True,
      resources={r"/*": {"origins": ["http://127.0.0.1:5500", "http://localhost:5500"]}})
+# GET /metrics (Prometheus) y latencia por endpoint
+install_metrics(app, 'faceid')
 
 # Helper para instanciar el repo
+# Un único repositorio por proceso: reutiliza el pool de conexiones compartido
+_repo = None
+
 def get_repo():
-    return MongoUserRepository()
+    global _repo
+    if _repo is None:
+        _repo = MongoUserRepository()
+    return _repo
+
+def build_gallery():
+    # FACEID_SEARCH_MODE: "exact" (fuerza bruta vectorizada) o "ann" (índice IVF aproximado)
+    sync_interval = float(os.environ.get("FACEID_GALLERY_SYNC_SECONDS", 10))
+    if os.environ.get("FACEID_SEARCH_MODE", "exact").lower() == "ann":
+        return FaceGallery(
+            get_repo(),
+            sync_interval=sync_interval,
+            index_class=IVFFaceIndex,
+            index_options={'nprobe': int(os.environ.get("FACEID_ANN_NPROBE", 16))},
+            snapshot_path=os.environ.get("FACEID_ANN_INDEX_PATH")
+        )
+    return FaceGallery(get_repo(), sync_interval=sync_interval, index_class=FaceMatcher)
+
+# Galería residente de encodings (se carga al arrancar, ver main.py)
+gallery = build_gallery()
+
+# Máximo de usuarios por petición de alta masiva (los lotes mayores se trocean en el cliente)
+BATCH_MAX_USERS = int(os.environ.get("FACEID_BATCH_MAX_USERS", 1000))
+
+# Pool de procesos para codificar rostros (se crea en main.py con start_face_pool)
+face_pool = None
+
+GALLERY_USERS.set_function(lambda: len(gallery))
+FACE_POOL_IN_FLIGHT.set_function(lambda: face_pool.in_flight if face_pool is not None else 0)
+
+def start_face_pool():
+    global face_pool
+    face_pool = FaceWorkerPool.from_env()
+    return face_pool
+
+def get_face_encoder():
+    return face_pool.encode if face_pool is not None else process_face_image
+
+def busy_response(e):
+    # Backpressure: el cliente debe reintentar más tarde
+    response = jsonify({'success': False, 'message': str(e)})
+    response.headers['Retry-After'] = '1'
+    return response, 503
+
+def response_timings(route, timings):
+    """Tiempos que se devuelven al cliente: el pid del worker sólo va al log"""
+    timings = dict(timings or {})
+    worker_pid = timings.pop('worker_pid', None)
+    if worker_pid is not None:
+        log.debug('face_job_timings', route=route, worker_pid=worker_pid, **timings)
+    return timings
 
 @app.route('/api/register', methods=['POST'])
 def register():
     try:
         data = request.json
         repo = get_repo()
-        use_case = RegisterUseCase(repo)
+        use_case = RegisterUseCase(repo, gallery, get_face_encoder())
         
         user_id = use_case.execute(
             data.get('first_name'),
@@ -35,25 +103,48 @@ def register():
         return jsonify({
             'success': True,
             'message': f'Usuario registrado exitosamente',
-            'userId': user_id
+            'userId': user_id,
+            'timings': response_timings('/api/register', use_case.timings)
         }), 201
-        
+
+    except (FaceWorkerPoolBusyError, FaceWorkerTimeoutError) as e:
+        return busy_response(e)
     except (ValueError, Exception) as e:
-        # --- INICIO DE LA CORRECCIÓN ---
-        print(f"❌ Error en /api/register: {e}", file=sys.stderr)
-        sys.stderr.flush() # Forzar la impresión en la terminal
-        sys.stdout.flush() # Forzar la impresión en la terminal
-        # --- FIN DE LA CORRECCIÓN ---
-        
+        log.warning('request_failed', route='/api/register', error=str(e), error_type=type(e).__name__)
         status_code = 409 if "El email ya está registrado" in str(e) else 400
         return jsonify({'success': False, 'message': str(e)}), status_code
 
+@app.route('/api/register/batch', methods=['POST'])
+def register_batch():
+    """Alta masiva: JSON {"users": [...]} o NDJSON (un usuario por línea)"""
+    try:
+        if request.mimetype in ('application/x-ndjson', 'application/jsonl'):
+            records = [json.loads(line) for line in request.get_data(as_text=True).splitlines() if line.strip()]
+        else:
+            data = request.json or {}
+            records = data.get('users', data) if isinstance(data, dict) else data
+
+        if not isinstance(records, list) or not records:
+            return jsonify({'success': False, 'message': 'Se requiere una lista de usuarios'}), 400
+        if len(records) > BATCH_MAX_USERS:
+            return jsonify({'success': False,
+                            'message': f'El lote supera el máximo de {BATCH_MAX_USERS} usuarios'}), 413
+
+        encode_many = face_pool.encode_many if face_pool is not None else encode_sequentially
+        use_case = BatchRegisterUseCase(get_repo(), gallery, encode_many)
+        report = use_case.execute(records)
+        return jsonify({'success': report['stats']['failed'] == 0, **report}), 200
+
+    except Exception as e:
+        log.warning('request_failed', route='/api/register/batch', error=str(e), error_type=type(e).__name__)
+        return jsonify({'success': False, 'message': str(e)}), 400
+
 @app.route('/api/login/face', methods=['POST'])
 def login_face():
     try:
         data = request.json
         repo = get_repo()
-        use_case = LoginFaceUseCase(repo)
+        use_case = LoginFaceUseCase(repo, gallery, get_face_encoder())
         
         user, confidence = use_case.execute(data.get('image'))
         
@@ -65,15 +156,57 @@ def login_face():
             'success': True,
             'message': f'Bienvenido {user["first_name"]}',
             'user': user,
-            'confidence': confidence
+            'confidence': confidence,
+            'timings': response_timings('/api/login/face', use_case.timings)
         }), 200
-        
+
+    except (FaceWorkerPoolBusyError, FaceWorkerTimeoutError) as e:
+        return busy_response(e)
     except (ValueError, Exception) as e:
-        # --- INICIO DE LA CORRECCIÓN ---
-        print(f"❌ Error en /api/login/face: {e}", file=sys.stderr)
-        sys.stderr.flush()
-        sys.stdout.flush()
-        # --- FIN DE LA CORRECCIÓN ---
+        log.warning('request_failed', route='/api/login/face', error=str(e), error_type=type(e).__name__)
+        return jsonify({'success': False, 'message': str(e)}), 401
+
+def read_stream_frames(stream):
+    """Frames del cuerpo NDJSON según llegan: {"image": "..."} o base64 suelto por línea"""
+    for line in iter(stream.readline, b''):
+        line = line.strip()
+        if not line:
+            continue
+        if line.startswith(b'{'):
+            try:
+                yield json.loads(line).get('image')
+            except ValueError:
+                continue
+        else:
+            yield line.decode('ascii', errors='ignore')
+
+@app.route('/api/login/face/stream', methods=['POST'])
+def login_face_stream():
+    """Login con varios frames (HTTP chunked, NDJSON): se detiene en la primera coincidencia"""
+    try:
+        login_use_case = LoginFaceUseCase(get_repo(), gallery, get_face_encoder())
+        use_case = StreamLoginFaceUseCase(
+            login_use_case,
+            max_seconds=float(os.environ.get("FACEID_STREAM_MAX_SECONDS", 15)),
+            max_frames=int(os.environ.get("FACEID_STREAM_MAX_FRAMES", 50))
+        )
+        # request.stream se lee en este hilo; el caso de uso sólo reparte los frames ya leídos
+        result = use_case.execute(read_stream_frames(request.stream))
+
+        if not result['success']:
+            return jsonify(result), 401
+
+        user = result['user']
+        session['email'] = user['email']
+        session['first_name'] = user['first_name']
+        session['auth_method'] = 'faceid'
+        result['message'] = f'Bienvenido {user["first_name"]}'
+        return jsonify(result), 200
+
+    except (FaceWorkerPoolBusyError, FaceWorkerTimeoutError) as e:
+        return busy_response(e)
+    except Exception as e:
+        log.warning('request_failed', route='/api/login/face/stream', error=str(e), error_type=type(e).__name__)
         return jsonify({'success': False, 'message': str(e)}), 401
 
 @app.route('/api/login/password', methods=['POST'])
@@ -96,11 +229,7 @@ def login_password():
         }), 200
 
     except (ValueError, Exception) as e:
-        # --- INICIO DE LA CORRECCIÓN ---
-        print(f"❌ Error en /api/login/password: {e}", file=sys.stderr)
-        sys.stderr.flush()
-        sys.stdout.flush()
-        # --- FIN DE LA CORRECCIÓN ---
+        log.warning('request_failed', route='/api/login/password', error=str(e), error_type=type(e).__name__)
         return jsonify({'success': False, 'message': str(e)}), 401
 
 @app.route('/api/users', methods=['GET'])
@@ -111,18 +240,14 @@ def get_users():
         users = use_case.get_all_users()
         return jsonify({'success': True, 'users': users}), 200
     except Exception as e:
-        # --- INICIO DE LA CORRECCIÓN ---
-        print(f"❌ Error en /api/users: {e}", file=sys.stderr)
-        sys.stderr.flush()
-        sys.stdout.flush()
-        # --- FIN DE LA CORRECCIÓN ---
+        log.warning('request_failed', route='/api/users', error=str(e), error_type=type(e).__name__)
         return jsonify({'success': False, 'message': str(e)}), 500
 
 @app.route('/api/users/<string:user_id>', methods=['DELETE'])
 def delete_user(user_id):
     try:
         repo = get_repo()
-        use_case = UserManagementUseCase(repo)
+        use_case = UserManagementUseCase(repo, gallery)
         success = use_case.delete_user(user_id)
         
         if success:
@@ -130,11 +255,7 @@ def delete_user(user_id):
         else:
             return jsonify({'success': False, 'message': 'Usuario no encontrado'}), 404
     except Exception as e:
-        # --- INICIO DE LA CORRECCIÓN ---
-        print(f"❌ Error en /api/users/<id>: {e}", file=sys.stderr)
-        sys.stderr.flush()
-        sys.stdout.flush()
-        # --- FIN DE LA CORRECCIÓN ---
+        log.warning('request_failed', route='/api/users/<id>', error=str(e), error_type=type(e).__name__)
         return jsonify({'success': False, 'message': str(e)}), 500
 
 @app.route('/api/health', methods=['GET'])
@@ -147,5 +268,9 @@ def health_check():
         'success': True, 
         'message': 'Server is running',
         'database': db_name,
-        'db_status': status
+        'db_status': status,
+        'gallery': gallery.stats(),
+        'face_pool': face_pool.stats() if face_pool is not None else None,
+        'encoding_cache': encoding_cache.stats(),
+        'mongo_pool': pool_stats()
     }), 200
\ No newline at end of file
@@ -0,0 +1,108 @@
+import time
+
+from domain.face_processor import process_face_image, hash_password
+from ports.user_repository_port import UserRepositoryPort
+from application.metrics import REGISTER_INVALID, REGISTER_OK, SAVE, observe_face_timings
+
+def encode_sequentially(images):
+    return [process_face_image(image_data) for image_data in images]
+
+def _email_of(record):
+    email = record.get('email') if isinstance(record, dict) else None
+    return email if isinstance(email, str) else None
+
+class BatchRegisterUseCase:
+    """Alta masiva: valida, codifica rostros en paralelo y escribe por bloques"""
+
+    def __init__(self, user_repository: UserRepositoryPort, gallery=None,
+                 encode_many=encode_sequentially, chunk_size=500):
+        self.user_repository = user_repository
+        self.gallery = gallery
+        # encode_many(lista de imágenes) -> lista de (encoding, error, tiempos)
+        self.encode_many = encode_many
+        self.chunk_size = chunk_size
+
+    def execute(self, records):
+        start = time.perf_counter()
+        records = list(records)
+        results = [{'index': i, 'email': _email_of(r), 'success': False} for i, r in enumerate(records)]
+
+        # 1. Validación y duplicados dentro del propio lote
+        pending = []
+        seen = set()
+        for i, record in enumerate(records):
+            if not isinstance(record, dict):
+                results[i]['error'] = 'Cada usuario debe ser un objeto JSON'
+                continue
+            first_name = record.get('first_name') or record.get('name')
+            if not all(isinstance(value, str) for value in (record.get('email'), record.get('password'),
+                                                             first_name, record.get('image')) if value):
+                # Listas o dicts no son hashables y romperían el lote entero
+                results[i]['error'] = 'Los campos email, password, first_name e image deben ser texto'
+            elif not record.get('email') or not record.get('password') or not first_name or not record.get('image'):
+                results[i]['error'] = 'Todos los campos son requeridos (email, password, first_name, image)'
+            elif record['email'] in seen:
+                results[i]['error'] = 'Email duplicado en el lote'
+            else:
+                seen.add(record['email'])
+                pending.append((i, record, first_name))
+
+        # 2. Emails ya registrados, en una sola consulta
+        existing = self.user_repository.find_existing_emails(seen) if seen else set()
+        to_encode = []
+        for i, record, first_name in pending:
+            if record['email'] in existing:
+                results[i]['error'] = 'El email ya está registrado'
+            else:
+                to_encode.append((i, record, first_name))
+
+        # 3. Encoding en paralelo
+        encode_start = time.perf_counter()
+        encoded = self.encode_many([record['image'] for _, record, _ in to_encode])
+        encode_seconds = time.perf_counter() - encode_start
+
+        to_save = []
+        for (i, record, first_name), (face_encoding, error, timings) in zip(to_encode, encoded):
+            observe_face_timings(timings)
+            if error:
+                REGISTER_INVALID.inc()
+                results[i]['error'] = error
+                continue
+            to_save.append((i, {
+                'email': record['email'],
+                'hashed_password': hash_password(record['password']),
+                'first_name': first_name,
+                'face_encoding': face_encoding
+            }))
+
+        # 4. Escritura por bloques con insert_many
+        write_start = time.perf_counter()
+        for offset in range(0, len(to_save), self.chunk_size):
+            chunk = to_save[offset:offset + self.chunk_size]
+            with SAVE.time():
+                saved = self.user_repository.save_users_bulk([user for _, user in chunk])
+            for (i, user), (user_id, error) in zip(chunk, saved):
+                if error:
+                    results[i]['error'] = error
+                    continue
+                results[i]['success'] = True
+                results[i]['user_id'] = user_id
+                REGISTER_OK.inc()
+                if self.gallery is not None:
+                    self.gallery.add_user(user_id, user['email'], user['first_name'], user['face_encoding'])
+        write_seconds = time.perf_counter() - write_start
+
+        elapsed = time.perf_counter() - start
+        succeeded = sum(1 for r in results if r['success'])
+        return {
+            'results': results,
+            'stats': {
+                'total': len(records),
+                'succeeded': succeeded,
+                'failed': len(records) - succeeded,
+                'elapsed_s': round(elapsed, 3),
+                'encode_s': round(encode_seconds, 3),
+                'write_s': round(write_seconds, 3),
+                'records_per_s': round(len(records) / elapsed, 2) if elapsed > 0 else None
+            }
+        }
@@ -1,45 +1,54 @@
 # Imports corregidos (sin ".." y sin sys.path)
-from domain.face_processor import decode_image, get_face_encoding
+from domain.face_processor import process_face_image
+from domain.face_matcher import FaceMatcher, MATCH_THRESHOLD, distance_to_confidence
 from ports.user_repository_port import UserRepositoryPort
-import face_recognition
+from application.metrics import (GALLERY_FETCH, MATCH, MATCH_OK, MATCH_NONE, MATCH_INVALID,
+                                 observe_face_timings)
 
 class LoginFaceUseCase:
-    def __init__(self, user_repository: UserRepositoryPort):
+    def __init__(self, user_repository: UserRepositoryPort, gallery=None, face_encoder=process_face_image):
         self.user_repository = user_repository
+        self.gallery = gallery
+        # face_encoder(image_data) -> (encoding, error, tiempos); puede ser el pool de procesos
+        self.face_encoder = face_encoder
+        self.timings = {}
 
     def execute(self, image_data):
         if not image_data:
             raise ValueError("No se proporcionó imagen")
 
-        image = decode_image(image_data)
-        if image is None:
-            raise ValueError("Error al procesar la imagen")
-            
-        face_encoding, error = get_face_encoding(image)
+        face_encoding, error, self.timings = self.face_encoder(image_data)
+        observe_face_timings(self.timings)
         if error:
+            MATCH_INVALID.inc()
             raise ValueError(error)
             
-        users = self.user_repository.get_all_users_with_secret()
+        if self.gallery is not None:
+            # Galería residente: no se consulta Mongo en cada login. search()
+            # la carga si hace falta (un solo acierto/fallo por búsqueda) y
+            # cronometra esa carga como gallery_fetch
+            return self.match(self.gallery, face_encoding)
+
+        with GALLERY_FETCH.time():
+            users = self.user_repository.get_all_users_with_secret()
+            matcher = FaceMatcher.from_users(users) if users else None
         if not users:
             raise ValueError("No hay usuarios registrados con Face ID")
 
-        best_match = None
-        best_confidence = 0
-        
-        for user in users:
-            stored_encoding = user['secret_encoding']
-            face_distance = face_recognition.face_distance([stored_encoding], face_encoding)[0]
-            confidence = (1 - face_distance) * 100
-            
-            if confidence > 55 and confidence > best_confidence:
-                best_confidence = confidence
-                best_match = {
-                    'id': str(user['_id']),
-                    'email': user['email'],
-                    'first_name': user['first_name']
-                }
-        
-        if best_match:
-            return best_match, round(best_confidence, 2)
-        else:
-            raise ValueError("Rostro no reconocido. Intenta nuevamente.")
\ No newline at end of file
+        return self.match(matcher, face_encoding)
+
+    def match(self, matcher, face_encoding):
+        """Busca el usuario más parecido y aplica el umbral de confianza"""
+        with MATCH.time():
+            candidates = matcher.search(face_encoding, k=1)
+        if not candidates and len(matcher) == 0:
+            raise ValueError("No hay usuarios registrados con Face ID")
+        if candidates:
+            best_match, distance = candidates[0]
+            confidence = distance_to_confidence(distance)
+            if confidence > MATCH_THRESHOLD:
+                MATCH_OK.inc()
+                return dict(best_match), round(confidence, 2)
+
+        MATCH_NONE.inc()
+        raise ValueError("Rostro no reconocido. Intenta nuevamente.")
\ No newline at end of file
@@ -0,0 +1,35 @@
+from shared.metrics import gauge, outcome, stage_timer
+
+# decode, detect y encode pueden ejecutarse en un worker del pool: se anotan
+# en el proceso principal a partir de los tiempos que devuelve
+DECODE = stage_timer('faceid', 'decode')
+DETECT = stage_timer('faceid', 'detect')
+ENCODE = stage_timer('faceid', 'encode')
+GALLERY_FETCH = stage_timer('faceid', 'gallery_fetch')
+MATCH = stage_timer('faceid', 'match')
+SAVE = stage_timer('faceid', 'save')
+
+MATCH_OK = outcome('faceid', 'match', 'match')
+MATCH_NONE = outcome('faceid', 'match', 'no_match')
+MATCH_INVALID = outcome('faceid', 'match', 'invalid_image')
+REGISTER_OK = outcome('faceid', 'register', 'ok')
+REGISTER_INVALID = outcome('faceid', 'register', 'invalid_image')
+ENCODING_CACHE_HIT = outcome('faceid', 'encoding_cache', 'hit')
+ENCODING_CACHE_MISS = outcome('faceid', 'encoding_cache', 'miss')
+
+GALLERY_USERS = gauge('faceid_gallery_users', 'Usuarios en la galería residente')
+FACE_POOL_IN_FLIGHT = gauge('faceid_face_pool_in_flight', 'Imágenes en cola o en proceso en el pool de rostros')
+
+
+def observe_face_timings(timings):
+    """Anota decode/detect/encode a partir de los tiempos en ms de process_face_image"""
+    if not timings:
+        return
+    if 'decode_ms' in timings:
+        DECODE.observe(timings['decode_ms'] / 1000)
+    if 'detect_ms' in timings:
+        DETECT.observe(timings['detect_ms'] / 1000)
+    if 'encode_ms' in timings:
+        ENCODE.observe(timings['encode_ms'] / 1000)
+    if 'cache_hit' in timings:
+        (ENCODING_CACHE_HIT if timings['cache_hit'] else ENCODING_CACHE_MISS).inc()
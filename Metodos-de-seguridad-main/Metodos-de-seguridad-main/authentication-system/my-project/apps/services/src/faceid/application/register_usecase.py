@@ -1,26 +1,31 @@
 # Imports corregidos (sin ".." y sin sys.path)
-from domain.face_processor import decode_image, get_face_encoding, hash_password
+from domain.face_processor import process_face_image, hash_password
 from ports.user_repository_port import UserRepositoryPort
-import base64
-import pickle
+from application.metrics import SAVE, REGISTER_OK, REGISTER_INVALID, observe_face_timings
 
 class RegisterUseCase:
-    def __init__(self, user_repository: UserRepositoryPort):
+    def __init__(self, user_repository: UserRepositoryPort, gallery=None, face_encoder=process_face_image):
         self.user_repository = user_repository
+        self.gallery = gallery
+        # face_encoder(image_data) -> (encoding, error, tiempos); puede ser el pool de procesos
+        self.face_encoder = face_encoder
+        self.timings = {}
 
     def execute(self, first_name, email, password, image_data):
         if not email or not password or not first_name or not image_data:
             raise ValueError('Todos los campos son requeridos (email, password, first_name, image)')
 
-        image = decode_image(image_data)
-        if image is None:
-            raise ValueError("Error al procesar la imagen")
-
-        face_encoding, error = get_face_encoding(image)
+        face_encoding, error, self.timings = self.face_encoder(image_data)
+        observe_face_timings(self.timings)
         if error:
+            REGISTER_INVALID.inc()
             raise ValueError(error)
             
         hashed_pass = hash_password(password)
         
-        user_id = self.user_repository.save_user(email, hashed_pass, first_name, face_encoding, "faceid")
+        with SAVE.time():
+            user_id = self.user_repository.save_user(email, hashed_pass, first_name, face_encoding, "faceid")
+        if self.gallery is not None:
+            self.gallery.add_user(user_id, email, first_name, face_encoding)
+        REGISTER_OK.inc()
         return user_id
\ No newline at end of file
@@ -0,0 +1,112 @@
+import threading
+import time
+
+class _LatestFrame:
+    """Hueco de un solo frame: si llega otro antes de procesarlo, el viejo se descarta"""
+
+    def __init__(self):
+        self.condition = threading.Condition()
+        self.frame = None
+        self.closed = False
+        self.received = 0
+        self.skipped = 0
+
+    def put(self, frame):
+        with self.condition:
+            if self.frame is not None:
+                self.skipped += 1
+            self.frame = frame
+            self.received += 1
+            self.condition.notify()
+
+    def close(self):
+        with self.condition:
+            self.closed = True
+            self.condition.notify()
+
+    def take(self, timeout):
+        """Devuelve el frame más reciente, o None si el stream terminó o se agotó el tiempo"""
+        with self.condition:
+            self.condition.wait_for(lambda: self.frame is not None or self.closed, timeout)
+            frame, self.frame = self.frame, None
+            return frame
+
+class StreamLoginFaceUseCase:
+    """Login facial sobre una secuencia de frames con salida temprana.
+
+    Los frames los lee quien llama, en su propio hilo: la entrada WSGI de la
+    petición no se toca desde otro hilo ni después de responder. Un hilo de
+    trabajo procesa siempre el más reciente (los que llegan mientras se procesa
+    otro se saltan) y en cuanto hay una coincidencia, se agota el tiempo o se
+    llega al máximo de frames se deja de leer. La decisión se ve al llegar la
+    siguiente línea o al cerrarse el stream.
+    """
+
+    def __init__(self, login_use_case, max_seconds=15, max_frames=50):
+        self.login_use_case = login_use_case
+        self.max_seconds = max_seconds
+        self.max_frames = max_frames
+
+    def execute(self, frames):
+        start = time.perf_counter()
+        slot = _LatestFrame()
+        stop = threading.Event()
+        done = threading.Event()
+        state = {'processed': 0, 'user': None, 'confidence': None,
+                 'error': "No se recibieron frames", 'failure': None}
+
+        def match_frames():
+            # Sólo frames ya leídos: este hilo nunca lee de `frames`
+            try:
+                while state['processed'] < self.max_frames and not stop.is_set():
+                    frame = slot.take(None)
+                    if frame is None or stop.is_set():
+                        break
+                    state['processed'] += 1
+                    try:
+                        state['user'], state['confidence'] = self.login_use_case.execute(frame)
+                        break
+                    except ValueError as e:
+                        state['error'] = str(e)
+            except Exception as e:
+                # p. ej. pool de rostros saturado: se relanza en el hilo de la petición
+                state['failure'] = e
+            finally:
+                done.set()
+
+        threading.Thread(target=match_frames, name="face-stream-matcher", daemon=True).start()
+
+        timed_out = False
+        try:
+            for frame in frames:
+                if done.is_set():
+                    break
+                if time.perf_counter() - start >= self.max_seconds:
+                    timed_out = True
+                    break
+                if frame:
+                    slot.put(frame)
+            # Fin del stream: el hilo termina con el frame pendiente, si lo hay
+            slot.close()
+            if not timed_out:
+                timed_out = not done.wait(max(0.0, self.max_seconds - (time.perf_counter() - start)))
+        finally:
+            stop.set()
+            slot.close()
+
+        if state['failure'] is not None and state['user'] is None:
+            raise state['failure']
+        user = state['user']
+        if user is None and timed_out:
+            state['error'] = "Tiempo agotado sin reconocer el rostro"
+
+        return {
+            'success': user is not None,
+            'user': user,
+            'confidence': state['confidence'],
+            'message': None if user is not None else state['error'],
+            'frames_received': slot.received,
+            'frames_processed': state['processed'],
+            'frames_skipped': slot.skipped,
+            'time_to_decision_ms': round((time.perf_counter() - start) * 1000, 2)
+        }
@@ -2,11 +2,15 @@
 from ports.user_repository_port import UserRepositoryPort
 
 class UserManagementUseCase:
-    def __init__(self, user_repository: UserRepositoryPort):
+    def __init__(self, user_repository: UserRepositoryPort, gallery=None):
         self.user_repository = user_repository
+        self.gallery = gallery
 
     def get_all_users(self):
         return self.user_repository.get_all_users()
 
     def delete_user(self, user_id: str):
-        return self.user_repository.delete_user_by_id(user_id)
\ No newline at end of file
+        deleted = self.user_repository.delete_user_by_id(user_id)
+        if deleted and self.gallery is not None:
+            self.gallery.remove_user(user_id)
+        return deleted
\ No newline at end of file
@@ -0,0 +1,87 @@
+"""Benchmark: búsqueda exacta (FaceMatcher) vs índice aproximado IVF.
+
+Mide latencia por búsqueda y recall@1 del IVF respecto a la búsqueda exacta
+que usa LoginFaceUseCase, con encodings sintéticos.
+
+Uso:
+    python benchmarks/bench_ann_index.py --sizes 10000 100000 --nprobe 4 8 16
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.abspath(os.path.join(current_dir, '..')))
+
+from domain.face_matcher import FaceMatcher
+from infraestructure.ivf_face_index import IVFFaceIndex, recall_at_1
+
+
+def make_users(n, rng):
+    encodings = rng.normal(0, 0.1, (n, 128))
+    return [
+        {'_id': i, 'email': f'user{i}@example.com', 'first_name': f'User {i}', 'secret_encoding': encodings[i]}
+        for i in range(n)
+    ]
+
+
+def make_probes(users, count, noise, rng):
+    """Sondas = encoding de un usuario al azar + ruido (otra foto de la misma persona)"""
+    targets = rng.integers(len(users), size=count)
+    return [users[t]['secret_encoding'] + rng.normal(0, noise, 128) for t in targets]
+
+
+def time_search(index, probes):
+    start = time.perf_counter()
+    for probe in probes:
+        index.search(probe, k=1)
+    return (time.perf_counter() - start) / len(probes) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 100000])
+    parser.add_argument('--nprobe', type=int, nargs='+', default=[4, 8, 16, 32])
+    parser.add_argument('--probes', type=int, default=200)
+    parser.add_argument('--noise', type=float, default=0.03,
+                        help='desviación del ruido de las sondas (0.03 ~ distancia 0.34)')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    for n in args.sizes:
+        users = make_users(n, rng)
+        probes = make_probes(users, args.probes, args.noise, rng)
+
+        exact = FaceMatcher.from_users(users)
+        exact_ms = time_search(exact, probes)
+
+        start = time.perf_counter()
+        ivf = IVFFaceIndex.from_users(users)
+        build_s = time.perf_counter() - start
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'index.npz')
+            start = time.perf_counter()
+            ivf.save(path)
+            save_s = time.perf_counter() - start
+            start = time.perf_counter()
+            IVFFaceIndex.load(path)
+            load_s = time.perf_counter() - start
+
+        print(f"\n{n} usuarios — exacto: {exact_ms:.3f} ms/búsqueda | IVF build {build_s:.2f}s, "
+              f"save {save_s:.2f}s, load {load_s:.2f}s, nlist={len(ivf.centroids) if ivf.is_trained else 0}")
+        print(f"{'nprobe':>8} {'ms/búsqueda':>12} {'speedup':>9} {'recall@1':>9}")
+        for nprobe in args.nprobe:
+            ivf.nprobe = nprobe
+            ivf_ms = time_search(ivf, probes)
+            recall = recall_at_1(ivf, exact, probes)
+            print(f"{nprobe:>8} {ivf_ms:>12.3f} {exact_ms / ivf_ms:>8.1f}x {recall:>9.3f}")
+
+
+if __name__ == '__main__':
+    main()
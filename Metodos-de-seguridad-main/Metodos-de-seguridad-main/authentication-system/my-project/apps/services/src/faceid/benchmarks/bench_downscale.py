@@ -0,0 +1,85 @@
+"""Benchmark: precisión vs latencia del reescalado antes de la detección.
+
+Procesa cada imagen de un directorio local con distintos FACEID_MAX_DETECT_DIM
+y compara contra la resolución completa (0 = sin reescalar): latencia de
+detección + encoding, rostros detectados y distancia del encoding obtenido
+respecto al de resolución completa (< 0.45 equivale a confianza > 55%).
+
+Uso:
+    python benchmarks/bench_downscale.py --images ./fotos --dims 0 1024 640 480 320
+"""
+import argparse
+import glob
+import os
+import sys
+import time
+
+import cv2
+import numpy as np
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.abspath(os.path.join(current_dir, '..')))
+sys.path.append(os.path.abspath(os.path.join(current_dir, '..', '..')))
+
+from domain.face_processor import get_face_encoding
+
+IMAGE_PATTERNS = ('*.jpg', '*.jpeg', '*.png', '*.webp', '*.bmp')
+
+
+def load_images(directory):
+    paths = sorted(p for pattern in IMAGE_PATTERNS for p in glob.glob(os.path.join(directory, pattern)))
+    images = []
+    for path in paths:
+        image = cv2.imread(path, cv2.IMREAD_COLOR)
+        if image is not None:
+            images.append((os.path.basename(path), image))
+    return images
+
+
+def run(images, max_dim):
+    results = {}
+    for name, image in images:
+        timings = {}
+        start = time.perf_counter()
+        encoding, error = get_face_encoding(image, timings, max_detect_dim=max_dim)
+        results[name] = {
+            'encoding': encoding,
+            'error': error,
+            'ms': (time.perf_counter() - start) * 1000,
+            'detect_ms': timings.get('detect_ms', 0)
+        }
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--images', required=True, help='directorio con fotos de rostros')
+    parser.add_argument('--dims', type=int, nargs='+', default=[0, 1024, 640, 480, 320])
+    args = parser.parse_args()
+
+    images = load_images(args.images)
+    if not images:
+        sys.exit(f"No se encontraron imágenes en {args.images}")
+    megapixels = np.mean([img.shape[0] * img.shape[1] / 1e6 for _, img in images])
+    print(f"{len(images)} imágenes, {megapixels:.1f} MP de media")
+
+    baseline = run(images, 0)
+    print(f"{'max_dim':>8} {'total ms':>9} {'detect ms':>10} {'detectados':>11} {'coinciden':>10} {'dist media':>11} {'dist máx':>9}")
+    for max_dim in args.dims:
+        results = baseline if max_dim == 0 else run(images, max_dim)
+        detected = sum(1 for r in results.values() if r['encoding'] is not None)
+        distances = [
+            float(np.linalg.norm(results[name]['encoding'] - baseline[name]['encoding']))
+            for name in results
+            if results[name]['encoding'] is not None and baseline[name]['encoding'] is not None
+        ]
+        matched = sum(1 for d in distances if d < 0.45)
+        mean_ms = np.mean([r['ms'] for r in results.values()])
+        detect_ms = np.mean([r['detect_ms'] for r in results.values()])
+        print(f"{max_dim:>8} {mean_ms:>9.1f} {detect_ms:>10.1f} {detected:>11} {matched:>10} "
+              f"{np.mean(distances) if distances else float('nan'):>11.4f} "
+              f"{max(distances) if distances else float('nan'):>9.4f}")
+
+
+if __name__ == '__main__':
+    main()
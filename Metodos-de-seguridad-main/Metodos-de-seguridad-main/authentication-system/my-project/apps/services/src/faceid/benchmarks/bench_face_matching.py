@@ -0,0 +1,93 @@
+"""Benchmark: bucle original de face_distance vs FaceMatcher vectorizado.
+
+Uso:
+    python benchmarks/bench_face_matching.py --sizes 1000 10000 100000
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.abspath(os.path.join(current_dir, '..')))
+
+from domain.face_matcher import FaceMatcher, MATCH_THRESHOLD, distance_to_confidence
+
+try:
+    from face_recognition import face_distance
+except ImportError:
+    # Misma implementación que face_recognition.face_distance
+    def face_distance(face_encodings, face_to_compare):
+        if len(face_encodings) == 0:
+            return np.empty((0))
+        return np.linalg.norm(face_encodings - face_to_compare, axis=1)
+
+
+def make_users(n, rng):
+    users = []
+    for i in range(n):
+        users.append({
+            '_id': i,
+            'email': f'user{i}@example.com',
+            'first_name': f'User {i}',
+            'secret_encoding': rng.normal(0, 0.1, 128)
+        })
+    return users
+
+
+def legacy_match(users, face_encoding):
+    """Copia del bucle que usaba LoginFaceUseCase antes de FaceMatcher"""
+    best_match = None
+    best_confidence = 0
+    for user in users:
+        distance = face_distance([user['secret_encoding']], face_encoding)[0]
+        confidence = (1 - distance) * 100
+        if confidence > MATCH_THRESHOLD and confidence > best_confidence:
+            best_confidence = confidence
+            best_match = str(user['_id'])
+    return best_match, best_confidence
+
+
+def vectorized_match(matcher, face_encoding):
+    user, distance = matcher.search(face_encoding, k=1)[0]
+    confidence = distance_to_confidence(distance)
+    if confidence > MATCH_THRESHOLD:
+        return user['id'], confidence
+    return None, 0
+
+
+def timed(fn, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = fn()
+    return (time.perf_counter() - start) / repeat, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 100000])
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    print(f"{'usuarios':>10} {'bucle (ms)':>12} {'vectorizado (ms)':>18} {'build (ms)':>12} {'speedup':>9}  igual")
+    for n in args.sizes:
+        users = make_users(n, rng)
+        # sonda cercana a un usuario al azar para que haya coincidencia
+        target = users[int(rng.integers(n))]
+        probe = target['secret_encoding'] + rng.normal(0, 0.01, 128)
+
+        build_time, matcher = timed(lambda: FaceMatcher.from_users(users), 1)
+        loop_time, loop_result = timed(lambda: legacy_match(users, probe), args.repeat)
+        vec_time, vec_result = timed(lambda: vectorized_match(matcher, probe), args.repeat)
+
+        same = loop_result[0] == vec_result[0]
+        print(f"{n:>10} {loop_time * 1000:>12.2f} {vec_time * 1000:>18.3f} "
+              f"{build_time * 1000:>12.1f} {loop_time / vec_time:>8.0f}x  {same}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,67 @@
+import hashlib
+import threading
+from collections import OrderedDict
+
+
+class FaceEncodingCache:
+    """Caché LRU de resultados de detección + encoding.
+
+    La clave es un hash del contenido de la imagen ya decodificada (más la
+    configuración del detector), así que un reintento del cliente o un registro
+    duplicado con la misma foto no vuelve a pasar por dlib.
+    """
+
+    def __init__(self, max_entries=256):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def enabled(self):
+        return self.max_entries > 0
+
+    @staticmethod
+    def make_key(image, config=()):
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(repr((image.shape, str(image.dtype), config)).encode())
+        digest.update(memoryview(image).cast('B') if image.flags.c_contiguous else image.tobytes())
+        return digest.hexdigest()
+
+    def get(self, key):
+        with self._lock:
+            value = self._entries.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        if not self.enabled:
+            return
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._entries),
+                'max_entries': self.max_entries,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else None
+            }
@@ -0,0 +1,125 @@
+import numpy as np
+
+from ports.face_index_port import FaceIndexPort
+
+# Umbral de confianza (en %) para aceptar una coincidencia, igual que antes
+MATCH_THRESHOLD = 55
+
+ENCODING_SIZE = 128
+
+
+def distance_to_confidence(distance):
+    """Convierte una distancia euclidiana en porcentaje de confianza"""
+    return (1 - float(distance)) * 100
+
+
+def user_info(user):
+    """Datos públicos de un documento de usuario que devuelve el login"""
+    return {
+        'id': str(user['_id']),
+        'email': user['email'],
+        'first_name': user['first_name']
+    }
+
+
+class FaceMatcher(FaceIndexPort):
+    """Búsqueda 1:N vectorizada sobre todos los encodings registrados.
+
+    Los encodings se guardan en una única matriz float32 contigua (N x 128) y
+    la sonda se compara contra todos los usuarios en una sola pasada. La matriz
+    reserva capacidad extra para poder añadir y quitar usuarios sin reconstruirla.
+    """
+
+    def __init__(self, encodings=(), users=()):
+        if len(encodings) != len(users):
+            raise ValueError("encodings y users deben tener la misma longitud")
+
+        self._size = 0
+        self._matrix = np.empty((max(len(encodings), 16), ENCODING_SIZE), dtype=np.float32)
+        self._sq_norms = np.empty(self._matrix.shape[0], dtype=np.float32)
+        self.users = []
+        self._positions = {}
+
+        if len(encodings):
+            self._matrix[:len(encodings)] = np.vstack(encodings)
+            self._size = len(encodings)
+            self._sq_norms[:self._size] = np.einsum('ij,ij->i', self.matrix, self.matrix)
+            self.users = list(users)
+            self._positions = {user['id']: i for i, user in enumerate(self.users)}
+
+    @classmethod
+    def from_users(cls, users):
+        """Construye el matcher a partir de get_all_users_with_secret()"""
+        encodings = []
+        infos = []
+        for user in users:
+            encodings.append(user['secret_encoding'])
+            infos.append(user_info(user))
+        return cls(encodings, infos)
+
+    @property
+    def matrix(self):
+        return self._matrix[:self._size]
+
+    def __len__(self):
+        return self._size
+
+    def __contains__(self, user_id):
+        return user_id in self._positions
+
+    def add(self, user, face_encoding):
+        """Añade (o reemplaza) un usuario; user debe incluir 'id'"""
+        if user['id'] in self._positions:
+            self.remove(user['id'])
+
+        if self._size == self._matrix.shape[0]:
+            capacity = self._matrix.shape[0] * 2
+            self._matrix = np.resize(self._matrix, (capacity, ENCODING_SIZE))
+            self._sq_norms = np.resize(self._sq_norms, capacity)
+
+        row = self._size
+        self._matrix[row] = face_encoding
+        self._sq_norms[row] = self._matrix[row] @ self._matrix[row]
+        self.users.append(user)
+        self._positions[user['id']] = row
+        self._size += 1
+
+    def remove(self, user_id):
+        """Quita un usuario moviendo la última fila a su hueco. Devuelve True si existía"""
+        row = self._positions.pop(user_id, None)
+        if row is None:
+            return False
+
+        last = self._size - 1
+        if row != last:
+            self._matrix[row] = self._matrix[last]
+            self._sq_norms[row] = self._sq_norms[last]
+            self.users[row] = self.users[last]
+            self._positions[self.users[row]['id']] = row
+        self.users.pop()
+        self._size -= 1
+        return True
+
+    def distances(self, face_encoding):
+        """Distancia euclidiana de la sonda contra todos los usuarios"""
+        probe = np.asarray(face_encoding, dtype=np.float32)
+        # ||x - p||^2 = ||x||^2 - 2 x·p + ||p||^2
+        sq = self._sq_norms[:self._size] - 2.0 * (self.matrix @ probe) + float(probe @ probe)
+        np.maximum(sq, 0.0, out=sq)
+        return np.sqrt(sq)
+
+    def search(self, face_encoding, k=1):
+        """Devuelve los k usuarios más cercanos como lista de (user, distancia)"""
+        if self._size == 0:
+            return []
+
+        distances = self.distances(face_encoding)
+        k = min(k, len(distances))
+        if k == 1:
+            order = [int(np.argmin(distances))]
+        else:
+            candidates = np.argpartition(distances, k - 1)[:k]
+            # orden estable para que los empates se resuelvan como en el bucle original
+            order = candidates[np.lexsort((candidates, distances[candidates]))]
+
+        return [(self.users[i], float(distances[i])) for i in order]
@@ -4,30 +4,60 @@ import numpy as np
 import pickle
 import base64
 import hashlib
+import os
+import time
+from functools import lru_cache
+
+from domain.face_encoding_cache import FaceEncodingCache
+from shared.structured_logging import get_logger
+
+log = get_logger('faceid.face_processor')
+
+# Lado máximo (px) de la imagen sobre la que se detecta; 0 desactiva el reescalado
+MAX_DETECT_DIM = int(os.environ.get("FACEID_MAX_DETECT_DIM", 640))
+# Lado máximo (px) del rostro en el recorte usado para el encoding
+# (dlib lo normaliza a 150x150, así que más resolución no aporta)
+ENCODE_FACE_SIZE = int(os.environ.get("FACEID_ENCODE_FACE_SIZE", 300))
+
+# Detector: "hog" (dlib, por defecto), "cnn" (dlib, lento sin GPU),
+# "haar" (cascada de OpenCV) o "dnn" (SSD de OpenCV, requiere los ficheros del modelo)
+DETECTOR = os.environ.get("FACEID_DETECTOR", "hog").lower()
+UPSAMPLE = int(os.environ.get("FACEID_UPSAMPLE", 1))
+NUM_JITTERS = int(os.environ.get("FACEID_NUM_JITTERS", 1))
+# Modelo de landmarks para el encoding: "small" (5 puntos) o "large" (68 puntos)
+ENCODING_MODEL = os.environ.get("FACEID_ENCODING_MODEL", "small")
+DNN_PROTOTXT = os.environ.get("FACEID_DNN_PROTOTXT", "deploy.prototxt")
+DNN_MODEL = os.environ.get("FACEID_DNN_MODEL", "res10_300x300_ssd_iter_140000.caffemodel")
+DNN_CONFIDENCE = float(os.environ.get("FACEID_DNN_CONFIDENCE", 0.6))
+
+# Caché de resultados por contenido de imagen (0 la desactiva); es por proceso
+encoding_cache = FaceEncodingCache(max_entries=int(os.environ.get("FACEID_ENCODING_CACHE_SIZE", 256)))
 
 def hash_password(password):
     """Hashea una contraseña con SHA256"""
     return hashlib.sha256(password.encode()).hexdigest()
 
 def decode_image(base64_string):
-    """Convierte imagen base64 a formato numpy array y normaliza canales/dtype"""
+    """Convierte imagen base64 (o bytes del fichero ya leídos) a numpy array y normaliza canales/dtype"""
     if not base64_string:
-        print("decode_image: no se recibió cadena base64")
+        log.warning('decode_image_failed', reason='empty')
         return None
 
     try:
+        if isinstance(base64_string, (bytes, bytearray)):
+            # Bytes crudos del fichero (p. ej. alta masiva desde disco): sin base64
+            img_data = base64_string
         # Acepta data URIs del tipo "data:image/png;base64,...." o raw base64
-        if ',' in base64_string:
-            payload = base64_string.split(',', 1)[1]
+        elif ',' in base64_string:
+            img_data = base64.b64decode(base64_string.split(',', 1)[1])
         else:
-            payload = base64_string
+            img_data = base64.b64decode(base64_string)
 
-        img_data = base64.b64decode(payload)
         nparr = np.frombuffer(img_data, np.uint8)
         img = cv2.imdecode(nparr, cv2.IMREAD_UNCHANGED)  # mantener canales para detectar alpha
 
         if img is None:
-            print("decode_image: cv2.imdecode devolvió None (base64 inválido o formato no soportado)")
+            log.warning('decode_image_failed', reason='imdecode', size=len(img_data))
             return None
 
         # Asegurar dtype uint8
@@ -35,7 +65,7 @@ def decode_image(base64_string):
             try:
                 img = img.astype(np.uint8)
             except Exception as e:
-                print(f"decode_image: no se pudo convertir dtype a uint8: {e}")
+                log.warning('decode_image_failed', reason='dtype', dtype=str(img.dtype), error=str(e))
                 return None
 
         # Normalizar canales:
@@ -47,22 +77,111 @@ def decode_image(base64_string):
             img = cv2.cvtColor(img, cv2.COLOR_BGRA2BGR)
         # si ya es 3 canales (BGR) queda igual
 
-        # Debug: informar dtype/shape antes de devolver
-        try:
-            print(f"decode_image: salida dtype={img.dtype}, shape={img.shape}, ndim={img.ndim}")
-        except Exception:
-            pass
-
+        log.debug('decode_image', dtype=str(img.dtype), shape=img.shape)
         return img
     except (ValueError, base64.binascii.Error) as e:
-        print(f"Error decodificando base64: {e}")
+        log.warning('decode_image_failed', reason='base64', error=str(e))
         return None
     except Exception as e:
-        print(f"Error decodificando imagen: {e}")
+        # p. ej. cv2.error con datos vacíos: error del cliente, sin traza
+        log.warning('decode_image_failed', reason='decode', error=str(e).strip(), error_type=type(e).__name__)
         return None
 
-def get_face_encoding(image):
-    """Obtiene el encoding facial de una imagen"""
+def process_face_image(image_data):
+    """Decodifica, detecta y codifica. Devuelve (encoding, error, tiempos en ms por etapa)"""
+    timings = {}
+    start = time.perf_counter()
+    image = decode_image(image_data)
+    timings['decode_ms'] = round((time.perf_counter() - start) * 1000, 2)
+    if image is None:
+        return None, "Error al procesar la imagen", timings
+
+    face_encoding, error = get_face_encoding(image, timings)
+    return face_encoding, error, timings
+
+def downscale_for_detection(rgb_image, max_dim=MAX_DETECT_DIM):
+    """Reduce la imagen para detectar más rápido. Devuelve (imagen, escala aplicada)"""
+    height, width = rgb_image.shape[:2]
+    longest = max(height, width)
+    if not max_dim or longest <= max_dim:
+        return rgb_image, 1.0
+
+    scale = max_dim / longest
+    size = (max(1, round(width * scale)), max(1, round(height * scale)))
+    small = cv2.resize(rgb_image, size, interpolation=cv2.INTER_AREA)
+    return np.ascontiguousarray(small), scale
+
+def scale_face_location(location, scale, shape):
+    """Lleva una caja (top, right, bottom, left) de la imagen reducida a la original"""
+    height, width = shape[:2]
+    top, right, bottom, left = location
+    return (
+        max(0, int(round(top / scale))),
+        min(width, int(round(right / scale))),
+        min(height, int(round(bottom / scale))),
+        max(0, int(round(left / scale)))
+    )
+
+def crop_for_encoding(rgb_image, location, max_face_size=ENCODE_FACE_SIZE, margin=0.5):
+    """Recorta el rostro con margen y lo reduce si es más grande de lo necesario.
+    Devuelve (recorte, caja relativa al recorte)"""
+    height, width = rgb_image.shape[:2]
+    top, right, bottom, left = location
+    face_size = max(bottom - top, right - left)
+    pad = int(face_size * margin)
+
+    y0, y1 = max(0, top - pad), min(height, bottom + pad)
+    x0, x1 = max(0, left - pad), min(width, right + pad)
+    crop = rgb_image[y0:y1, x0:x1]
+    box = (top - y0, right - x0, bottom - y0, left - x0)
+
+    if max_face_size and face_size > max_face_size:
+        scale = max_face_size / face_size
+        size = (max(1, round(crop.shape[1] * scale)), max(1, round(crop.shape[0] * scale)))
+        crop = cv2.resize(crop, size, interpolation=cv2.INTER_AREA)
+        box = tuple(int(round(v * scale)) for v in box)
+
+    return np.ascontiguousarray(crop), box
+
+@lru_cache(maxsize=None)
+def _haar_detector():
+    return cv2.CascadeClassifier(cv2.data.haarcascades + 'haarcascade_frontalface_default.xml')
+
+@lru_cache(maxsize=None)
+def _dnn_detector():
+    return cv2.dnn.readNetFromCaffe(DNN_PROTOTXT, DNN_MODEL)
+
+def detect_faces(rgb_image, detector=DETECTOR):
+    """Cajas (top, right, bottom, left) de los rostros según el detector configurado"""
+    if detector in ('hog', 'cnn'):
+        return face_recognition.face_locations(rgb_image, UPSAMPLE, model=detector)
+
+    height, width = rgb_image.shape[:2]
+    if detector == 'haar':
+        gray = cv2.cvtColor(rgb_image, cv2.COLOR_RGB2GRAY)
+        rects = _haar_detector().detectMultiScale(gray, scaleFactor=1.1, minNeighbors=5, minSize=(40, 40))
+        return [(int(y), int(x + w), int(y + h), int(x)) for (x, y, w, h) in rects]
+
+    if detector == 'dnn':
+        bgr = cv2.cvtColor(rgb_image, cv2.COLOR_RGB2BGR)
+        blob = cv2.dnn.blobFromImage(cv2.resize(bgr, (300, 300)), 1.0, (300, 300), (104.0, 177.0, 123.0))
+        net = _dnn_detector()
+        net.setInput(blob)
+        detections = net.forward()[0, 0]
+        locations = []
+        for detection in detections:
+            if detection[2] < DNN_CONFIDENCE:
+                continue
+            left, top, right, bottom = (detection[3:7] * [width, height, width, height]).astype(int)
+            locations.append((max(0, top), min(width, right), min(height, bottom), max(0, left)))
+        return locations
+
+    raise ValueError(f"Detector desconocido: {detector}")
+
+def get_face_encoding(image, timings=None, max_detect_dim=MAX_DETECT_DIM):
+    """Obtiene el encoding facial de una imagen (si se pasa `timings`, anota detect_ms/encode_ms)"""
+    if timings is None:
+        timings = {}
     if image is None:
         return None, "Imagen inválida o nula"
 
@@ -80,31 +199,56 @@ def get_face_encoding(image):
         # Asegurar dtype uint8 y contigüidad (face_recognition lo requiere)
         rgb_image = np.ascontiguousarray(rgb_image.astype(np.uint8))
 
-        # Debug: informar estado antes de face_locations
-        print(f"get_face_encoding: rgb dtype={rgb_image.dtype}, shape={rgb_image.shape}, contiguous={bool(rgb_image.flags.c_contiguous)}")
-    except Exception as e:
-        print(f"get_face_encoding: error al preparar/convetir imagen a RGB: {e}")
+        log.debug('face_encoding_input', shape=rgb_image.shape, contiguous=bool(rgb_image.flags.c_contiguous))
+    except Exception:
+        log.exception('face_encoding_failed', stage='to_rgb')
         return None, "Error al procesar la imagen (tipo de imagen no soportado)"
 
+    cache_key = None
+    if encoding_cache.enabled:
+        config = (DETECTOR, UPSAMPLE, NUM_JITTERS, ENCODING_MODEL, max_detect_dim, ENCODE_FACE_SIZE)
+        cache_key = FaceEncodingCache.make_key(rgb_image, config)
+        cached = encoding_cache.get(cache_key)
+        timings['cache_hit'] = cached is not None
+        if cached is not None:
+            return cached
+
+    face_encoding, error, cacheable = _detect_and_encode(rgb_image, timings, max_detect_dim)
+    if cache_key is not None and cacheable:
+        encoding_cache.put(cache_key, (face_encoding, error))
+    return face_encoding, error
+
+def _detect_and_encode(rgb_image, timings, max_detect_dim):
+    """Devuelve (encoding, error, cacheable); los fallos por excepción no se cachean"""
     try:
-        face_locations = face_recognition.face_locations(rgb_image)
-    except Exception as e:
-        print(f"get_face_encoding: error en face_locations: {e}")
-        return None, "Error al detectar rostros"
+        start = time.perf_counter()
+        # Detectar sobre la imagen reducida y devolver las cajas a la escala original
+        detect_image, scale = downscale_for_detection(rgb_image, max_detect_dim)
+        face_locations = detect_faces(detect_image)
+        if scale != 1.0:
+            face_locations = [scale_face_location(loc, scale, rgb_image.shape) for loc in face_locations]
+        timings['detect_scale'] = round(scale, 4)
+        timings['detect_ms'] = round((time.perf_counter() - start) * 1000, 2)
+    except Exception:
+        log.exception('face_encoding_failed', stage='detect', detector=DETECTOR)
+        return None, "Error al detectar rostros", False
 
     if len(face_locations) == 0:
-        return None, "No se detectó ningún rostro"
+        return None, "No se detectó ningún rostro", True
     
     if len(face_locations) > 1:
-        return None, "Se detectaron múltiples rostros. Asegúrate de que solo haya una persona"
+        return None, "Se detectaron múltiples rostros. Asegúrate de que solo haya una persona", True
 
     try:
-        face_encodings = face_recognition.face_encodings(rgb_image, face_locations)
-    except Exception as e:
-        print(f"get_face_encoding: error en face_encodings: {e}")
-        return None, "No se pudo procesar el rostro"
+        start = time.perf_counter()
+        crop, box = crop_for_encoding(rgb_image, face_locations[0])
+        face_encodings = face_recognition.face_encodings(crop, [box], num_jitters=NUM_JITTERS, model=ENCODING_MODEL)
+        timings['encode_ms'] = round((time.perf_counter() - start) * 1000, 2)
+    except Exception:
+        log.exception('face_encoding_failed', stage='encode')
+        return None, "No se pudo procesar el rostro", False
 
     if len(face_encodings) == 0:
-        return None, "No se pudo procesar el rostro"
+        return None, "No se pudo procesar el rostro", True
     
-    return face_encodings[0], None
\ No newline at end of file
+    return face_encodings[0], None, True
\ No newline at end of file
@@ -0,0 +1,98 @@
+"""Alta masiva de usuarios Face ID desde disco, sin pasar por HTTP.
+
+Entrada NDJSON, un usuario por línea:
+    {"email": "...", "first_name": "...", "password": "...", "image_path": "fotos/ana.jpg"}
+(también se acepta "image" con la foto en base64). Con --dir se lee
+DIR/manifest.ndjson y las rutas de imagen son relativas a DIR.
+
+Uso:
+    python enroll_batch.py --dir ./alta_empresa --workers 8 --report informe.json
+    cat usuarios.ndjson | python enroll_batch.py --ndjson -
+"""
+import argparse
+import json
+import os
+import sys
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, current_dir)
+sys.path.append(os.path.dirname(current_dir))
+
+from application.batch_register_usecase import BatchRegisterUseCase
+from infraestructure.face_worker_pool import FaceWorkerPool
+from infraestructure.mongo_user_repository import MongoUserRepository
+from shared.mongo_connection import MONGO_URI, MONGO_DB_NAME
+
+
+def read_records(stream, base_dir):
+    for line_number, line in enumerate(stream, 1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except json.JSONDecodeError as e:
+            print(f"❌ Línea {line_number}: JSON inválido ({e})", file=sys.stderr)
+            yield {}
+            continue
+
+        image_path = record.pop('image_path', None)
+        if image_path and not record.get('image'):
+            path = image_path if os.path.isabs(image_path) else os.path.join(base_dir, image_path)
+            try:
+                with open(path, 'rb') as f:
+                    record['image'] = f.read()  # decode_image acepta bytes crudos
+            except OSError as e:
+                print(f"❌ Línea {line_number}: no se pudo leer {path} ({e})", file=sys.stderr)
+        yield record
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument('--ndjson', help="fichero NDJSON o '-' para stdin")
+    source.add_argument('--dir', help="directorio con manifest.ndjson y las fotos")
+    parser.add_argument('--uri', default=MONGO_URI)
+    parser.add_argument('--db', default=MONGO_DB_NAME)
+    parser.add_argument('--workers', type=int, default=os.cpu_count())
+    parser.add_argument('--chunk-size', type=int, default=500, help="documentos por insert_many")
+    parser.add_argument('--report', help="guardar el informe completo en este fichero JSON")
+    args = parser.parse_args()
+
+    if args.dir:
+        base_dir = args.dir
+        stream = open(os.path.join(args.dir, 'manifest.ndjson'), encoding='utf-8')
+    elif args.ndjson == '-':
+        base_dir, stream = os.getcwd(), sys.stdin
+    else:
+        base_dir = os.path.dirname(os.path.abspath(args.ndjson))
+        stream = open(args.ndjson, encoding='utf-8')
+
+    with stream:
+        records = list(read_records(stream, base_dir))
+
+    pool = FaceWorkerPool(workers=args.workers, timeout=120)
+    try:
+        repo = MongoUserRepository(args.uri, args.db)
+        use_case = BatchRegisterUseCase(repo, encode_many=pool.encode_many, chunk_size=args.chunk_size)
+        report = use_case.execute(records)
+    finally:
+        pool.shutdown()
+
+    for result in report['results']:
+        if not result['success']:
+            print(f"❌ #{result['index']} {result['email']}: {result['error']}")
+
+    stats = report['stats']
+    print("=" * 60)
+    print(f"Total: {stats['total']}  OK: {stats['succeeded']}  Fallidos: {stats['failed']}")
+    print(f"Tiempo: {stats['elapsed_s']}s (encoding {stats['encode_s']}s, escritura {stats['write_s']}s)")
+    print(f"Rendimiento: {stats['records_per_s']} usuarios/s con {args.workers} procesos")
+    print("=" * 60)
+
+    if args.report:
+        with open(args.report, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == '__main__':
+    main()
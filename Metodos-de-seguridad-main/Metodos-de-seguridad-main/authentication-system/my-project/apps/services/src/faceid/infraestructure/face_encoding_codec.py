@@ -0,0 +1,76 @@
+import base64
+import io
+import os
+import pickle
+
+import numpy as np
+from bson.binary import Binary
+
+# Formato binario versionado para el encoding facial guardado en `secret`:
+#   b"FE" | versión (1 byte) | código de dtype (1 byte) | bytes little-endian
+MAGIC = b"FE"
+FORMAT_VERSION = 1
+HEADER_SIZE = 4
+
+DTYPE_CODES = {1: np.dtype('<f4'), 2: np.dtype('<f8')}
+CODES_BY_DTYPE = {dtype: code for code, dtype in DTYPE_CODES.items()}
+
+# float64 conserva exactamente lo que devuelve dlib; float32 ocupa la mitad
+DEFAULT_DTYPE = os.environ.get("FACEID_ENCODING_DTYPE", "float64")
+
+
+def encode_face_encoding(face_encoding, dtype=None):
+    """Serializa el encoding a BSON Binary en el formato compacto"""
+    dtype = np.dtype(dtype or DEFAULT_DTYPE).newbyteorder('<')
+    if dtype not in CODES_BY_DTYPE:
+        raise ValueError(f"dtype no soportado para encodings: {dtype}")
+
+    data = np.ascontiguousarray(face_encoding, dtype=dtype)
+    header = MAGIC + bytes([FORMAT_VERSION, CODES_BY_DTYPE[dtype]])
+    return Binary(header + data.tobytes())
+
+
+def decode_face_encoding(secret):
+    """Lee `secret` en formato compacto (sin copia) o en el formato antiguo base64+pickle"""
+    if isinstance(secret, (bytes, bytearray, memoryview)):
+        header = bytes(secret[:HEADER_SIZE])
+        if header[:2] != MAGIC or len(header) < HEADER_SIZE:
+            raise ValueError("secret binario sin cabecera de encoding facial")
+        if header[2] != FORMAT_VERSION:
+            raise ValueError(f"versión de encoding no soportada: {header[2]}")
+        dtype = DTYPE_CODES.get(header[3])
+        if dtype is None:
+            raise ValueError(f"código de dtype desconocido: {header[3]}")
+        return np.frombuffer(secret, dtype=dtype, offset=HEADER_SIZE)
+
+    if isinstance(secret, str):
+        return _legacy_loads(base64.b64decode(secret))
+
+    raise ValueError(f"formato de secret desconocido: {type(secret).__name__}")
+
+
+def is_legacy_secret(secret):
+    return isinstance(secret, str)
+
+
+class _NumpyOnlyUnpickler(pickle.Unpickler):
+    """Unpickler que sólo reconstruye ndarrays (el formato antiguo no es seguro)"""
+
+    ALLOWED = {
+        ('numpy.core.multiarray', '_reconstruct'),
+        ('numpy._core.multiarray', '_reconstruct'),
+        ('numpy', 'ndarray'),
+        ('numpy', 'dtype'),
+    }
+
+    def find_class(self, module, name):
+        if (module, name) in self.ALLOWED:
+            return super().find_class(module, name)
+        raise pickle.UnpicklingError(f"clase no permitida en encoding facial: {module}.{name}")
+
+
+def _legacy_loads(data):
+    encoding = _NumpyOnlyUnpickler(io.BytesIO(data)).load()
+    if not isinstance(encoding, np.ndarray):
+        raise ValueError("el secret antiguo no contiene un ndarray")
+    return encoding
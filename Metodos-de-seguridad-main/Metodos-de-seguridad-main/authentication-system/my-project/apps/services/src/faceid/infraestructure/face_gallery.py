@@ -0,0 +1,221 @@
+import os
+import threading
+import time
+from datetime import datetime
+
+from domain.face_matcher import FaceMatcher, user_info
+from ports.user_repository_port import UserRepositoryPort
+from shared.metrics import stage_timer
+from shared.structured_logging import get_logger
+
+log = get_logger('faceid.gallery')
+# Misma serie que el caso de uso sin galería: aquí sólo cuenta la carga en frío
+GALLERY_FETCH = stage_timer('faceid', 'gallery_fetch')
+
+
+class FaceGallery:
+    """Galería residente de encodings faciales ya decodificados.
+
+    Se carga una vez al arrancar y después se mantiene al día de forma
+    incremental: los casos de uso avisan de altas y bajas locales, y un hilo de
+    sincronización recoge escrituras externas (otros procesos o nodos) usando
+    una marca de agua sobre `created_at` más una comprobación del total de
+    documentos para detectar bajas externas.
+
+    El índice es de tipo `index_class` (búsqueda exacta con FaceMatcher o
+    aproximada con IVFFaceIndex). Si el índice sabe guardarse y se indica
+    `snapshot_path`, el arranque parte del fichero y sólo sincroniza lo nuevo.
+    """
+
+    def __init__(self, user_repository: UserRepositoryPort, sync_interval=10,
+                 index_class=FaceMatcher, index_options=None, snapshot_path=None):
+        self.user_repository = user_repository
+        self.sync_interval = sync_interval
+        self.index_class = index_class
+        self.index_options = index_options or {}
+        self.snapshot_path = snapshot_path
+        self.lock = threading.RLock()
+        self.index = None
+        self.watermark = None
+        self.db_count = 0
+        self.last_sync = None
+
+        self.hits = 0
+        self.misses = 0
+        self.full_reloads = 0
+        self.incremental_adds = 0
+        self.incremental_removes = 0
+        self.sync_errors = 0
+
+        self._stop_event = threading.Event()
+        self._watcher = None
+
+    def __len__(self):
+        with self.lock:
+            return len(self.index) if self.index is not None else 0
+
+    def load(self):
+        """Recarga completa desde el repositorio"""
+        if self.index is None and self._load_snapshot():
+            self.sync()
+            return len(self)
+
+        # El conteo se toma antes de leer: si entra un alta durante la carga,
+        # la siguiente sincronización verá la diferencia y la recogerá.
+        db_count = self.user_repository.count_users_with_secret()
+        users = self.user_repository.get_all_users_with_secret()
+        index = self.index_class.from_users(users, **self.index_options)
+        watermark = max((u['created_at'] for u in users if u.get('created_at')), default=None)
+
+        with self.lock:
+            self.index = index
+            self.watermark = watermark
+            self.db_count = db_count
+            self.last_sync = time.time()
+            self.full_reloads += 1
+        return len(index)
+
+    def _load_snapshot(self):
+        if not self.snapshot_path or not os.path.exists(self.snapshot_path):
+            return False
+        if not hasattr(self.index_class, 'load'):
+            return False
+        try:
+            index, metadata = self.index_class.load(self.snapshot_path)
+        except Exception as e:
+            log.warning('gallery_snapshot_invalid', path=self.snapshot_path, error=str(e))
+            return False
+
+        # El fichero trae las opciones con las que se construyó. Las de búsqueda
+        # (nprobe) se reaplican; si difiere una estructural (nlist...) el
+        # snapshot está obsoleto y se reconstruye desde el repositorio.
+        search_options = getattr(self.index_class, 'SEARCH_OPTIONS', ())
+        for name, value in self.index_options.items():
+            if getattr(index, name, value) == value:
+                continue
+            if name in search_options:
+                setattr(index, name, value)
+            else:
+                log.info('gallery_snapshot_stale', path=self.snapshot_path, option=name,
+                         snapshot=getattr(index, name), configured=value)
+                return False
+
+        with self.lock:
+            self.index = index
+            self.db_count = metadata.get('db_count', len(index))
+            watermark = metadata.get('watermark')
+            self.watermark = datetime.fromisoformat(watermark) if watermark else None
+            self.last_sync = time.time()
+        return True
+
+    def save_snapshot(self):
+        """Guarda el índice en disco (sólo índices con save(), p. ej. IVF)"""
+        if not self.snapshot_path or not hasattr(self.index, 'save'):
+            return False
+        with self.lock:
+            metadata = {
+                'db_count': self.db_count,
+                'watermark': self.watermark.isoformat() if self.watermark else None
+            }
+            self.index.save(self.snapshot_path, metadata)
+        return True
+
+    def ensure_loaded(self):
+        with self.lock:
+            if self.index is not None:
+                self.hits += 1
+                return
+            self.misses += 1
+        with GALLERY_FETCH.time():
+            self.load()
+
+    def search(self, face_encoding, k=1):
+        self.ensure_loaded()
+        with self.lock:
+            return self.index.search(face_encoding, k)
+
+    def add_user(self, user_id, email, first_name, face_encoding):
+        """Alta local: se llama después de save_user"""
+        with self.lock:
+            if self.index is None:
+                return
+            is_new = str(user_id) not in self.index
+            self.index.add(user_info({'_id': user_id, 'email': email, 'first_name': first_name}),
+                           face_encoding)
+            if is_new:
+                self.db_count += 1
+            self.incremental_adds += 1
+
+    def remove_user(self, user_id):
+        """Baja local: se llama después de delete_user_by_id"""
+        with self.lock:
+            if self.index is None:
+                return
+            if self.index.remove(str(user_id)):
+                self.db_count -= 1
+                self.incremental_removes += 1
+
+    def sync(self):
+        """Recoge escrituras externas desde la última marca de agua"""
+        if self.index is None:
+            self.load()
+            return
+
+        try:
+            if self.watermark is not None:
+                new_users = self.user_repository.get_users_with_secret_since(self.watermark)
+                with self.lock:
+                    for user in new_users:
+                        info = user_info(user)
+                        if info['id'] not in self.index:
+                            self.db_count += 1
+                            self.incremental_adds += 1
+                        # $gte repite el documento de la marca de agua; add lo reemplaza
+                        self.index.add(info, user['secret_encoding'])
+                        if user.get('created_at') and user['created_at'] > self.watermark:
+                            self.watermark = user['created_at']
+
+            # Las bajas externas (o documentos sin created_at) no se ven con la
+            # marca de agua: si el total no cuadra se recarga todo.
+            if self.user_repository.count_users_with_secret() != self.db_count:
+                self.load()
+            else:
+                with self.lock:
+                    self.last_sync = time.time()
+        except Exception as e:
+            self.sync_errors += 1
+            log.exception('gallery_sync_failed', sync_errors=self.sync_errors)
+
+    def start_watcher(self):
+        if self._watcher is not None or not self.sync_interval:
+            return
+        self._stop_event.clear()
+        self._watcher = threading.Thread(target=self._watch, name="face-gallery-sync", daemon=True)
+        self._watcher.start()
+
+    def stop_watcher(self):
+        self._stop_event.set()
+        if self._watcher is not None:
+            self._watcher.join(timeout=self.sync_interval)
+            self._watcher = None
+
+    def _watch(self):
+        while not self._stop_event.wait(self.sync_interval):
+            self.sync()
+
+    def stats(self):
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                'loaded': self.index is not None,
+                'index': type(self.index).__name__ if self.index is not None else None,
+                'size': len(self.index) if self.index is not None else 0,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else None,
+                'full_reloads': self.full_reloads,
+                'incremental_adds': self.incremental_adds,
+                'incremental_removes': self.incremental_removes,
+                'sync_errors': self.sync_errors,
+                'staleness_seconds': round(time.time() - self.last_sync, 3) if self.last_sync else None
+            }
@@ -0,0 +1,156 @@
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+
+import numpy as np
+
+from domain.face_processor import process_face_image
+
+
+class FaceWorkerPoolBusyError(Exception):
+    """La cola de trabajos está llena (el controlador responde 503)"""
+
+
+class FaceWorkerTimeoutError(Exception):
+    """El trabajo no terminó dentro del tiempo límite"""
+
+
+def _warm_up_worker():
+    """Carga los modelos de dlib una vez por proceso antes del primer trabajo"""
+    import face_recognition
+    blank = np.zeros((64, 64, 3), dtype=np.uint8)
+    face_recognition.face_locations(blank)
+
+
+def _run_job(image_data):
+    started_at = time.time()
+    face_encoding, error, timings = process_face_image(image_data)
+    timings['worker_pid'] = os.getpid()
+    return face_encoding, error, timings, started_at
+
+
+class FaceWorkerPool:
+    """Pool de procesos para decode + detección + encoding fuera del hilo de Flask.
+
+    `max_pending` limita los trabajos en vuelo (en cola o ejecutándose); por
+    encima de ese límite `encode` falla enseguida con FaceWorkerPoolBusyError
+    en lugar de acumular peticiones.
+    """
+
+    def __init__(self, workers=None, max_pending=None, timeout=10):
+        self.workers = workers or os.cpu_count() or 1
+        self.max_pending = max_pending or self.workers * 4
+        self.timeout = timeout
+        self._executor = ProcessPoolExecutor(max_workers=self.workers, initializer=_warm_up_worker)
+        self._slots = threading.BoundedSemaphore(self.max_pending)
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.completed = 0
+        self.rejected = 0
+        self.timeouts = 0
+        # Cada proceso tiene su propia caché de encodings; aquí se agregan sus aciertos
+        self.cache_hits = 0
+        self.cache_lookups = 0
+
+    @classmethod
+    def from_env(cls):
+        """FACEID_WORKERS=0 (por defecto) desactiva el pool y se codifica en el propio hilo"""
+        workers = int(os.environ.get("FACEID_WORKERS", 0))
+        if workers <= 0:
+            return None
+        return cls(
+            workers=workers,
+            max_pending=int(os.environ.get("FACEID_WORKER_QUEUE", workers * 4)),
+            timeout=float(os.environ.get("FACEID_WORKER_TIMEOUT", 10))
+        )
+
+    def encode(self, image_data):
+        """Misma interfaz que process_face_image: (encoding, error, tiempos)"""
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self.rejected += 1
+            raise FaceWorkerPoolBusyError("Servidor ocupado procesando rostros. Intenta de nuevo.")
+
+        submitted_at = time.time()
+        with self._lock:
+            self.in_flight += 1
+        try:
+            future = self._executor.submit(_run_job, image_data)
+        except Exception:
+            self._release(None)
+            raise
+        # El hueco se libera cuando el trabajo termina de verdad, aunque el
+        # cliente ya haya recibido el timeout.
+        future.add_done_callback(self._release)
+
+        try:
+            face_encoding, error, timings, started_at = future.result(timeout=self.timeout)
+        except FutureTimeoutError:
+            future.cancel()
+            with self._lock:
+                self.timeouts += 1
+            raise FaceWorkerTimeoutError("Tiempo de procesamiento del rostro agotado")
+
+        self._count_cache(timings)
+        timings['queue_ms'] = round(max(started_at - submitted_at, 0) * 1000, 2)
+        timings['total_ms'] = round((time.time() - submitted_at) * 1000, 2)
+        return face_encoding, error, timings
+
+    def encode_many(self, images):
+        """Codifica un lote en paralelo. A diferencia de encode, espera a que
+        haya hueco en la cola en lugar de rechazar (pensado para altas masivas)."""
+        futures = []
+        for image_data in images:
+            self._slots.acquire()
+            with self._lock:
+                self.in_flight += 1
+            future = self._executor.submit(_run_job, image_data)
+            future.add_done_callback(self._release)
+            futures.append(future)
+
+        results = []
+        for future in futures:
+            try:
+                face_encoding, error, timings, _ = future.result(timeout=self.timeout)
+                self._count_cache(timings)
+                results.append((face_encoding, error, timings))
+            except FutureTimeoutError:
+                future.cancel()
+                with self._lock:
+                    self.timeouts += 1
+                results.append((None, "Tiempo de procesamiento del rostro agotado", {}))
+            except Exception as e:
+                results.append((None, f"Error procesando el rostro: {e}", {}))
+        return results
+
+    def _count_cache(self, timings):
+        if 'cache_hit' not in timings:
+            return
+        with self._lock:
+            self.cache_lookups += 1
+            if timings['cache_hit']:
+                self.cache_hits += 1
+
+    def _release(self, future):
+        with self._lock:
+            self.in_flight -= 1
+            if future is not None and not future.cancelled():
+                self.completed += 1
+        self._slots.release()
+
+    def stats(self):
+        with self._lock:
+            return {
+                'workers': self.workers,
+                'max_pending': self.max_pending,
+                'in_flight': self.in_flight,
+                'completed': self.completed,
+                'rejected': self.rejected,
+                'timeouts': self.timeouts,
+                'cache_hits': self.cache_hits,
+                'cache_hit_rate': round(self.cache_hits / self.cache_lookups, 4) if self.cache_lookups else None
+            }
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,267 @@
+import json
+import os
+
+import numpy as np
+
+from domain.face_matcher import ENCODING_SIZE, user_info
+from ports.face_index_port import FaceIndexPort
+
+FORMAT_VERSION = 1
+
+
+class IVFFaceIndex(FaceIndexPort):
+    """Índice aproximado IVF (inverted file) en NumPy puro.
+
+    Los encodings se agrupan con k-means en `nlist` celdas; una búsqueda sólo
+    compara la sonda contra las `nprobe` celdas con centroide más cercano.
+    Mientras haya pocos usuarios (menos de `train_threshold`) se busca por
+    fuerza bruta, y el índice se reentrena solo cuando crece 4x desde el
+    último entrenamiento para que las celdas no se desequilibren.
+    """
+
+    # Opciones que sólo afectan a la búsqueda: se pueden cambiar sobre un índice ya construido
+    SEARCH_OPTIONS = ('nprobe',)
+
+    def __init__(self, nprobe=16, nlist=None, train_threshold=2048, seed=0):
+        self.nprobe = nprobe
+        self.nlist = nlist
+        self.train_threshold = train_threshold
+        self.seed = seed
+
+        self.centroids = None
+        self._centroid_norms = None
+        self.trained_size = 0
+
+        self._vectors = np.empty((16, ENCODING_SIZE), dtype=np.float32)
+        self._alive = np.zeros(16, dtype=bool)
+        self._cell = np.full(16, -1, dtype=np.int32)
+        self._users = [None] * 16
+        self._rows = {}
+        self._free = []
+        self._end = 0
+        self._lists = []
+
+    @classmethod
+    def from_users(cls, users, **kwargs):
+        index = cls(**kwargs)
+        for user in users:
+            index._insert(user_info(user), user['secret_encoding'])
+        if len(index) >= index.train_threshold:
+            index.train()
+        return index
+
+    def __len__(self):
+        return len(self._rows)
+
+    def __contains__(self, user_id):
+        return user_id in self._rows
+
+    @property
+    def is_trained(self):
+        return self.centroids is not None
+
+    # --- altas y bajas -------------------------------------------------
+
+    def _insert(self, user, face_encoding):
+        if self._free:
+            row = self._free.pop()
+        else:
+            if self._end == self._vectors.shape[0]:
+                self._grow(self._vectors.shape[0] * 2)
+            row = self._end
+            self._end += 1
+
+        self._vectors[row] = face_encoding
+        self._alive[row] = True
+        self._users[row] = user
+        self._rows[user['id']] = row
+        return row
+
+    def _grow(self, capacity):
+        vectors = np.empty((capacity, ENCODING_SIZE), dtype=np.float32)
+        vectors[:self._end] = self._vectors[:self._end]
+        self._vectors = vectors
+        self._alive = np.concatenate([self._alive, np.zeros(capacity - len(self._alive), dtype=bool)])
+        self._cell = np.concatenate([self._cell, np.full(capacity - len(self._cell), -1, dtype=np.int32)])
+        self._users.extend([None] * (capacity - len(self._users)))
+
+    def add(self, user, face_encoding):
+        """Añade (o reemplaza) un usuario; user debe incluir 'id'"""
+        if user['id'] in self._rows:
+            self.remove(user['id'])
+
+        row = self._insert(user, face_encoding)
+        if not self.is_trained:
+            if len(self) >= self.train_threshold:
+                self.train()
+            return
+
+        if len(self) >= 4 * self.trained_size:
+            self.train()
+            return
+
+        cell = int(np.argmin(self._centroid_sq_distances(self._vectors[row])))
+        self._cell[row] = cell
+        self._lists[cell] = np.append(self._lists[cell], row)
+
+    def remove(self, user_id):
+        row = self._rows.pop(user_id, None)
+        if row is None:
+            return False
+
+        cell = self._cell[row]
+        if cell >= 0:
+            members = self._lists[cell]
+            self._lists[cell] = members[members != row]
+        self._alive[row] = False
+        self._cell[row] = -1
+        self._users[row] = None
+        self._free.append(row)
+        return True
+
+    # --- entrenamiento ---------------------------------------------------
+
+    def train(self, iterations=8, samples_per_cell=32):
+        """Entrena los centroides con k-means sobre una muestra y reparte todos los vectores"""
+        rows = np.flatnonzero(self._alive[:self._end])
+        if len(rows) == 0:
+            return
+
+        nlist = self.nlist or max(1, int(4 * np.sqrt(len(rows))))
+        nlist = min(nlist, len(rows))
+        rng = np.random.default_rng(self.seed)
+
+        max_samples = samples_per_cell * nlist
+        sample_rows = rows if len(rows) <= max_samples else rng.choice(rows, max_samples, replace=False)
+        sample = self._vectors[sample_rows]
+        centroids = sample[rng.choice(len(sample), nlist, replace=False)].copy()
+
+        for _ in range(iterations):
+            assignment = _nearest(sample, centroids)
+            sums = np.stack([np.bincount(assignment, weights=sample[:, d], minlength=nlist)
+                             for d in range(ENCODING_SIZE)], axis=1)
+            counts = np.bincount(assignment, minlength=nlist)
+            non_empty = counts > 0
+            centroids[non_empty] = sums[non_empty] / counts[non_empty, None]
+            # las celdas vacías se reinician en un punto al azar
+            empty = np.flatnonzero(~non_empty)
+            if len(empty):
+                centroids[empty] = sample[rng.choice(len(sample), len(empty), replace=False)]
+
+        self.centroids = centroids
+        self._centroid_norms = np.einsum('ij,ij->i', centroids, centroids)
+        self.trained_size = len(rows)
+        self._assign(rows)
+
+    def _assign(self, rows):
+        assignment = _nearest(self._vectors[rows], self.centroids)
+        self._cell[:] = -1
+        self._cell[rows] = assignment
+        order = np.argsort(assignment, kind='stable')
+        bounds = np.searchsorted(assignment[order], np.arange(len(self.centroids) + 1))
+        sorted_rows = rows[order]
+        self._lists = [sorted_rows[bounds[i]:bounds[i + 1]].copy() for i in range(len(self.centroids))]
+
+    def _centroid_sq_distances(self, probe):
+        return self._centroid_norms - 2.0 * (self.centroids @ probe)
+
+    # --- búsqueda --------------------------------------------------------
+
+    def search(self, face_encoding, k=1):
+        if len(self) == 0:
+            return []
+
+        probe = np.asarray(face_encoding, dtype=np.float32)
+        if self.is_trained:
+            centroid_distances = self._centroid_sq_distances(probe)
+            nprobe = min(self.nprobe, len(centroid_distances))
+            cells = np.argpartition(centroid_distances, nprobe - 1)[:nprobe]
+            rows = np.concatenate([self._lists[c] for c in cells])
+            if len(rows) == 0:
+                rows = np.flatnonzero(self._alive[:self._end])
+        else:
+            rows = np.flatnonzero(self._alive[:self._end])
+
+        diff = self._vectors[rows] - probe
+        distances = np.sqrt(np.einsum('ij,ij->i', diff, diff))
+        k = min(k, len(distances))
+        order = np.argsort(distances, kind='stable')[:k]
+        return [(self._users[rows[i]], float(distances[i])) for i in order]
+
+    # --- persistencia ----------------------------------------------------
+
+    def save(self, path, metadata=None):
+        """Guarda el índice en un .npz (sin pickle). Escritura atómica."""
+        rows = np.flatnonzero(self._alive[:self._end])
+        payload = {
+            'version': FORMAT_VERSION,
+            'nprobe': self.nprobe,
+            'nlist': self.nlist,
+            'train_threshold': self.train_threshold,
+            'seed': self.seed,
+            'trained_size': self.trained_size,
+            'users': [self._users[r] for r in rows],
+            'metadata': metadata or {}
+        }
+        arrays = {
+            'vectors': self._vectors[rows],
+            'cells': self._cell[rows],
+            'header': np.array(json.dumps(payload, default=str))
+        }
+        if self.is_trained:
+            arrays['centroids'] = self.centroids
+
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'wb') as f:
+            np.savez(f, **arrays)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        """Carga un índice guardado con save(). Devuelve (índice, metadata)"""
+        with np.load(path, allow_pickle=False) as data:
+            payload = json.loads(str(data['header']))
+            if payload['version'] != FORMAT_VERSION:
+                raise ValueError(f"Versión de índice no soportada: {payload['version']}")
+
+            index = cls(nprobe=payload['nprobe'], nlist=payload['nlist'],
+                        train_threshold=payload['train_threshold'], seed=payload['seed'])
+            vectors = data['vectors']
+            cells = data['cells']
+            for user, vector in zip(payload['users'], vectors):
+                index._insert(user, vector)
+
+            if 'centroids' in data:
+                index.centroids = data['centroids']
+                index._centroid_norms = np.einsum('ij,ij->i', index.centroids, index.centroids)
+                index.trained_size = payload['trained_size']
+                rows = np.arange(len(vectors))
+                index._cell[rows] = cells
+                index._lists = [rows[cells == c] for c in range(len(index.centroids))]
+
+        return index, payload['metadata']
+
+
+def _nearest(vectors, centroids, chunk=8192):
+    """Índice del centroide más cercano a cada vector (por bloques para acotar memoria)"""
+    centroid_norms = np.einsum('ij,ij->i', centroids, centroids)
+    result = np.empty(len(vectors), dtype=np.int64)
+    for start in range(0, len(vectors), chunk):
+        block = vectors[start:start + chunk]
+        # ||x||^2 es constante por fila, no afecta al argmin
+        scores = centroid_norms - 2.0 * (block @ centroids.T)
+        result[start:start + chunk] = np.argmin(scores, axis=1)
+    return result
+
+
+def recall_at_1(index, exact_index, probes):
+    """Fracción de sondas en las que el índice coincide con la búsqueda exacta"""
+    if len(probes) == 0:
+        return None
+    hits = 0
+    for probe in probes:
+        expected = exact_index.search(probe, k=1)
+        found = index.search(probe, k=1)
+        if expected and found and expected[0][0]['id'] == found[0][0]['id']:
+            hits += 1
+    return hits / len(probes)
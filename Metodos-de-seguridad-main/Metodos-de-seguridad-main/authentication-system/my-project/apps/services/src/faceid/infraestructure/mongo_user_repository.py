@@ -1,16 +1,21 @@
-from pymongo import MongoClient
+from pymongo.errors import BulkWriteError
 from bson.objectid import ObjectId
-import pickle
-import base64
 from datetime import datetime
 
 # Imports corregidos (sin ".." y sin sys.path)
 from ports.user_repository_port import UserRepositoryPort
+from infraestructure.face_encoding_codec import encode_face_encoding, decode_face_encoding
+from shared.mongo_connection import get_mongo_client, MONGO_DB_NAME
+from shared.metrics import repository_timer, timed
+from shared.structured_logging import get_logger
+
+log = get_logger('faceid.repository')
 
 class MongoUserRepository(UserRepositoryPort):
     
-    def __init__(self, uri="mongodb://localhost:27017", db_name="autentication"): # <-- CORREGIDO
-        self.client = MongoClient(uri)
+    def __init__(self, uri=None, db_name=MONGO_DB_NAME):
+        # Cliente compartido por todo el proceso (ver shared/mongo_connection)
+        self.client = get_mongo_client(uri)
         self.db = self.client[db_name]
         self.collection = self.db["users"] # "users" (plural) es correcto
         self.db_name = db_name
@@ -22,41 +27,93 @@ class MongoUserRepository(UserRepositoryPort):
         except Exception:
             return False, self.db_name
 
-    def save_user(self, email, hashed_password, first_name, face_encoding, auth_method="faceid"):
-        # Serializar encoding facial (convertir a texto base64 para guardarlo en Mongo)
-        secret = base64.b64encode(pickle.dumps(face_encoding)).decode('utf-8')
-        
-        existing_user = self.collection.find_one({"email": email})
-        if existing_user:
-            raise ValueError("El email ya está registrado")
-
-        user_document = {
+    def _build_user_document(self, email, hashed_password, first_name, face_encoding, auth_method="faceid"):
+        return {
             "email": email,
             "password": hashed_password,
             "first_name": first_name,
-            "secret": secret,
+            # Encoding facial en formato binario compacto (ver face_encoding_codec)
+            "secret": encode_face_encoding(face_encoding),
             "auth_method": auth_method,
             "phone_number": None,
             "created_at": datetime.now()
         }
-        
+
+    @timed(repository_timer('faceid', 'save_user'))
+    def save_user(self, email, hashed_password, first_name, face_encoding, auth_method="faceid"):
+        existing_user = self.collection.find_one({"email": email})
+        if existing_user:
+            raise ValueError("El email ya está registrado")
+
+        user_document = self._build_user_document(email, hashed_password, first_name, face_encoding, auth_method)
         result = self.collection.insert_one(user_document)
         return str(result.inserted_id)
 
+    @timed(repository_timer('faceid', 'find_existing_emails'))
+    def find_existing_emails(self, emails):
+        """Emails de la lista que ya existen, en una sola consulta"""
+        cursor = self.collection.find({"email": {"$in": list(emails)}}, {"email": 1, "_id": 0})
+        return {user['email'] for user in cursor}
+
+    @timed(repository_timer('faceid', 'save_users_bulk'))
+    def save_users_bulk(self, users):
+        """Inserta varios usuarios con un único insert_many no ordenado.
+
+        `users` es una lista de dicts con email, hashed_password, first_name y
+        face_encoding. Devuelve una lista paralela de (user_id, error).
+        """
+        documents = [
+            self._build_user_document(u['email'], u['hashed_password'], u['first_name'], u['face_encoding'])
+            for u in users
+        ]
+        if not documents:
+            return []
+
+        errors = {}
+        try:
+            self.collection.insert_many(documents, ordered=False)
+        except BulkWriteError as e:
+            for error in e.details.get('writeErrors', []):
+                message = "El email ya está registrado" if error.get('code') == 11000 else error.get('errmsg')
+                errors[error['index']] = message
+
+        # insert_many asigna el _id en el cliente antes de enviar
+        return [
+            (None, errors[i]) if i in errors else (str(doc['_id']), None)
+            for i, doc in enumerate(documents)
+        ]
+
+    @timed(repository_timer('faceid', 'get_all_users_with_secret'))
     def get_all_users_with_secret(self):
         query = {"auth_method": "faceid", "secret": {"$ne": None}}
-        users = self.collection.find(query)
-        
+        return self._deserialize_users(self.collection.find(query))
+
+    @timed(repository_timer('faceid', 'get_users_with_secret_since'))
+    def get_users_with_secret_since(self, since):
+        """Usuarios Face ID creados a partir de `since` (marca de agua del gallery)"""
+        query = {
+            "auth_method": "faceid",
+            "secret": {"$ne": None},
+            "created_at": {"$gte": since}
+        }
+        return self._deserialize_users(self.collection.find(query))
+
+    @timed(repository_timer('faceid', 'count_users_with_secret'))
+    def count_users_with_secret(self):
+        return self.collection.count_documents({"auth_method": "faceid", "secret": {"$ne": None}})
+
+    def _deserialize_users(self, users):
         deserialized_users = []
         for user in users:
             try:
-                user['secret_encoding'] = pickle.loads(base64.b64decode(user['secret']))
+                user['secret_encoding'] = decode_face_encoding(user['secret'])
                 deserialized_users.append(user)
             except Exception as e:
-                print(f"Error deserializando secret para usuario {user['_id']}: {e}")
+                log.warning('secret_decode_failed', user_id=str(user['_id']), error=str(e))
                 continue
         return deserialized_users
 
+    @timed(repository_timer('faceid', 'find_user_by_credentials'))
     def find_user_by_credentials(self, email, hashed_password):
         user = self.collection.find_one({
             "email": email,
@@ -64,6 +121,7 @@ class MongoUserRepository(UserRepositoryPort):
         })
         return user
 
+    @timed(repository_timer('faceid', 'get_all_users'))
     def get_all_users(self):
         # Excluye campos sensibles
         projection = {"password": 0, "secret": 0}
@@ -71,8 +129,7 @@ class MongoUserRepository(UserRepositoryPort):
         # --- INICIO DE LA CORRECCIÓN (Busca en toda la colección) ---
         users = list(self.collection.find({}, projection)) # Convertir a lista
         
-        # Imprimir para depuración
-        print(f"Query: find({{}}), Encontrados: {len(users)} usuarios")
+        log.debug('get_all_users', found=len(users))
         # --- FIN DE LA CORRECCIÓN ---
         
         users_list = []
@@ -94,11 +151,12 @@ class MongoUserRepository(UserRepositoryPort):
         users_list.sort(key=lambda x: x['createdAt'] or '', reverse=True)
         return users_list
 
+    @timed(repository_timer('faceid', 'delete_user_by_id'))
     def delete_user_by_id(self, user_id: str):
         try:
             obj_id = ObjectId(user_id)
             result = self.collection.delete_one({"_id": obj_id})
             return result.deleted_count > 0
         except Exception as e:
-            print(f"Error al eliminar usuario por ObjectId: {e}")
+            log.warning('delete_user_failed', user_id=user_id, error=str(e))
             return False
\ No newline at end of file
@@ -1,3 +1,4 @@
+import atexit
 import os
 import sys
 
@@ -5,31 +6,56 @@ import sys
 # Añadir el directorio actual al path para que encuentre los módulos
 current_dir = os.path.dirname(os.path.abspath(__file__))
 sys.path.insert(0, current_dir)
+# src/ para los módulos compartidos entre servicios (shared/)
+sys.path.append(os.path.dirname(current_dir))
 
 
 # Imports corregidos (sin el ".")
-from adapters.http.flask_controller import app
+from adapters.http.flask_controller import app, gallery, start_face_pool
 from infraestructure.mongo_user_repository import MongoUserRepository
+from shared.mongo_indexes import ensure_indexes_once
 
-if __name__ == '__main__':
-    # ¡¡¡IMPORTANTE!!!
-    # CAMBIAMOS EL PUERTO A 5001
-    # 5000 es de TOTP, 8000 es de SMS
-    
-    print("="*60)
-    print("🚀 Face ID Backend Server - MongoDB (Refactored)")
-    print("="*60)
-    
+def start_services():
+    """Conexión, índices, galería y pool de rostros; también lo llama gateway.py"""
     # Verificar conexión a MongoDB
     try:
         repo = MongoUserRepository()
         connected, db_name = repo.check_db_connection()
         if connected:
             print(f"✅ Conexión a MongoDB ({db_name}) exitosa")
+            ensure_indexes_once(repo.db)
         else:
             print(f"❌ Error al conectar con MongoDB ({db_name})")
     except Exception as e:
         print(f"❌ Error crítico de MongoDB: {e}")
+
+    # Cargar la galería de encodings una sola vez y mantenerla sincronizada
+    try:
+        total = gallery.load()
+        print(f"🧠 Galería Face ID cargada: {total} usuarios")
+    except Exception as e:
+        print(f"❌ No se pudo cargar la galería Face ID: {e}")
+    gallery.start_watcher()
+
+    # Pool de procesos para codificar rostros (FACEID_WORKERS > 0)
+    face_pool = start_face_pool()
+    if face_pool is not None:
+        atexit.register(face_pool.shutdown)
+        print(f"⚙️  Pool de rostros: {face_pool.workers} procesos, cola máx. {face_pool.max_pending}")
+
+    # Con FACEID_ANN_INDEX_PATH el índice IVF se guarda al salir para arrancar más rápido
+    atexit.register(gallery.save_snapshot)
+
+if __name__ == '__main__':
+    # ¡¡¡IMPORTANTE!!!
+    # CAMBIAMOS EL PUERTO A 5001
+    # 5000 es de TOTP, 8000 es de SMS
+    
+    print("="*60)
+    print("🚀 Face ID Backend Server - MongoDB (Refactored)")
+    print("="*60)
+
+    start_services()
         
     print(f"🌐 Servidor: http://localhost:5001")
     print(f"📡 API: http://localhost:5001/api")
@@ -0,0 +1,83 @@
+"""Migra los encodings faciales de base64+pickle al formato binario compacto.
+
+Uso:
+    python migrate_face_encodings.py [--uri mongodb://localhost:27017] [--dry-run]
+
+Es idempotente: sólo toca documentos cuyo `secret` sigue siendo texto, y cada
+actualización comprueba que el valor no haya cambiado desde que se leyó.
+"""
+import argparse
+import os
+import sys
+import time
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, current_dir)
+
+from pymongo import MongoClient, UpdateOne
+
+from infraestructure.face_encoding_codec import decode_face_encoding, encode_face_encoding
+
+
+def migrate(collection, batch_size=500, dtype=None, dry_run=False):
+    query = {"auth_method": "faceid", "secret": {"$type": "string"}}
+    stats = {'scanned': 0, 'converted': 0, 'failed': 0, 'bytes_before': 0, 'bytes_after': 0}
+    operations = []
+
+    def flush():
+        if operations and not dry_run:
+            result = collection.bulk_write(operations, ordered=False)
+            stats['converted'] += result.modified_count
+        elif operations:
+            stats['converted'] += len(operations)
+        operations.clear()
+
+    for user in collection.find(query, {"secret": 1}).batch_size(batch_size):
+        stats['scanned'] += 1
+        try:
+            new_secret = encode_face_encoding(decode_face_encoding(user['secret']), dtype)
+        except Exception as e:
+            stats['failed'] += 1
+            print(f"❌ {user['_id']}: {e}")
+            continue
+
+        stats['bytes_before'] += len(user['secret'])
+        stats['bytes_after'] += len(new_secret)
+        operations.append(UpdateOne(
+            {"_id": user['_id'], "secret": user['secret']},
+            {"$set": {"secret": new_secret}}
+        ))
+        if len(operations) >= batch_size:
+            flush()
+
+    flush()
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--uri', default="mongodb://localhost:27017")
+    parser.add_argument('--db', default="autentication")
+    parser.add_argument('--batch-size', type=int, default=500)
+    parser.add_argument('--dtype', choices=['float32', 'float64'], default=None,
+                        help="por defecto FACEID_ENCODING_DTYPE o float64")
+    parser.add_argument('--dry-run', action='store_true', help="no escribe, sólo cuenta")
+    args = parser.parse_args()
+
+    collection = MongoClient(args.uri)[args.db]["users"]
+    start = time.perf_counter()
+    stats = migrate(collection, args.batch_size, args.dtype, args.dry_run)
+    elapsed = time.perf_counter() - start
+
+    print("=" * 60)
+    print(f"{'(dry-run) ' if args.dry_run else ''}Documentos revisados: {stats['scanned']}")
+    print(f"Convertidos: {stats['converted']}  Fallidos: {stats['failed']}")
+    if stats['bytes_before']:
+        ratio = stats['bytes_after'] / stats['bytes_before']
+        print(f"Tamaño secret: {stats['bytes_before']} -> {stats['bytes_after']} bytes ({ratio:.0%})")
+    print(f"Tiempo: {elapsed:.2f}s")
+    print("=" * 60)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,24 @@
+from abc import ABC, abstractmethod
+
+class FaceIndexPort(ABC):
+    """Índice de búsqueda 1:N de encodings faciales (exacto o aproximado)"""
+
+    @abstractmethod
+    def add(self, user, face_encoding):
+        pass
+
+    @abstractmethod
+    def remove(self, user_id: str):
+        pass
+
+    @abstractmethod
+    def search(self, face_encoding, k=1):
+        pass
+
+    @abstractmethod
+    def __len__(self):
+        pass
+
+    @abstractmethod
+    def __contains__(self, user_id):
+        pass
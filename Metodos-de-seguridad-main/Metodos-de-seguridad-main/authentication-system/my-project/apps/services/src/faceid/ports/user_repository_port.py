@@ -6,10 +6,26 @@ class UserRepositoryPort(ABC):
     def save_user(self, email, hashed_password, first_name, secret, auth_method):
         pass
 
+    @abstractmethod
+    def find_existing_emails(self, emails):
+        pass
+
+    @abstractmethod
+    def save_users_bulk(self, users):
+        pass
+
     @abstractmethod
     def get_all_users_with_secret(self):
         pass
 
+    @abstractmethod
+    def get_users_with_secret_since(self, since):
+        pass
+
+    @abstractmethod
+    def count_users_with_secret(self):
+        pass
+
     @abstractmethod
     def find_user_by_credentials(self, email, hashed_password):
         pass
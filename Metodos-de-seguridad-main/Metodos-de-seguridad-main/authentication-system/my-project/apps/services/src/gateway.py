@@ -0,0 +1,172 @@
+"""Pasarela: faceid, totp y sms_otp en un solo proceso, cada uno bajo su prefijo.
+
+    /faceid/...   -> faceid/main.py   (antes puerto 5001)
+    /totp/...     -> totp/main.py     (antes puerto 5000)
+    /sms/...      -> sms_otp/main.py  (antes puerto 8000)
+
+Los tres servicios usan los mismos nombres de paquete de primer nivel
+(adapters, application, domain, ports...), así que cada uno se importa por
+separado: su directorio se pone al principio de sys.path, se importa su
+main.py y después sus módulos se retiran de sys.modules (las funciones y
+objetos ya importados siguen apuntando a ellos). shared/ se importa una sola
+vez: un único MongoClient con su pool y la misma configuración para todos.
+
+Cada servicio se sigue pudiendo lanzar por separado con su propio main.py.
+
+Uso:
+    python gateway.py                          # los tres en http://localhost:8080
+    python gateway.py --services totp,sms_otp  # sólo algunos
+    python gateway.py --check                  # arranca, informa (JSON) y sale
+"""
+import argparse
+import importlib
+import json
+import os
+import resource
+import sys
+import time
+
+from flask import Flask, Response, jsonify
+from werkzeug.middleware.dispatcher import DispatcherMiddleware
+from werkzeug.serving import run_simple
+
+SRC_DIR = os.path.dirname(os.path.abspath(__file__))
+if SRC_DIR not in sys.path:
+    sys.path.append(SRC_DIR)
+
+# servicio -> prefijo
+SERVICES = {
+    'faceid': '/faceid',
+    'totp': '/totp',
+    'sms_otp': '/sms',
+}
+
+# Paquetes de primer nivel que repiten nombre entre servicios
+SERVICE_MODULES = {'main', 'adapters', 'application', 'domain', 'ports', 'infraestructure', 'infrastructure'}
+
+# Los pools de procesos serializan funciones por su nombre de módulo plano
+# (p. ej. infraestructure.face_worker_pool), que en la pasarela no existe
+# fuera de la carga de cada servicio: aquí se desactivan.
+GATEWAY_ENV = {
+    'FACEID_WORKERS': '0',
+    'TOTP_QR_RENDER_WORKERS': '0',
+}
+
+
+def rss_kb():
+    """Memoria residente actual del proceso en kB (máximo histórico si no hay /proc)"""
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def _is_service_module(name):
+    return name.split('.', 1)[0] in SERVICE_MODULES
+
+
+def load_service(name):
+    """Importa <name>/main.py aislado de los otros servicios y ejecuta su start_services()"""
+    service_dir = os.path.join(SRC_DIR, name)
+    saved_path = list(sys.path)
+    for module_name in [m for m in sys.modules if _is_service_module(m)]:
+        del sys.modules[module_name]
+
+    sys.path.insert(0, service_dir)
+    try:
+        main = importlib.import_module('main')
+        if hasattr(main, 'start_services'):
+            main.start_services()
+    finally:
+        sys.path[:] = saved_path
+        modules = {m: sys.modules.pop(m) for m in [m for m in sys.modules if _is_service_module(m)]}
+
+    app = main.app
+    # Cookie de sesión propia: los tres comparten dominio y el nombre por defecto
+    app.config['SESSION_COOKIE_NAME'] = f"{name}_session"
+    return app, modules
+
+
+def build_gateway(services=None):
+    """Devuelve (aplicación WSGI, informe de arranque)"""
+    services = services or list(SERVICES)
+    for key, value in GATEWAY_ENV.items():
+        os.environ[key] = value
+
+    started = time.perf_counter()
+    rss_before = rss_kb()
+    mounts = {}
+    report = {'services': {}}
+    for name in services:
+        service_started = time.perf_counter()
+        app, modules = load_service(name)
+        mounts[SERVICES[name]] = app
+        report['services'][name] = {
+            'prefix': SERVICES[name],
+            'startup_s': round(time.perf_counter() - service_started, 3),
+            'modules': len(modules)
+        }
+
+    from shared.mongo_connection import pool_stats
+    report['startup_s'] = round(time.perf_counter() - started, 3)
+    report['rss_kb'] = rss_kb()
+    report['rss_services_kb'] = report['rss_kb'] - rss_before
+
+    root = Flask(__name__)
+
+    @root.route('/health')
+    def health():
+        return jsonify({
+            'status': 'OK',
+            'service': 'Gateway',
+            'startup': report,
+            'rss_kb': rss_kb(),
+            'mongo_pool': pool_stats()
+        }), 200
+
+    @root.route('/metrics')
+    def metrics():
+        # Un solo registro para los tres servicios (etiqueta `service`)
+        from shared.metrics import REGISTRY, CONTENT_TYPE
+        return Response(REGISTRY.render(), content_type=CONTENT_TYPE)
+
+    @root.route('/')
+    def index():
+        return jsonify({name: info['prefix'] for name, info in report['services'].items()})
+
+    return DispatcherMiddleware(root, mounts), report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--services', default=','.join(SERVICES), help="lista separada por comas")
+    parser.add_argument('--host', default=os.environ.get("GATEWAY_HOST", "0.0.0.0"))
+    parser.add_argument('--port', type=int, default=int(os.environ.get("GATEWAY_PORT", 8080)))
+    parser.add_argument('--check', action='store_true', help="arrancar, imprimir el informe en JSON y salir")
+    args = parser.parse_args()
+
+    services = [s.strip() for s in args.services.split(',') if s.strip()]
+    unknown = [s for s in services if s not in SERVICES]
+    if unknown:
+        parser.error(f"servicios desconocidos: {', '.join(unknown)} (válidos: {', '.join(SERVICES)})")
+
+    application, report = build_gateway(services)
+    if args.check:
+        print(json.dumps(report))
+        # Sin esperar a hilos de fondo (cola de SMS, vigilante de la galería)
+        os._exit(0)
+
+    print("=" * 60)
+    print(f"🚀 Pasarela: {', '.join(f'{n} -> {SERVICES[n]}' for n in services)}")
+    print(f"⏱️  Arranque: {report['startup_s']}s  💾 RSS: {report['rss_kb'] / 1024:.1f} MB")
+    print(f"🌐 http://localhost:{args.port}")
+    print("=" * 60)
+    run_simple(args.host, args.port, application, threaded=True)
+
+
+if __name__ == '__main__':
+    main()
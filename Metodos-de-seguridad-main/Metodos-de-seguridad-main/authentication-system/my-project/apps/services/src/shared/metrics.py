@@ -0,0 +1,427 @@
+import bisect
+import functools
+import math
+import os
+import threading
+import time
+
+# Métricas en proceso (contadores, gauges e histogramas) comunes a faceid, totp
+# y sms_otp, expuestas en /metrics con el formato de texto de Prometheus.
+#
+#   SMS_SEND = stage_timer('sms_otp', 'sms_send')    # hijo resuelto al importar
+#   with SMS_SEND.time():
+#       ...
+#   outcome('sms_otp', 'verify', 'valid').inc()
+#
+# Los hijos con etiquetas se resuelven al importar para que en la ruta caliente
+# no haya que construir claves. Con METRICS_ENABLED=0 todas las métricas son
+# objetos vacíos (sin coste) y /metrics no se registra.
+#
+# Ojo con los pools de procesos (FACEID_WORKERS): lo que se mide dentro de un
+# worker se queda en ese proceso. Las etapas de faceid se anotan en el proceso
+# principal a partir de los tiempos que devuelve el worker.
+
+METRICS_ENABLED = os.environ.get("METRICS_ENABLED", "1") != "0"
+
+# Segundos: de 0,5 ms a 10 s (de una lectura en caché a un SMS lento o un CNN)
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(names, values, extra=None):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _format_value(value):
+    if value == math.inf:
+        return '+Inf'
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+class _CounterChild:
+    __slots__ = ('value', '_lock')
+
+    def __init__(self):
+        self.value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1):
+        with self._lock:
+            self.value += amount
+
+
+class _GaugeChild(_CounterChild):
+    __slots__ = ()
+
+    def set(self, value):
+        self.value = value
+
+    def dec(self, amount=1):
+        self.inc(-amount)
+
+
+class _Timer:
+    __slots__ = ('child', 'start')
+
+    def __init__(self, child):
+        self.child = child
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.child.observe(time.perf_counter() - self.start)
+        return False
+
+
+class _HistogramChild:
+    __slots__ = ('bounds', 'counts', 'sum', 'count', '_lock')
+
+    def __init__(self, bounds):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        i = bisect.bisect_left(self.bounds, value)
+        with self._lock:
+            self.counts[i] += 1
+            self.sum += value
+            self.count += 1
+
+    def time(self):
+        """with child.time(): ... observa la duración del bloque en segundos"""
+        return _Timer(self)
+
+    def snapshot(self):
+        with self._lock:
+            return list(self.counts), self.sum, self.count
+
+
+class _Noop:
+    """Métrica o hijo desactivado (METRICS_ENABLED=0)"""
+
+    def labels(self, **labels):
+        return self
+
+    def inc(self, amount=1, **labels):
+        pass
+
+    def dec(self, amount=1, **labels):
+        pass
+
+    def set(self, value, **labels):
+        pass
+
+    def observe(self, value, **labels):
+        pass
+
+    def time(self, **labels):
+        return _NOOP_TIMER
+
+    def set_function(self, fn):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NOOP = _Noop()
+_NOOP_TIMER = _NOOP
+
+
+class _Metric:
+    kind = None
+    child_class = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children = {}
+        self._lock = threading.Lock()
+
+    def _new_child(self):
+        return self.child_class()
+
+    def labels(self, **labels):
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        child = self._children.get(key)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(key, self._new_child())
+        return child
+
+    def _default(self, labels):
+        return self.labels(**labels) if self.labelnames else self.labels()
+
+    def samples(self):
+        """[(sufijo, valores de etiquetas, etiqueta extra, valor)]"""
+        return [('', key, None, child.value) for key, child in list(self._children.items())]
+
+
+class Counter(_Metric):
+    kind = 'counter'
+    child_class = _CounterChild
+
+    def inc(self, amount=1, **labels):
+        self._default(labels).inc(amount)
+
+
+class Gauge(_Metric):
+    kind = 'gauge'
+    child_class = _GaugeChild
+
+    def __init__(self, name, documentation, labelnames=()):
+        super().__init__(name, documentation, labelnames)
+        self._function = None
+
+    def set(self, value, **labels):
+        self._default(labels).set(value)
+
+    def inc(self, amount=1, **labels):
+        self._default(labels).inc(amount)
+
+    def dec(self, amount=1, **labels):
+        self._default(labels).dec(amount)
+
+    def set_function(self, fn):
+        """Valor calculado al leer /metrics: un número o, con etiquetas,
+        un dict {tupla de valores de etiquetas: número}"""
+        self._function = fn
+
+    def samples(self):
+        if self._function is None:
+            return super().samples()
+        try:
+            value = self._function()
+        except Exception:
+            return []
+        if isinstance(value, dict):
+            return [('', tuple(str(v) for v in key), None, v) for key, v in value.items()]
+        return [('', (), None, value)]
+
+
+class Histogram(_Metric):
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def _new_child(self):
+        return _HistogramChild(self.buckets)
+
+    def observe(self, value, **labels):
+        self._default(labels).observe(value)
+
+    def time(self, **labels):
+        return self._default(labels).time()
+
+    def samples(self):
+        samples = []
+        for key, child in list(self._children.items()):
+            counts, total, count = child.snapshot()
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (math.inf,), counts):
+                cumulative += bucket_count
+                samples.append(('_bucket', key, f'le="{_format_value(float(bound))}"', cumulative))
+            samples.append(('_sum', key, None, total))
+            samples.append(('_count', key, None, count))
+        return samples
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric):
+        """Devuelve la métrica ya registrada con ese nombre si la hay (p. ej. al
+        cargar varios servicios en la pasarela)"""
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                if type(existing) is not type(metric) or existing.labelnames != metric.labelnames:
+                    raise ValueError(f"Métrica {metric.name} ya registrada con otra definición")
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def render(self):
+        """Exposición en formato de texto de Prometheus 0.0.4"""
+        lines = []
+        with self._lock:
+            metrics = sorted(self._metrics.values(), key=lambda m: m.name)
+        for metric in metrics:
+            lines.append(f"# HELP {metric.name} {_escape(metric.documentation)}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            for suffix, key, extra, value in metric.samples():
+                lines.append(f"{metric.name}{suffix}{_format_labels(metric.labelnames, key, extra)} "
+                             f"{_format_value(value)}")
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = Registry()
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+def counter(name, documentation, labelnames=()):
+    return REGISTRY.register(Counter(name, documentation, labelnames)) if METRICS_ENABLED else _NOOP
+
+
+def gauge(name, documentation, labelnames=()):
+    return REGISTRY.register(Gauge(name, documentation, labelnames)) if METRICS_ENABLED else _NOOP
+
+
+def histogram(name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+    return REGISTRY.register(Histogram(name, documentation, labelnames, buckets)) if METRICS_ENABLED else _NOOP
+
+
+def timed(child):
+    """Decorador: observa en `child` (un histograma ya etiquetado) la duración de cada llamada"""
+    def decorator(fn):
+        if child is _NOOP:
+            return fn
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                child.observe(time.perf_counter() - start)
+        return wrapper
+    return decorator
+
+
+def timed_async(child):
+    """timed() para corrutinas"""
+    def decorator(fn):
+        if child is _NOOP:
+            return fn
+
+        @functools.wraps(fn)
+        async def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return await fn(*args, **kwargs)
+            finally:
+                child.observe(time.perf_counter() - start)
+        return wrapper
+    return decorator
+
+
+# --- comunes a los tres servicios -----------------------------------------
+
+HTTP_REQUEST_SECONDS = histogram(
+    'http_request_duration_seconds', 'Duración de las peticiones HTTP',
+    ['service', 'endpoint', 'method', 'status'])
+
+STAGE_SECONDS = histogram(
+    'stage_duration_seconds', 'Duración de cada etapa de los casos de uso',
+    ['service', 'stage'])
+
+OUTCOMES = counter(
+    'operation_results_total', 'Resultados de las operaciones por servicio',
+    ['service', 'operation', 'result'])
+
+REPOSITORY_SECONDS = histogram(
+    'repository_operation_seconds', 'Duración de las operaciones de los repositorios',
+    ['service', 'operation'])
+
+MONGO_POOL = gauge('mongo_pool_connections', 'Conexiones del pool de MongoDB compartido', ['state'])
+
+
+def stage_timer(service, stage):
+    """Hijo de STAGE_SECONDS: `with stage_timer('sms_otp', 'sms_send').time(): ...`"""
+    return STAGE_SECONDS.labels(service=service, stage=stage)
+
+
+def outcome(service, operation, result):
+    """Hijo de OUTCOMES: outcome('totp', 'validate', 'replay').inc()"""
+    return OUTCOMES.labels(service=service, operation=operation, result=result)
+
+
+def repository_timer(service, operation):
+    """Hijo de REPOSITORY_SECONDS para usar con @timed en un método de repositorio"""
+    return REPOSITORY_SECONDS.labels(service=service, operation=operation)
+
+
+def _pool_connections():
+    from shared.mongo_connection import pool_stats
+    totals = {}
+    for stats in pool_stats()['pools'].values():
+        for state, name in (('open', 'open_connections'), ('in_use', 'in_use')):
+            totals[(state,)] = totals.get((state,), 0) + (stats.get(name) or 0)
+    return totals
+
+
+MONGO_POOL.set_function(_pool_connections)
+
+
+def install_metrics(app, service):
+    """Registra GET /metrics y mide cada petición (endpoint de Flask, no la URL,
+    para no crear una serie por id). METRICS_ENABLED=0 no instala nada."""
+    if not METRICS_ENABLED:
+        return None
+    from flask import Response, g, request
+
+    @app.before_request
+    def start_request_timer():
+        g._metrics_start = time.perf_counter()
+
+    @app.after_request
+    def observe_request(response):
+        start = g.pop('_metrics_start', None)
+        if start is not None:
+            HTTP_REQUEST_SECONDS.labels(service=service, endpoint=request.endpoint or 'unknown',
+                                        method=request.method, status=response.status_code
+                                        ).observe(time.perf_counter() - start)
+        return response
+
+    @app.route('/metrics', methods=['GET'])
+    def metrics():
+        return Response(REGISTRY.render(), content_type=CONTENT_TYPE)
+
+    return REGISTRY
+
+
+def install_async_metrics(app, service):
+    """Lo mismo que install_metrics para una app Quart"""
+    if not METRICS_ENABLED:
+        return None
+    from quart import Response, g, request
+
+    @app.before_request
+    async def start_request_timer():
+        g._metrics_start = time.perf_counter()
+
+    @app.after_request
+    async def observe_request(response):
+        start = getattr(g, '_metrics_start', None)
+        if start is not None:
+            HTTP_REQUEST_SECONDS.labels(service=service, endpoint=request.endpoint or 'unknown',
+                                        method=request.method, status=response.status_code
+                                        ).observe(time.perf_counter() - start)
+        return response
+
+    @app.route('/metrics', methods=['GET'])
+    async def metrics():
+        return Response(REGISTRY.render(), content_type=CONTENT_TYPE)
+
+    return REGISTRY
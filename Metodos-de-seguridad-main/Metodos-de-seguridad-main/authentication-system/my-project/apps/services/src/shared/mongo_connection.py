@@ -0,0 +1,215 @@
+import atexit
+import os
+import threading
+
+from pymongo import MongoClient, monitoring
+
+# Configuración común a faceid, totp y sms_otp
+MONGO_URI = os.environ.get("MONGO_URI", "mongodb://localhost:27017")
+MONGO_DB_NAME = os.environ.get("MONGO_DB_NAME", "autentication")
+
+CLIENT_OPTIONS = {
+    'maxPoolSize': int(os.environ.get("MONGO_MAX_POOL_SIZE", 50)),
+    'minPoolSize': int(os.environ.get("MONGO_MIN_POOL_SIZE", 0)),
+    'maxIdleTimeMS': int(os.environ.get("MONGO_MAX_IDLE_TIME_MS", 300000)),
+    'connectTimeoutMS': int(os.environ.get("MONGO_CONNECT_TIMEOUT_MS", 5000)),
+    'serverSelectionTimeoutMS': int(os.environ.get("MONGO_SERVER_SELECTION_TIMEOUT_MS", 5000)),
+    'waitQueueTimeoutMS': int(os.environ.get("MONGO_WAIT_QUEUE_TIMEOUT_MS", 2000)),
+    'readPreference': os.environ.get("MONGO_READ_PREFERENCE", "primary"),
+}
+
+
+class PoolStatsListener(monitoring.ConnectionPoolListener):
+    """Cuenta conexiones creadas/cerradas y en uso para exponer la utilización del pool"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.created = 0
+        self.closed = 0
+        self.checked_out = 0
+        self.max_checked_out = 0
+        self.checkouts = 0
+        self.checkout_failures = 0
+
+    def _update(self, **deltas):
+        with self._lock:
+            for name, delta in deltas.items():
+                setattr(self, name, getattr(self, name) + delta)
+            self.max_checked_out = max(self.max_checked_out, self.checked_out)
+
+    def connection_created(self, event):
+        self._update(created=1)
+
+    def connection_closed(self, event):
+        self._update(closed=1)
+
+    def connection_checked_out(self, event):
+        self._update(checked_out=1, checkouts=1)
+
+    def connection_checked_in(self, event):
+        self._update(checked_out=-1)
+
+    def connection_check_out_failed(self, event):
+        self._update(checkout_failures=1)
+
+    # Eventos que no se contabilizan
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        pass
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_check_out_started(self, event):
+        pass
+
+    def stats(self):
+        with self._lock:
+            return {
+                'open_connections': self.created - self.closed,
+                'connections_created': self.created,
+                'connections_closed': self.closed,
+                'in_use': self.checked_out,
+                'max_in_use': self.max_checked_out,
+                'checkouts': self.checkouts,
+                'checkout_failures': self.checkout_failures,
+            }
+
+
+_clients = {}
+_listeners = {}
+_lock = threading.Lock()
+
+
+def get_mongo_client(uri=None):
+    """MongoClient compartido por proceso (uno por URI) con su pool de conexiones"""
+    uri = uri or MONGO_URI
+    with _lock:
+        client = _clients.get(uri)
+        if client is None:
+            listener = PoolStatsListener()
+            if uri.startswith("mongomock://"):
+                # Base de datos en memoria para pruebas de carga sin mongod (requiere mongomock)
+                import mongomock
+                client = mongomock.MongoClient()
+            else:
+                client = MongoClient(uri, event_listeners=[listener], **CLIENT_OPTIONS)
+            _clients[uri] = client
+            _listeners[uri] = listener
+        return client
+
+
+def get_database(db_name=None, uri=None):
+    return get_mongo_client(uri)[db_name or MONGO_DB_NAME]
+
+
+_async_clients = {}
+
+
+def get_async_mongo_client(uri=None):
+    """AsyncMongoClient compartido por proceso (uno por URI) para los servicios asyncio.
+
+    Comparte CLIENT_OPTIONS y estadísticas de pool con get_mongo_client. Hay
+    que usarlo siempre desde el mismo bucle de eventos. Con mongomock:// se
+    envuelve el cliente síncrono en memoria (los mismos datos que ve
+    get_mongo_client), para pruebas de carga sin mongod.
+    """
+    uri = uri or MONGO_URI
+    if uri.startswith("mongomock://"):
+        return _AsyncMongomock(get_mongo_client(uri))
+    # Import diferido: AsyncMongoClient solo existe en pymongo >= 4.9 y los
+    # servicios síncronos no deben depender de esa versión para arrancar
+    from pymongo import AsyncMongoClient
+
+    with _lock:
+        client = _async_clients.get(uri)
+        if client is None:
+            listener = _listeners.setdefault(f"{uri} (async)", PoolStatsListener())
+            client = AsyncMongoClient(uri, event_listeners=[listener], **CLIENT_OPTIONS)
+            _async_clients[uri] = client
+        return client
+
+
+class _AsyncMongomock:
+    """Interfaz mínima de AsyncMongoClient/AsyncDatabase/AsyncCollection sobre
+    mongomock: los métodos devuelven corrutinas y find() un cursor asíncrono"""
+
+    def __init__(self, target):
+        self._target = target
+
+    def __getitem__(self, name):
+        return _AsyncMongomock(self._target[name])
+
+    def __getattr__(self, name):
+        attr = getattr(self._target, name)
+        if not callable(attr):
+            return attr
+        if name == 'find':
+            return lambda *args, **kwargs: _AsyncMongomockCursor(attr(*args, **kwargs))
+
+        async def call(*args, **kwargs):
+            return attr(*args, **kwargs)
+        return call
+
+
+class _AsyncMongomockCursor:
+    def __init__(self, cursor):
+        self._cursor = cursor
+
+    def sort(self, *args, **kwargs):
+        self._cursor = self._cursor.sort(*args, **kwargs)
+        return self
+
+    def limit(self, limit):
+        self._cursor = self._cursor.limit(limit)
+        return self
+
+    async def to_list(self, length=None):
+        documents = list(self._cursor)
+        return documents if length is None else documents[:length]
+
+    def __aiter__(self):
+        return self._iterate()
+
+    async def _iterate(self):
+        for document in self._cursor:
+            yield document
+
+
+def pool_stats():
+    with _lock:
+        return {
+            'max_pool_size': CLIENT_OPTIONS['maxPoolSize'],
+            'clients': len(_clients) + len(_async_clients),
+            'pools': {_redact(uri): listener.stats() for uri, listener in _listeners.items()}
+        }
+
+
+def close_all():
+    """Cierra todos los clientes; se registra con atexit"""
+    with _lock:
+        for client in _clients.values():
+            client.close()
+        _clients.clear()
+        # Los clientes asíncronos se cierran con await desde su bucle; aquí sólo se olvidan
+        _async_clients.clear()
+        _listeners.clear()
+
+
+def _redact(uri):
+    # No exponer credenciales en /health
+    if '@' in uri:
+        scheme, rest = uri.split('://', 1)
+        return f"{scheme}://***@{rest.split('@', 1)[1]}"
+    return uri
+
+
+atexit.register(close_all)
@@ -0,0 +1,102 @@
+import os
+import threading
+from collections import namedtuple
+
+from pymongo.errors import OperationFailure
+
+# Declaración de los índices que necesitan las consultas de faceid, totp y sms_otp.
+# Si cambia una consulta en un repositorio, hay que revisar esta lista y
+# shared/query_audit.py.
+IndexSpec = namedtuple('IndexSpec', ['name', 'keys', 'options'])
+
+INDEXES = {
+    'users': [
+        # Un email por usuario. sparse deja fuera documentos sin email (p. ej. los
+        # que inserta /ping-db de totp) en lugar de tratarlos como duplicados, y a
+        # diferencia de un índice parcial el planificador lo usa también con $in.
+        IndexSpec('email_unique', [('email', 1)], {'unique': True, 'sparse': True}),
+        # /sms-login busca por teléfono; varios usuarios pueden compartirlo
+        IndexSpec('phone_number', [('phone_number', 1)], {}),
+        # Galería Face ID: get_all_users_with_secret, count_users_with_secret y
+        # la marca de agua de get_users_with_secret_since
+        IndexSpec('auth_method_created_at', [('auth_method', 1), ('created_at', 1)], {}),
+    ],
+    'otps': [
+        IndexSpec('phone_number_used', [('phone_number', 1), ('used', 1)], {}),
+        # TTL: MongoDB borra cada código cuando pasa su expires_at
+        IndexSpec('expires_at_ttl', [('expires_at', 1)], {'expireAfterSeconds': 0}),
+    ],
+    # RATE_LIMIT_BACKEND=mongo: una ventana por documento
+    'rate_limits': [
+        IndexSpec('expires_at_ttl', [('expires_at', 1)], {'expireAfterSeconds': 0}),
+    ],
+    # sms_otp con PENDING_STORE=mongo: verificaciones en curso por email (_id)
+    'pending_verifications': [
+        IndexSpec('expires_at_ttl', [('expires_at', 1)], {'expireAfterSeconds': 0}),
+    ],
+}
+
+ENSURE_INDEXES = os.environ.get("MONGO_ENSURE_INDEXES", "1") != "0"
+
+_ensured = set()
+_lock = threading.Lock()
+
+
+def ensure_indexes(db, indexes=None):
+    """Crea los índices declarados que falten. Idempotente y sin abortar el arranque:
+    devuelve una lista de {collection, index, status, error} con status
+    created | exists | conflict | error."""
+    indexes = indexes or INDEXES
+    results = []
+    for collection_name, specs in indexes.items():
+        collection = db[collection_name]
+        try:
+            existing = collection.index_information()
+        except OperationFailure as e:
+            results.append({'collection': collection_name, 'index': None, 'status': 'error', 'error': str(e)})
+            continue
+
+        for spec in specs:
+            result = {'collection': collection_name, 'index': spec.name, 'status': 'exists', 'error': None}
+            current = existing.get(spec.name)
+            if current is not None:
+                if list(current['key']) != list(spec.keys) or not _same_options(current, spec.options):
+                    result['status'] = 'conflict'
+                    result['error'] = "Existe un índice con el mismo nombre y distinta definición"
+                results.append(result)
+                continue
+
+            try:
+                collection.create_index(spec.keys, name=spec.name, **spec.options)
+                result['status'] = 'created'
+            except OperationFailure as e:
+                # p. ej. emails duplicados ya guardados (código 11000) o un índice
+                # equivalente con otro nombre (código 85)
+                result['status'] = 'error'
+                result['error'] = str(e)
+            results.append(result)
+    return results
+
+
+def ensure_indexes_once(db):
+    """ensure_indexes una sola vez por base de datos y proceso (MONGO_ENSURE_INDEXES=0 lo desactiva)"""
+    if not ENSURE_INDEXES:
+        return []
+    with _lock:
+        key = (id(db.client), db.name)
+        if key in _ensured:
+            return []
+        _ensured.add(key)
+
+    results = ensure_indexes(db)
+    for result in results:
+        if result['status'] == 'created':
+            print(f"🗂️  Índice creado: {result['collection']}.{result['index']}")
+        elif result['status'] in ('conflict', 'error'):
+            print(f"⚠️  Índice {result['collection']}.{result['index']}: {result['error']}")
+    return results
+
+
+def _same_options(current, options):
+    return (all(bool(current.get(option)) == bool(options.get(option)) for option in ('unique', 'sparse'))
+            and current.get('expireAfterSeconds') == options.get('expireAfterSeconds'))
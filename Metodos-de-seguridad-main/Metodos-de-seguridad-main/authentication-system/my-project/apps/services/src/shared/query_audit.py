@@ -0,0 +1,212 @@
+"""Auditoría de la forma de las consultas de los repositorios.
+
+Ejecuta explain() sobre cada consulta que hacen los repositorios de faceid,
+totp y sms_otp y marca las que acaban en COLLSCAN. Con --mock se usa mongomock;
+como mongomock no implementa explain(), el plan se estima comprobando si algún
+índice empieza por un campo del filtro.
+
+QUERY_SHAPES se mantiene a mano, así que antes de auditar se comprueba contra
+el código: todo método público de los repositorios (*/infra*structure/*.py)
+que consulta una colección tiene que tener su forma, y toda forma de un
+repositorio tiene que corresponder a un método que exista.
+
+Uso (desde src/):
+    python -m shared.query_audit --uri mongodb://localhost:27017 --ensure
+    python -m shared.query_audit --mock --ensure
+"""
+import argparse
+import ast
+import glob
+import os
+import sys
+from collections import namedtuple
+from datetime import datetime
+
+from bson.objectid import ObjectId
+
+from shared.mongo_connection import MONGO_URI, MONGO_DB_NAME
+from shared.mongo_indexes import ensure_indexes
+
+# allow_collscan: recorridos completos intencionados (listados de administración)
+QueryShape = namedtuple('QueryShape', ['method', 'collection', 'filter', 'allow_collscan'])
+
+_EMAIL = 'auditoria@example.com'
+_PHONE = '+34600000000'
+_SINCE = datetime(2024, 1, 1)
+
+SRC_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+REPOSITORY_GLOBS = ('*/infraestructure/*.py', '*/infrastructure/*.py')
+# Operaciones de la colección que llevan filtro (insert_one no consulta)
+QUERY_OPERATIONS = frozenset({
+    'find', 'find_one', 'find_one_and_update', 'find_one_and_delete', 'find_one_and_replace',
+    'update_one', 'update_many', 'replace_one', 'delete_one', 'delete_many',
+    'count_documents', 'distinct', 'aggregate', 'bulk_write'
+})
+
+QUERY_SHAPES = [
+    QueryShape('faceid.MongoUserRepository.save_user', 'users', {'email': _EMAIL}, False),
+    QueryShape('faceid.MongoUserRepository.find_existing_emails', 'users', {'email': {'$in': [_EMAIL]}}, False),
+    QueryShape('faceid.MongoUserRepository.get_all_users_with_secret', 'users',
+               {'auth_method': 'faceid', 'secret': {'$ne': None}}, False),
+    QueryShape('faceid.MongoUserRepository.get_users_with_secret_since', 'users',
+               {'auth_method': 'faceid', 'secret': {'$ne': None}, 'created_at': {'$gte': datetime(2024, 1, 1)}}, False),
+    QueryShape('faceid.MongoUserRepository.count_users_with_secret', 'users',
+               {'auth_method': 'faceid', 'secret': {'$ne': None}}, False),
+    QueryShape('faceid.MongoUserRepository.find_user_by_credentials', 'users',
+               {'email': _EMAIL, 'password': 'x'}, False),
+    QueryShape('faceid.MongoUserRepository.delete_user_by_id', 'users', {'_id': ObjectId()}, False),
+    QueryShape('faceid.MongoUserRepository.get_all_users', 'users', {}, True),
+    QueryShape('totp.MongoUserRepository.get_secret_by_email', 'users', {'email': _EMAIL}, False),
+    QueryShape('totp.MongoUserRepository.find_totp_status', 'users', {'email': {'$in': [_EMAIL]}}, False),
+    # UpdateOne por email para los usuarios que ya existen
+    QueryShape('totp.MongoUserRepository.provision_users_bulk', 'users', {'email': _EMAIL}, False),
+    QueryShape('totp./login', 'users', {'email': _EMAIL}, False),
+    QueryShape('totp.MongoUserRepository.mark_step_used', 'users',
+               {'email': _EMAIL, 'totp_last_step': {'$not': {'$gte': 1}}}, False),
+    QueryShape('sms_otp.MongoDBUserRepository.save_user', 'users', {'email': _EMAIL}, False),
+    QueryShape('sms_otp.MongoDBUserRepository.get_user', 'users', {'email': _EMAIL}, False),
+    QueryShape('sms_otp.MongoDBUserRepository.update_user', 'users', {'email': _EMAIL}, False),
+    QueryShape('sms_otp.MongoDBUserRepository.user_exists', 'users', {'email': _EMAIL}, False),
+    QueryShape('sms_otp.AsyncMongoDBUserRepository.save_user', 'users', {'email': _EMAIL}, False),
+    QueryShape('sms_otp.AsyncMongoDBUserRepository.get_user', 'users', {'email': _EMAIL}, False),
+    QueryShape('sms_otp.AsyncMongoDBUserRepository.get_user_by_phone', 'users', {'phone_number': _PHONE}, False),
+    QueryShape('sms_otp.AsyncMongoDBUserRepository.update_user', 'users', {'email': _EMAIL}, False),
+    QueryShape('sms_otp.AsyncMongoDBUserRepository.user_exists', 'users', {'email': _EMAIL}, False),
+    QueryShape('sms_otp./sms-login', 'users', {'phone_number': _PHONE}, False),
+    QueryShape('sms_otp./debug', 'users', {}, True),
+    QueryShape('sms_otp.MongoOTPStore.save_code', 'otps', {'phone_number': _PHONE, 'used': False}, False),
+    QueryShape('sms_otp.MongoOTPStore.consume_code', 'otps',
+               {'phone_number': _PHONE, 'otp': '123456', 'used': False, 'expires_at': {'$gt': _SINCE}}, False),
+    QueryShape('sms_otp.AsyncMongoOTPStore.save_code', 'otps', {'phone_number': _PHONE, 'used': False}, False),
+    QueryShape('sms_otp.AsyncMongoOTPStore.consume_code', 'otps',
+               {'phone_number': _PHONE, 'otp': '123456', 'used': False, 'expires_at': {'$gt': _SINCE}}, False),
+]
+
+# Verificaciones en curso de sms_otp (PENDING_STORE=mongo), síncrona y asyncio
+for _store in ('MongoPendingVerificationStore', 'AsyncMongoPendingVerificationStore'):
+    QUERY_SHAPES += [
+        QueryShape(f'sms_otp.{_store}.put', 'pending_verifications', {'_id': _EMAIL}, False),
+        QueryShape(f'sms_otp.{_store}.get', 'pending_verifications',
+                   {'_id': _EMAIL, 'expires_at': {'$gt': _SINCE}}, False),
+        QueryShape(f'sms_otp.{_store}.remove', 'pending_verifications', {'_id': _EMAIL}, False),
+        QueryShape(f'sms_otp.{_store}.snapshot', 'pending_verifications', {'expires_at': {'$gt': _SINCE}}, False),
+    ]
+QUERY_SHAPES.append(QueryShape('sms_otp.AsyncMongoPendingVerificationStore.count', 'pending_verifications',
+                               {'expires_at': {'$gt': _SINCE}}, False))
+
+
+def repository_query_methods(src_dir=SRC_DIR):
+    """{'servicio.Clase.método'} de los métodos públicos de los repositorios que
+    llaman a una operación con filtro (leído del código con ast, sin importarlo:
+    los tres servicios comparten nombres de paquete)"""
+    methods = set()
+    for pattern in REPOSITORY_GLOBS:
+        for path in sorted(glob.glob(os.path.join(src_dir, pattern))):
+            service = os.path.relpath(path, src_dir).split(os.sep)[0]
+            with open(path, encoding='utf-8') as f:
+                tree = ast.parse(f.read(), path)
+            for cls in (node for node in tree.body if isinstance(node, ast.ClassDef)):
+                for method in cls.body:
+                    if not isinstance(method, (ast.FunctionDef, ast.AsyncFunctionDef)) or method.name.startswith('_'):
+                        continue
+                    if any(isinstance(call, ast.Call) and isinstance(call.func, ast.Attribute)
+                           and call.func.attr in QUERY_OPERATIONS for call in ast.walk(method)):
+                        methods.add(f"{service}.{cls.name}.{method.name}")
+    return methods
+
+
+def check_coverage(shapes=QUERY_SHAPES, src_dir=SRC_DIR):
+    """(métodos sin forma, formas de métodos que ya no existen). Las formas de
+    rutas ('totp./login') no son de un repositorio y no se comprueban."""
+    methods = repository_query_methods(src_dir)
+    declared = {shape.method for shape in shapes if '/' not in shape.method}
+    return sorted(methods - declared), sorted(declared - methods)
+
+
+def _plan_stages(plan):
+    """Todas las etapas (stage) del árbol de un plan de explain()"""
+    stages = [plan.get('stage')]
+    for child_key in ('inputStage', 'queryPlan'):
+        if child_key in plan:
+            stages += _plan_stages(plan[child_key])
+    for child in plan.get('inputStages', []):
+        stages += _plan_stages(child)
+    return stages
+
+
+def explain_stages(collection, query):
+    explain = collection.find(query).explain()
+    return _plan_stages(explain['queryPlanner']['winningPlan'])
+
+
+def estimate_stages(collection, query):
+    """Plan aproximado para mongomock: IXSCAN si un índice empieza por un campo del filtro"""
+    if not query:
+        return ['COLLSCAN']
+    if '_id' in query:
+        return ['IDHACK']
+    for index in collection.index_information().values():
+        if index['key'][0][0] in query:
+            return ['FETCH', 'IXSCAN']
+    return ['COLLSCAN']
+
+
+def audit(db, shapes=QUERY_SHAPES, planner=explain_stages):
+    report = []
+    for shape in shapes:
+        stages = planner(db[shape.collection], shape.filter)
+        collscan = 'COLLSCAN' in stages
+        report.append({
+            'method': shape.method,
+            'collection': shape.collection,
+            'stages': stages,
+            'collscan': collscan,
+            'ok': not collscan or shape.allow_collscan
+        })
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--uri', default=MONGO_URI)
+    parser.add_argument('--db', default=MONGO_DB_NAME)
+    parser.add_argument('--mock', action='store_true', help="usar mongomock en lugar de un mongod")
+    parser.add_argument('--ensure', action='store_true', help="crear los índices declarados antes de auditar")
+    args = parser.parse_args()
+
+    if args.mock:
+        import mongomock
+        client = mongomock.MongoClient()
+        planner = estimate_stages
+    else:
+        from pymongo import MongoClient
+        client = MongoClient(args.uri)
+        planner = explain_stages
+    db = client[args.db]
+
+    if args.ensure:
+        for result in ensure_indexes(db):
+            print(f"{result['collection']}.{result['index']}: {result['status']}"
+                  + (f" ({result['error']})" if result['error'] else ""))
+
+    missing, stale = check_coverage()
+    for method in missing:
+        print(f"❌ {method}: consulta sin forma en QUERY_SHAPES")
+    for method in stale:
+        print(f"❌ {method}: forma de un método que ya no existe")
+
+    report = audit(db, planner=planner)
+    for row in report:
+        mark = "✅" if row['ok'] else "❌"
+        note = " (recorrido completo permitido)" if row['collscan'] and row['ok'] else ""
+        print(f"{mark} {row['method']:<58} {'/'.join(row['stages'])}{note}")
+
+    failures = [row for row in report if not row['ok']]
+    print(f"\n{len(report) - len(failures)}/{len(report)} consultas sin COLLSCAN inesperado")
+    if missing or stale:
+        print(f"{len(missing)} métodos sin forma, {len(stale)} formas obsoletas")
+    sys.exit(1 if failures or missing or stale else 0)
+
+
+if __name__ == '__main__':
+    main()
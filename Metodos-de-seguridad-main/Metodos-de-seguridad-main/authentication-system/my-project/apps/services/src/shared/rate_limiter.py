@@ -0,0 +1,279 @@
+import asyncio
+import math
+import os
+import threading
+import time
+from collections import OrderedDict, namedtuple
+from datetime import datetime, timedelta, timezone
+
+from pymongo import ReturnDocument
+
+# Una regla limita `limit` peticiones cada `window_seconds` por clave (ip, email
+# o phone) en los endpoints indicados. Si la petición no trae esa clave, la
+# regla no se aplica.
+RateLimitRule = namedtuple('RateLimitRule', ['name', 'endpoints', 'key', 'limit', 'window_seconds', 'algorithm'])
+
+TOKEN_BUCKET = 'token_bucket'
+SLIDING_WINDOW = 'sliding_window'
+
+RATE_LIMIT_ENABLED = os.environ.get("RATE_LIMIT_ENABLED", "1") != "0"
+RATE_LIMIT_BACKEND = os.environ.get("RATE_LIMIT_BACKEND", "memory")
+# Detrás de un proxy de confianza la IP real llega en X-Forwarded-For
+RATE_LIMIT_TRUST_PROXY = os.environ.get("RATE_LIMIT_TRUST_PROXY", "0") == "1"
+
+
+def rule(name, endpoints, key, limit, window_seconds, algorithm=TOKEN_BUCKET):
+    return RateLimitRule(name, frozenset(endpoints), key, limit, window_seconds, algorithm)
+
+
+class InMemoryRateLimitBackend:
+    """Contadores en proceso (un solo worker). Acota el número de claves con LRU."""
+
+    def __init__(self, max_keys=100000):
+        self.max_keys = max_keys
+        self._state = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _touch(self, key, initial):
+        state = self._state.get(key)
+        if state is None:
+            state = initial
+            self._state[key] = state
+            if len(self._state) > self.max_keys:
+                self._state.popitem(last=False)
+        else:
+            self._state.move_to_end(key)
+        return state
+
+    def token_bucket(self, key, limit, window_seconds, now):
+        """Cubo de `limit` fichas que se rellena a limit/window_seconds por segundo.
+        Devuelve (permitido, segundos hasta la próxima ficha)"""
+        rate = limit / window_seconds
+        with self._lock:
+            state = self._touch(key, [float(limit), now])
+            tokens = min(float(limit), state[0] + (now - state[1]) * rate)
+            state[1] = now
+            if tokens >= 1.0:
+                state[0] = tokens - 1.0
+                return True, 0.0
+            state[0] = tokens
+            return False, (1.0 - tokens) / rate
+
+    def sliding_window(self, key, limit, window_seconds, now):
+        """Ventana deslizante aproximada con dos contadores (actual y anterior)"""
+        window = int(now // window_seconds)
+        elapsed = (now % window_seconds) / window_seconds
+        with self._lock:
+            state = self._touch(key, [window, 0, 0])
+            if state[0] != window:
+                state[2] = state[1] if state[0] == window - 1 else 0
+                state[1] = 0
+                state[0] = window
+            estimated = state[2] * (1.0 - elapsed) + state[1]
+            if estimated + 1 > limit:
+                return False, _sliding_retry_after(state[2], state[1], limit, window_seconds, elapsed)
+            state[1] += 1
+            return True, 0.0
+
+    def __len__(self):
+        with self._lock:
+            return len(self._state)
+
+
+class MongoRateLimitBackend:
+    """Contadores compartidos entre workers y nodos en la colección `rate_limits`.
+
+    Cada ventana es un documento {_id: "clave:ventana", count, expires_at} que se
+    incrementa con un único find_one_and_update atómico; el índice TTL borra las
+    ventanas viejas. El cubo de fichas no se puede actualizar de forma atómica
+    sin pipelines de actualización, así que aquí ambos algoritmos usan la
+    ventana deslizante. Las peticiones rechazadas también cuentan.
+    """
+
+    def __init__(self, db, collection_name="rate_limits"):
+        self.collection = db[collection_name]
+
+    def sliding_window(self, key, limit, window_seconds, now):
+        window = int(now // window_seconds)
+        elapsed = (now % window_seconds) / window_seconds
+        expires_at = datetime.fromtimestamp(now, timezone.utc) + timedelta(seconds=2 * window_seconds)
+        current = self.collection.find_one_and_update(
+            {'_id': f"{key}:{window}"},
+            {'$inc': {'count': 1}, '$setOnInsert': {'expires_at': expires_at}},
+            upsert=True,
+            return_document=ReturnDocument.AFTER
+        )
+        previous = self.collection.find_one({'_id': f"{key}:{window - 1}"}, {'count': 1})
+        previous_count = previous['count'] if previous else 0
+        # current['count'] ya incluye esta petición
+        estimated = previous_count * (1.0 - elapsed) + current['count']
+        if estimated > limit:
+            return False, _sliding_retry_after(previous_count, current['count'] - 1, limit, window_seconds, elapsed)
+        return True, 0.0
+
+    token_bucket = sliding_window
+
+    def __len__(self):
+        return self.collection.estimated_document_count()
+
+
+def _sliding_retry_after(previous_count, current_count, limit, window_seconds, elapsed):
+    """Segundos hasta que la estimación de la ventana deja sitio para una petición más"""
+    if previous_count and current_count + 1 <= limit:
+        # hay que esperar a que el peso de la ventana anterior baje lo suficiente
+        needed = 1.0 - (limit - current_count - 1) / previous_count
+        return max((needed - elapsed) * window_seconds, 0.0)
+    return (1.0 - elapsed) * window_seconds
+
+
+class RateLimiter:
+    def __init__(self, backend, rules):
+        self.backend = backend
+        self.rules = list(rules)
+        self._by_endpoint = {}
+        self._keys_by_endpoint = {}
+        for r in self.rules:
+            for endpoint in r.endpoints:
+                self._by_endpoint.setdefault(endpoint, []).append(r)
+                self._keys_by_endpoint.setdefault(endpoint, set()).add(r.key)
+        self._lock = threading.Lock()
+        self.allowed = 0
+        self.rejected = {}
+
+    def rules_for(self, path):
+        return self._by_endpoint.get(path, ())
+
+    def keys_for(self, path):
+        """Claves (ip, email, phone) que necesitan las reglas del endpoint"""
+        return self._keys_by_endpoint.get(path, ())
+
+    def check(self, path, keys, now=None):
+        """keys: {'ip': ..., 'email': ..., 'phone': ...}. Devuelve None si se permite
+        o (regla, retry_after) con la primera regla que rechaza"""
+        now = time.time() if now is None else now
+        for r in self.rules_for(path):
+            value = normalize_key(r.key, keys.get(r.key))
+            if not value:
+                continue
+            limit_fn = self.backend.token_bucket if r.algorithm == TOKEN_BUCKET else self.backend.sliding_window
+            allowed, retry_after = limit_fn(f"{r.name}:{value}", r.limit, r.window_seconds, now)
+            if not allowed:
+                with self._lock:
+                    self.rejected[r.name] = self.rejected.get(r.name, 0) + 1
+                return r, retry_after
+        with self._lock:
+            self.allowed += 1
+        return None
+
+    def stats(self):
+        with self._lock:
+            return {
+                'backend': type(self.backend).__name__,
+                'tracked_keys': len(self.backend),
+                'allowed': self.allowed,
+                'rejected': dict(self.rejected)
+            }
+
+
+def normalize_key(key, value):
+    """Misma cubeta para variantes de la misma identidad: sin esto "User@x.com",
+    "user@x.com " y "USER@X.COM" tendrían cada una su propio límite"""
+    if not isinstance(value, str):
+        return value
+    if key == 'email':
+        return value.strip().lower()
+    if key == 'phone':
+        return ''.join(value.split())
+    return value
+
+
+def build_backend(db=None):
+    """RATE_LIMIT_BACKEND: "memory" (por defecto) o "mongo" (varios workers o nodos)"""
+    if RATE_LIMIT_BACKEND == "mongo":
+        if db is None:
+            raise ValueError("RATE_LIMIT_BACKEND=mongo necesita una base de datos")
+        return MongoRateLimitBackend(db)
+    return InMemoryRateLimitBackend()
+
+
+def install_rate_limiter(app, limiter):
+    """Registra el limitador como before_request: las peticiones rechazadas se
+    cortan con 429 antes de llegar a la vista (sin tocar MongoDB ni el SMS)."""
+    from flask import jsonify, request, session
+
+    def client_ip():
+        if RATE_LIMIT_TRUST_PROXY and request.headers.get('X-Forwarded-For'):
+            return request.headers['X-Forwarded-For'].split(',')[0].strip()
+        return request.remote_addr
+
+    @app.before_request
+    def enforce_rate_limit():
+        if request.method == 'OPTIONS' or not limiter.rules_for(request.path):
+            return None
+
+        # Sólo se extraen las claves que usan las reglas del endpoint; abrir la
+        # sesión (firma de la cookie) es lo más caro y se evita si el body basta
+        needed = limiter.keys_for(request.path)
+        keys = {}
+        if 'ip' in needed:
+            keys['ip'] = client_ip()
+        if 'email' in needed or 'phone' in needed:
+            body = request.get_json(silent=True) if request.is_json else None
+            body = body if isinstance(body, dict) else {}
+            if 'email' in needed:
+                keys['email'] = body.get('email') or session.get('email')
+            if 'phone' in needed:
+                keys['phone'] = body.get('phone_number') or session.get('phone_number')
+        result = limiter.check(request.path, keys)
+        if result is None:
+            return None
+
+        r, retry_after = result
+        response = jsonify({'error': 'Too many requests', 'rule': r.name})
+        response.headers['Retry-After'] = str(max(1, math.ceil(retry_after)))
+        return response, 429
+
+    return limiter
+
+
+def install_async_rate_limiter(app, limiter):
+    """Lo mismo que install_rate_limiter para una app Quart. Con el backend de
+    MongoDB (pymongo síncrono) la comprobación va a un hilo para no bloquear el bucle."""
+    from quart import jsonify, request, session
+
+    blocking = isinstance(limiter.backend, MongoRateLimitBackend)
+
+    def client_ip():
+        if RATE_LIMIT_TRUST_PROXY and request.headers.get('X-Forwarded-For'):
+            return request.headers['X-Forwarded-For'].split(',')[0].strip()
+        return request.remote_addr
+
+    @app.before_request
+    async def enforce_rate_limit():
+        if request.method == 'OPTIONS' or not limiter.rules_for(request.path):
+            return None
+
+        needed = limiter.keys_for(request.path)
+        keys = {}
+        if 'ip' in needed:
+            keys['ip'] = client_ip()
+        if 'email' in needed or 'phone' in needed:
+            body = await request.get_json(silent=True) if request.is_json else None
+            body = body if isinstance(body, dict) else {}
+            if 'email' in needed:
+                keys['email'] = body.get('email') or session.get('email')
+            if 'phone' in needed:
+                keys['phone'] = body.get('phone_number') or session.get('phone_number')
+        if blocking:
+            result = await asyncio.to_thread(limiter.check, request.path, keys)
+        else:
+            result = limiter.check(request.path, keys)
+        if result is None:
+            return None
+
+        r, retry_after = result
+        response = jsonify({'error': 'Too many requests', 'rule': r.name})
+        response.headers['Retry-After'] = str(max(1, math.ceil(retry_after)))
+        return response, 429
+
+    return limiter
@@ -0,0 +1,285 @@
+import atexit
+import itertools
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+import threading
+import time
+
+# Registro estructurado común a faceid, totp y sms_otp.
+#
+#   log = get_logger('sms_otp.routes')
+#   log.info('otp_sent', phone_number=phone, message_id=message_id)
+#   -> 2026-01-01T10:00:00.123Z level=INFO logger=sms_otp.routes event=otp_sent phone_number=+34*****3456 message_id=9f2c...
+#
+# El hilo de la petición sólo deja (hora, nivel, logger, evento, campos) en una
+# cola acotada, sin crear el LogRecord; un QueueListener en segundo plano lo
+# convierte, lo formatea (y redacta) y lo escribe. Si la cola se llena los
+# eventos se descartan y se cuentan, nunca se bloquea. Los registros de otras
+# librerías (werkzeug, pymongo...) pasan por la misma cola como LogRecord.
+#
+# Variables de entorno:
+#   LOG_LEVEL          nivel raíz (DEBUG, INFO, WARNING, ERROR u OFF). Por defecto INFO
+#   LOG_LEVELS         niveles por logger: "faceid.face_processor=DEBUG,sms_otp=WARNING"
+#   LOG_FORMAT         "kv" (clave=valor, por defecto) o "json" (una línea JSON por evento)
+#   LOG_DEBUG_SAMPLE   de cada N eventos debug iguales sólo se escribe 1 (por defecto 100; 1 = todos)
+#   LOG_QUEUE_SIZE     tamaño máximo de la cola (por defecto 10000)
+
+OFF = logging.CRITICAL + 10
+
+# Campos que nunca se escriben; de los teléfonos sólo el prefijo y los 4 últimos dígitos
+SECRET_FIELDS = frozenset({
+    'otp', 'code', 'password', 'secret', 'token', 'auth_token', 'access_token',
+    'authorization', 'cookie', 'session', 'image', 'face_encoding', 'otp_uri'
+})
+PHONE_FIELDS = frozenset({'phone', 'phone_number', 'to_number', 'from_number'})
+REDACTED = '***'
+
+# Librerías muy verbosas en DEBUG (y twilio escribe las cabeceras de cada
+# petición en INFO): WARNING salvo que LOG_LEVELS diga otra cosa
+QUIET_LOGGERS = ('pymongo', 'urllib3', 'twilio')
+
+_lock = threading.Lock()
+_listener = None
+_handler = None
+_debug_counters = {}
+
+
+def _parse_level(name, default=logging.INFO):
+    name = (name or '').strip().upper()
+    if name == 'OFF':
+        return OFF
+    level = logging.getLevelName(name)
+    return level if isinstance(level, int) else default
+
+
+def mask_phone(value):
+    """+34600123456 -> +34*****3456 (igual que los estados de la cola de SMS)"""
+    value = str(value)
+    if len(value) <= 7:
+        return REDACTED
+    return value[:3] + '*' * (len(value) - 7) + value[-4:]
+
+
+def redact(fields):
+    """Copia de `fields` sin secretos (también dentro de diccionarios anidados)"""
+    clean = {}
+    for key, value in fields.items():
+        lowered = key.lower()
+        if lowered in SECRET_FIELDS:
+            clean[key] = REDACTED if value is not None else None
+        elif lowered in PHONE_FIELDS and value:
+            clean[key] = mask_phone(value)
+        elif isinstance(value, dict):
+            clean[key] = redact(value)
+        else:
+            clean[key] = value
+    return clean
+
+
+def _kv_value(value):
+    if isinstance(value, str):
+        if value and not any(c in value for c in ' ="\n\t'):
+            return value
+        return json.dumps(value, ensure_ascii=False)
+    if isinstance(value, float):
+        return f"{value:.6g}"
+    if value is None or isinstance(value, (bool, int)):
+        return json.dumps(value)
+    return json.dumps(value, ensure_ascii=False, default=str, separators=(',', ':'))
+
+
+class KeyValueFormatter(logging.Formatter):
+    """ts level logger event campo=valor ... (se ejecuta en el hilo del listener)"""
+
+    def __init__(self, fmt='kv'):
+        super().__init__()
+        self.fmt = fmt
+
+    def format(self, record):
+        ts = time.strftime('%Y-%m-%dT%H:%M:%S', time.gmtime(record.created)) + f".{int(record.msecs):03d}Z"
+        fields = redact(getattr(record, 'fields', None) or {})
+        if self.fmt == 'json':
+            data = {'ts': ts, 'level': record.levelname, 'logger': record.name, 'event': record.getMessage(), **fields}
+            if record.exc_text:
+                data['exc'] = record.exc_text
+            return json.dumps(data, ensure_ascii=False, default=str)
+
+        parts = [ts, f"level={record.levelname}", f"logger={record.name}", f"event={_kv_value(record.getMessage())}"]
+        parts.extend(f"{key}={_kv_value(value)}" for key, value in fields.items())
+        line = ' '.join(parts)
+        if record.exc_text:
+            line += '\n' + record.exc_text
+        return line
+
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler que descarta (y cuenta) en lugar de esperar si la cola está llena"""
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record):
+        # Sin formatear aquí: el formato y la redacción se hacen en el listener.
+        # Sólo se resuelve la traza de la excepción, que no se puede pasar a otro hilo.
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class StructuredQueueListener(logging.handlers.QueueListener):
+    """Convierte en LogRecord, ya en el hilo del listener, los eventos de StructuredLogger"""
+
+    def prepare(self, item):
+        if not isinstance(item, tuple):
+            return item
+        created, level, name, event, fields = item
+        record = logging.LogRecord(name, level, '', 0, event, None, None)
+        record.created = created
+        record.msecs = (created - int(created)) * 1000
+        record.fields = fields
+        return record
+
+
+def configure_logging(stream=None, force=False):
+    """Instala el handler con cola en el logger raíz. Idempotente; get_logger lo
+    llama la primera vez. `stream` (por defecto stderr) y `force` son para pruebas."""
+    global _listener, _handler
+    with _lock:
+        if _listener is not None and not force:
+            return _handler
+        if _listener is not None:
+            _stop_listener()
+
+        fmt = os.environ.get("LOG_FORMAT", "kv").lower()
+        output = logging.StreamHandler(stream or sys.stderr)
+        output.setFormatter(KeyValueFormatter(fmt))
+
+        log_queue = queue.Queue(maxsize=int(os.environ.get("LOG_QUEUE_SIZE", 10000)))
+        _handler = DroppingQueueHandler(log_queue)
+        _listener = StructuredQueueListener(log_queue, output, respect_handler_level=False)
+
+        root = logging.getLogger()
+        for handler in [h for h in root.handlers if isinstance(h, DroppingQueueHandler)]:
+            root.removeHandler(handler)
+        root.addHandler(_handler)
+        root.setLevel(_parse_level(os.environ.get("LOG_LEVEL", "INFO")))
+        for name in QUIET_LOGGERS:
+            logging.getLogger(name).setLevel(logging.WARNING)
+        for item in os.environ.get("LOG_LEVELS", "").split(','):
+            name, _, level = item.partition('=')
+            if name.strip() and level.strip():
+                logging.getLogger(name.strip()).setLevel(_parse_level(level))
+
+        _listener.start()
+        atexit.register(_stop_listener)
+        return _handler
+
+
+def _stop_listener():
+    """Vacía la cola y para el hilo (al salir del proceso)"""
+    global _listener
+    if _listener is not None and _listener._thread is not None:
+        _listener.stop()
+    _listener = None
+
+
+def _after_fork_in_child():
+    """El hilo del listener no sobrevive a fork (pool de rostros de faceid): el
+    hijo empieza con su propia cola y su propio listener"""
+    global _listener, _lock
+    _lock = threading.Lock()
+    if _listener is not None:
+        _listener = None
+        configure_logging()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_after_fork_in_child)
+
+
+def flush():
+    """Espera a que el listener haya escrito todo lo encolado"""
+    if _handler is not None:
+        while not _handler.queue.empty():
+            time.sleep(0.001)
+
+
+def stats():
+    return {
+        'queued': _handler.queue.qsize() if _handler is not None else 0,
+        'dropped': _handler.dropped if _handler is not None else 0
+    }
+
+
+class StructuredLogger:
+    """Envuelve un logging.Logger: log.info('evento', clave=valor, ...)"""
+
+    def __init__(self, logger, debug_sample):
+        self.logger = logger
+        self.debug_sample = debug_sample
+
+    @property
+    def name(self):
+        return self.logger.name
+
+    def is_enabled_for(self, level):
+        return self.logger.isEnabledFor(level)
+
+    def _log(self, level, event, fields, exc_info=None):
+        # isEnabledFor está cacheado por logging: un evento desactivado no cuesta nada
+        if not self.logger.isEnabledFor(level):
+            return
+        if exc_info or _handler is None:
+            # La traza hay que capturarla aquí: camino normal de logging
+            self.logger.log(level, event, exc_info=exc_info, extra={'fields': fields})
+        else:
+            # Directo a la cola: sin LogRecord, findCaller ni cerrojos de handlers
+            _handler.enqueue((time.time(), level, self.logger.name, event, fields))
+
+    def debug(self, event, sample=None, **fields):
+        """Eventos de alta frecuencia: se escribe 1 de cada `sample` (LOG_DEBUG_SAMPLE)"""
+        if not self.logger.isEnabledFor(logging.DEBUG):
+            return
+        sample = self.debug_sample if sample is None else sample
+        if sample > 1:
+            key = (self.logger.name, event)
+            counter = _debug_counters.get(key)
+            if counter is None:
+                counter = _debug_counters.setdefault(key, itertools.count())
+            # next() sobre itertools.count es atómico con el GIL
+            if next(counter) % sample:
+                return
+            fields['sampled'] = sample
+        self._log(logging.DEBUG, event, fields)
+
+    def info(self, event, **fields):
+        self._log(logging.INFO, event, fields)
+
+    def warning(self, event, **fields):
+        self._log(logging.WARNING, event, fields)
+
+    def error(self, event, **fields):
+        self._log(logging.ERROR, event, fields)
+
+    def exception(self, event, **fields):
+        """ERROR con la traza de la excepción en curso"""
+        self._log(logging.ERROR, event, fields, exc_info=True)
+
+
+def get_logger(name):
+    configure_logging()
+    return StructuredLogger(logging.getLogger(name), max(1, int(os.environ.get("LOG_DEBUG_SAMPLE", 100))))
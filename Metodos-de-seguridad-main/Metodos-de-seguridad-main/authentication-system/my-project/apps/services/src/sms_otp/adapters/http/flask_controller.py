@@ -7,6 +7,10 @@ current_dir = os.path.dirname(os.path.abspath(__file__))
 root_dir = os.path.abspath(os.path.join(current_dir, '..', '..'))
 if root_dir not in sys.path:
     sys.path.insert(0, root_dir)
+# Directorio src/ para el paquete shared
+src_dir = os.path.dirname(root_dir)
+if src_dir not in sys.path:
+    sys.path.append(src_dir)
 
 from infrastructure.mongo_repository import MongoDBUserRepository
 
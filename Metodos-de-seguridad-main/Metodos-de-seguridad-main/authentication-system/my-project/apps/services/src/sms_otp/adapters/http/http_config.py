@@ -0,0 +1,19 @@
+try:
+    from shared.rate_limiter import rule, SLIDING_WINDOW
+except ImportError:
+    from ...shared.rate_limiter import rule, SLIDING_WINDOW
+
+# Configuración HTTP común a main.py (Flask) y async_main.py (Quart)
+
+ALLOWED_ORIGINS = ["http://127.0.0.1:5500", "http://localhost:5500"]
+
+# Endpoints que generan y envían un OTP (cada llamada cuesta un SMS)
+SMS_SEND_ENDPOINTS = ['/send-otp', '/resend-otp', '/sms-login', '/create-sms-session', '/login', '/register']
+
+RATE_LIMIT_RULES = [
+    rule('sms_send_phone', SMS_SEND_ENDPOINTS, 'phone', limit=5, window_seconds=600),
+    rule('sms_send_email', SMS_SEND_ENDPOINTS, 'email', limit=5, window_seconds=600),
+    rule('sms_send_ip', SMS_SEND_ENDPOINTS, 'ip', limit=30, window_seconds=600),
+    rule('otp_verify_email', ['/verify-otp'], 'email', limit=10, window_seconds=300, algorithm=SLIDING_WINDOW),
+    rule('otp_verify_ip', ['/verify-otp'], 'ip', limit=60, window_seconds=300, algorithm=SLIDING_WINDOW),
+]
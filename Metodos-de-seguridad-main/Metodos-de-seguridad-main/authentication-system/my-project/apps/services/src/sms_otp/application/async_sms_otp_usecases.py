@@ -0,0 +1,59 @@
+import uuid
+
+from shared.metrics import outcome, stage_timer
+from shared.structured_logging import get_logger
+
+try:
+    from domain.sms_otp_generator import AsyncSMSOTPGenerator
+    from ports.async_sms_service_port import AsyncSMSServicePort
+    from ports.async_otp_store_port import AsyncOTPStorePort
+except ImportError:
+    from ..domain.sms_otp_generator import AsyncSMSOTPGenerator
+    from ..ports.async_sms_service_port import AsyncSMSServicePort
+    from ..ports.async_otp_store_port import AsyncOTPStorePort
+
+log = get_logger('sms_otp.usecases')
+
+SMS_SEND = stage_timer('sms_otp', 'sms_send')
+SMS_SENT = outcome('sms_otp', 'sms', 'sent')
+SMS_FAILED = outcome('sms_otp', 'sms', 'failed')
+
+class AsyncSendOTPUseCase:
+    """SendOTPUseCase para el servicio asyncio (async_main.py)"""
+
+    def __init__(self, sms_service: AsyncSMSServicePort, otp_store: AsyncOTPStorePort, dispatch_queue=None):
+        self.sms_service = sms_service
+        self.otp_generator = AsyncSMSOTPGenerator(otp_store)
+        self.dispatch_queue = dispatch_queue
+
+    async def execute(self, phone_number: str) -> bool:
+        try:
+            otp = await self.otp_generator.generate_otp(phone_number)
+            with SMS_SEND.time():
+                result = await self.sms_service.send_otp(phone_number, otp)
+            (SMS_SENT if result else SMS_FAILED).inc()
+            log.info('sms_sent', phone_number=phone_number, success=result)
+            return result
+        except Exception:
+            SMS_FAILED.inc()
+            log.exception('sms_send_failed', phone_number=phone_number)
+            return False
+
+    async def dispatch(self, phone_number: str):
+        """Guarda el OTP y encola el envío (AsyncSMSDispatchQueue). Devuelve el
+        message_id, o None si no se pudo. Sin cola, espera al envío."""
+        if self.dispatch_queue is None:
+            return uuid.uuid4().hex if await self.execute(phone_number) else None
+
+        otp, _ = self.otp_generator.new_code()
+        # Como en SendOTPUseCase.dispatch: el código se guarda al salir de la cola,
+        # así una cola llena (SMSQueueFullError -> 503) no invalida el anterior
+        return self.dispatch_queue.enqueue(
+            phone_number, otp, before_send=lambda: self.otp_generator.store_code(phone_number, otp))
+
+class AsyncVerifyOTPUseCase:
+    def __init__(self, otp_store: AsyncOTPStorePort):
+        self.otp_generator = AsyncSMSOTPGenerator(otp_store)
+
+    async def execute(self, phone_number: str, otp: str) -> bool:
+        return await self.otp_generator.verify_otp(phone_number, otp)
@@ -1,28 +1,58 @@
+import uuid
+
+from shared.metrics import outcome, stage_timer
+from shared.structured_logging import get_logger
+
 try:
     from domain.sms_otp_generator import SMSOTPGenerator
     from ports.sms_service_port import SMSServicePort
+    from ports.otp_store_port import OTPStorePort
 except ImportError:
     from ..domain.sms_otp_generator import SMSOTPGenerator
     from ..ports.sms_service_port import SMSServicePort
+    from ..ports.otp_store_port import OTPStorePort
+
+log = get_logger('sms_otp.usecases')
+
+SMS_SEND = stage_timer('sms_otp', 'sms_send')
+SMS_SENT = outcome('sms_otp', 'sms', 'sent')
+SMS_FAILED = outcome('sms_otp', 'sms', 'failed')
 
 class SendOTPUseCase:
-    def __init__(self, sms_service: SMSServicePort, mongo_repository):
+    def __init__(self, sms_service: SMSServicePort, otp_store: OTPStorePort, dispatch_queue=None):
         self.sms_service = sms_service
-        self.otp_generator = SMSOTPGenerator(mongo_repository)
+        self.otp_generator = SMSOTPGenerator(otp_store)
+        self.dispatch_queue = dispatch_queue
 
     def execute(self, phone_number: str) -> bool:
         try:
             otp = self.otp_generator.generate_otp(phone_number)
-            result = self.sms_service.send_otp(phone_number, otp)
-            print(f"📨 Resultado envío SMS: {result}")
+            with SMS_SEND.time():
+                result = self.sms_service.send_otp(phone_number, otp)
+            (SMS_SENT if result else SMS_FAILED).inc()
+            log.info('sms_sent', phone_number=phone_number, success=result)
             return result
-        except Exception as e:
-            print(f"❌ Error en SendOTPUseCase: {e}")
+        except Exception:
+            SMS_FAILED.inc()
+            log.exception('sms_send_failed', phone_number=phone_number)
             return False
 
+    def dispatch(self, phone_number: str):
+        """Guarda el OTP y encola el envío. Devuelve el message_id para consultar
+        el estado, o None si no se pudo. Sin cola, envía en el momento."""
+        if self.dispatch_queue is None:
+            return uuid.uuid4().hex if self.execute(phone_number) else None
+
+        otp, _ = self.otp_generator.new_code()
+        # El código se guarda (e invalida los anteriores) cuando el envío sale de
+        # la cola: si está llena (SMSQueueFullError -> 503) no se toca nada y el
+        # último código enviado sigue valiendo
+        return self.dispatch_queue.enqueue(
+            phone_number, otp, before_send=lambda: self.otp_generator.store_code(phone_number, otp))
+
 class VerifyOTPUseCase:
-    def __init__(self, mongo_repository):
-        self.otp_generator = SMSOTPGenerator(mongo_repository)
+    def __init__(self, otp_store: OTPStorePort):
+        self.otp_generator = SMSOTPGenerator(otp_store)
 
     def execute(self, phone_number: str, otp: str) -> bool:
         return self.otp_generator.verify_otp(phone_number, otp)
\ No newline at end of file
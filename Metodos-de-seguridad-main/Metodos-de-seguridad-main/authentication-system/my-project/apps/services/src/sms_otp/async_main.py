@@ -0,0 +1,513 @@
+"""Variante asyncio del servicio SMS OTP (Quart + AsyncMongoClient de pymongo).
+
+Mismas rutas y mismas respuestas JSON que main.py, pero cada petición en
+vuelo es una corrutina y no un hilo: mientras espera a MongoDB o al proveedor
+SMS no ocupa nada, así que un proceso aguanta miles de verificaciones
+simultáneas. La configuración (SMS_PROVIDER, SMS_DISPATCH_*, PENDING_STORE,
+RATE_LIMIT_*, MONGO_*) es la misma.
+
+Uso:
+    python async_main.py
+    hypercorn async_main:app --bind 0.0.0.0:8000
+"""
+import asyncio
+import os
+import secrets
+import sys
+
+from quart import Quart, request, jsonify, session
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, current_dir)
+# src/ para los módulos compartidos entre servicios (shared/)
+sys.path.append(os.path.dirname(current_dir))
+
+from application.async_sms_otp_usecases import AsyncSendOTPUseCase, AsyncVerifyOTPUseCase
+from infrastructure.async_mongo_repository import AsyncMongoDBUserRepository
+from infrastructure.async_mongo_otp_store import AsyncMongoOTPStore
+from infrastructure.async_pending_stores import AsyncInMemoryPendingVerificationStore, AsyncMongoPendingVerificationStore
+from infrastructure.async_sms_adapters import ThreadedSMSAdapter, AsyncSimulatedSMSGateway
+from infrastructure.async_sms_dispatch_queue import AsyncSMSDispatchQueue
+from infrastructure.in_memory_sms_adapter import InMemorySMSAdapter
+from infrastructure.sms_dispatch_queue import SMSQueueFullError
+from shared.metrics import install_async_metrics
+from shared.mongo_connection import get_database, pool_stats, MONGO_DB_NAME
+from shared.mongo_indexes import ensure_indexes_once
+from shared.rate_limiter import RateLimiter, build_backend, install_async_rate_limiter, RATE_LIMIT_ENABLED
+from shared.structured_logging import get_logger
+from adapters.http.http_config import ALLOWED_ORIGINS, RATE_LIMIT_RULES
+
+log = get_logger('sms_otp.routes')
+
+app = Quart(__name__)
+app.secret_key = secrets.token_hex(32)
+install_async_metrics(app, 'sms_otp')
+
+
+def build_sms_service():
+    """Mismo SMS_PROVIDER que main.py; los proveedores síncronos (Twilio, memory)
+    se ejecutan en el pool de hilos del bucle"""
+    provider = os.environ.get("SMS_PROVIDER", "twilio")
+    if provider == "simulated":
+        return AsyncSimulatedSMSGateway.from_env()
+    if provider == "memory":
+        return ThreadedSMSAdapter(InMemorySMSAdapter())
+    from infrastructure.twilio_sms_adapter import TwilioSMSAdapter
+    return ThreadedSMSAdapter(TwilioSMSAdapter())
+
+def build_dispatch_queue(sms_service):
+    """SMS_DISPATCH_WORKERS=0 desactiva la cola y el SMS se espera dentro de la petición.
+    Aquí cada worker es una tarea, así que el valor por defecto es mayor que en main.py"""
+    workers = int(os.environ.get("SMS_DISPATCH_WORKERS", 64))
+    if workers <= 0:
+        return None
+    return AsyncSMSDispatchQueue(
+        sms_service,
+        workers=workers,
+        max_queue=int(os.environ.get("SMS_DISPATCH_QUEUE", 10000)),
+        max_attempts=int(os.environ.get("SMS_DISPATCH_MAX_ATTEMPTS", 4)),
+        base_delay=float(os.environ.get("SMS_DISPATCH_BASE_DELAY", 0.5))
+    )
+
+def build_pending_store(db):
+    ttl_seconds = int(os.environ.get("PENDING_TTL_SECONDS", 900))
+    if os.environ.get("PENDING_STORE", "memory") == "mongo":
+        return AsyncMongoPendingVerificationStore(db, ttl_seconds=ttl_seconds)
+    return AsyncInMemoryPendingVerificationStore(
+        max_size=int(os.environ.get("PENDING_MAX_SIZE", 10000)),
+        ttl_seconds=ttl_seconds
+    )
+
+def busy_response(e):
+    response = jsonify({'error': str(e)})
+    response.headers['Retry-After'] = '1'
+    return response, 503
+
+mongo_repo = AsyncMongoDBUserRepository()
+sms_service = build_sms_service()
+dispatch_queue = build_dispatch_queue(sms_service)
+otp_store = AsyncMongoOTPStore(mongo_repo.db)
+send_otp_use_case = AsyncSendOTPUseCase(sms_service, otp_store, dispatch_queue)
+verify_otp_use_case = AsyncVerifyOTPUseCase(otp_store)
+pending_verifications = build_pending_store(mongo_repo.db)
+rate_limiter = None
+if RATE_LIMIT_ENABLED:
+    # El backend mongo del limitador usa el cliente síncrono (se llama desde un hilo)
+    rate_limiter = install_async_rate_limiter(app, RateLimiter(build_backend(get_database(MONGO_DB_NAME)), RATE_LIMIT_RULES))
+
+
+@app.before_serving
+async def startup():
+    try:
+        await asyncio.to_thread(ensure_indexes_once, get_database(MONGO_DB_NAME))
+    except Exception as e:
+        print(f"❌ No se pudieron crear los índices de MongoDB: {e}")
+    if dispatch_queue is not None:
+        await dispatch_queue.start()
+    print("✅ MongoDB (async) y servicios inicializados correctamente")
+
+@app.after_serving
+async def shutdown():
+    if dispatch_queue is not None:
+        await dispatch_queue.stop()
+
+@app.after_request
+async def add_cors_headers(response):
+    # Mismos orígenes y opciones que flask_cors en main.py
+    origin = request.headers.get('Origin')
+    if origin in ALLOWED_ORIGINS:
+        response.headers['Access-Control-Allow-Origin'] = origin
+        response.headers['Access-Control-Allow-Credentials'] = 'true'
+        response.headers['Vary'] = 'Origin'
+        if request.method == 'OPTIONS':
+            response.headers['Access-Control-Allow-Methods'] = 'GET, POST, PUT, DELETE, OPTIONS'
+            response.headers['Access-Control-Allow-Headers'] = 'Content-Type, Authorization'
+    return response
+
+
+async def read_json():
+    data = await request.get_json(silent=True)
+    return data if isinstance(data, dict) else {}
+
+def options_response():
+    return jsonify({"status": "ok"}), 200
+
+
+@app.route('/health', methods=['GET'])
+async def health_check():
+    return jsonify({
+        'status': 'OK',
+        'service': 'SMS OTP Service (async)',
+        'mongo_connected': True,
+        'total_users': await mongo_repo.collection.count_documents({}),
+        'pending_sessions': await pending_verifications.count(),
+        'pending_store': await pending_verifications.stats(),
+        'rate_limiter': rate_limiter.stats() if rate_limiter is not None else None,
+        'mongo_pool': pool_stats(),
+        'sms_dispatch': dispatch_queue.stats() if dispatch_queue is not None else None,
+        'sms_provider': sms_service.stats() if hasattr(sms_service, 'stats') else None
+    }), 200
+
+@app.route('/sms-status/<message_id>', methods=['GET'])
+async def sms_status(message_id):
+    if dispatch_queue is None:
+        return jsonify({'error': 'SMS dispatch queue disabled'}), 404
+    status = dispatch_queue.status(message_id)
+    if status is None:
+        return jsonify({'error': 'Unknown message id'}), 404
+    return jsonify(status), 200
+
+@app.route('/register', methods=['POST', 'OPTIONS'])
+async def register():
+    if request.method == "OPTIONS":
+        return options_response()
+
+    try:
+        data = await read_json()
+        email = data.get('email')
+        password = data.get('password')
+        first_name = data.get('first_name', '')
+        auth_method = data.get('auth_method', 'sms')
+        phone_number = data.get('phone_number')
+
+        if not email or not password:
+            return jsonify({'error': 'Email and password are required'}), 400
+
+        if await mongo_repo.user_exists(email):
+            return jsonify({'error': 'User already exists'}), 400
+
+        if auth_method == 'sms' and not phone_number:
+            return jsonify({'error': 'Phone number is required for SMS authentication'}), 400
+
+        success = await mongo_repo.save_user(email, {
+            'email': email,
+            'password': password,
+            'first_name': first_name,
+            'auth_method': auth_method,
+            'phone_number': phone_number,
+            'verified': False,
+            'secret': None
+        })
+        if not success:
+            return jsonify({'error': 'Failed to save user'}), 500
+
+        if auth_method == 'sms':
+            message_id = await send_otp_use_case.dispatch(phone_number)
+            if message_id is None:
+                return jsonify({'error': 'Failed to send OTP'}), 500
+
+            await pending_verifications.put(email, phone_number)
+            session['email'] = email
+            session['phone_number'] = phone_number
+            session['pending_2fa'] = True
+            return jsonify({
+                'success': True,
+                'message': 'User registered. OTP sent to phone.',
+                'requires_otp': True,
+                'auth_method': 'sms',
+                'email': email,
+                'message_id': message_id
+            }), 200
+
+        return jsonify({
+            'success': True,
+            'message': 'User registered successfully',
+            'requires_qr': True
+        }), 200
+
+    except SMSQueueFullError as e:
+        return busy_response(e)
+    except Exception as e:
+        log.exception('request_failed', route='register')
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/login', methods=['POST', 'OPTIONS'])
+async def login():
+    if request.method == "OPTIONS":
+        return options_response()
+
+    try:
+        data = await read_json()
+        email = data.get('email')
+        password = data.get('password')
+
+        if not email or not password:
+            return jsonify({'error': 'Email and password are required'}), 400
+
+        user = await mongo_repo.get_user(email)
+        if not user:
+            return jsonify({'error': 'User not found'}), 404
+        if user['password'] != password:
+            return jsonify({'error': 'Invalid password'}), 401
+
+        session['email'] = email
+        session['phone_number'] = user['phone_number']
+        session['pending_2fa'] = True
+
+        if user['auth_method'] == 'sms':
+            phone_number = user['phone_number']
+            message_id = await send_otp_use_case.dispatch(phone_number)
+            if message_id is None:
+                return jsonify({'error': 'Failed to send OTP'}), 500
+
+            await pending_verifications.put(email, phone_number)
+            return jsonify({
+                'success': True,
+                'requires_otp': True,
+                'auth_method': 'sms',
+                'message': 'OTP sent to your phone',
+                'email': email,
+                'message_id': message_id
+            }), 200
+
+        return jsonify({
+            'success': True,
+            'requires_otp': True,
+            'auth_method': 'totp'
+        }), 200
+
+    except SMSQueueFullError as e:
+        return busy_response(e)
+    except Exception as e:
+        log.exception('request_failed', route='login')
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/resend-otp', methods=['POST', 'OPTIONS'])
+async def resend_otp():
+    if request.method == "OPTIONS":
+        return options_response()
+
+    try:
+        data = await read_json()
+        email = data.get('email') or session.get('email')
+        if not email:
+            return jsonify({'error': 'Email is required'}), 400
+
+        # 1. Verificación en curso  2. Usuario registrado en MongoDB
+        phone_number = await pending_verifications.get(email)
+        if not phone_number:
+            user = await mongo_repo.get_user(email)
+            if not user or not user.get('phone_number'):
+                return jsonify({'error': 'No pending verification found for this email'}), 400
+            phone_number = user['phone_number']
+            await pending_verifications.put(email, phone_number)
+
+        message_id = await send_otp_use_case.dispatch(phone_number)
+        if message_id is None:
+            return jsonify({'error': 'Failed to resend OTP'}), 500
+        return jsonify({'message': 'OTP resent successfully', 'message_id': message_id}), 200
+
+    except SMSQueueFullError as e:
+        return busy_response(e)
+    except Exception as e:
+        log.exception('request_failed', route='resend_otp')
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/verify-otp', methods=['POST', 'OPTIONS'])
+async def verify_otp():
+    if request.method == "OPTIONS":
+        return options_response()
+
+    try:
+        data = await read_json()
+        otp = data.get('otp')
+        if not otp:
+            return jsonify({'error': 'OTP is required'}), 400
+
+        email = data.get('email') or session.get('email')
+        if not email:
+            return jsonify({'error': 'No active session. Please login again.'}), 400
+
+        phone_number = session.get('phone_number')
+        if not phone_number:
+            user = await mongo_repo.get_user(email)
+            if not user or not user.get('phone_number'):
+                return jsonify({'error': 'No phone number found'}), 400
+            phone_number = user['phone_number']
+            session['phone_number'] = phone_number
+
+        if not await verify_otp_use_case.execute(phone_number, otp):
+            return jsonify({
+                'valid': False,
+                'error': 'Invalid or expired OTP'
+            }), 400
+
+        await mongo_repo.update_user(email, {'verified': True})
+        session['pending_2fa'] = False
+        session['authenticated'] = True
+        await pending_verifications.remove(email)
+        return jsonify({
+            'valid': True,
+            'message': 'OTP verified successfully',
+            'email': email
+        }), 200
+
+    except Exception as e:
+        log.exception('request_failed', route='verify_otp')
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/debug', methods=['GET'])
+async def debug():
+    emails = [user['email'] async for user in mongo_repo.collection.find({}, {'password': 0})]
+    return jsonify({
+        'mongo_users': emails,
+        'pending_verifications': await pending_verifications.snapshot(),
+        'pending_store': await pending_verifications.stats(),
+        'session': dict(session),
+        'total_users': len(emails)
+    }), 200
+
+@app.route('/send-otp', methods=['POST', 'OPTIONS'])
+async def send_otp():
+    if request.method == "OPTIONS":
+        return options_response()
+
+    try:
+        data = await read_json()
+        phone_number = data.get('phone_number')
+        if not phone_number:
+            return jsonify({'error': 'Phone number is required'}), 400
+
+        message_id = await send_otp_use_case.dispatch(phone_number)
+        if message_id is None:
+            return jsonify({'error': 'Failed to send OTP'}), 500
+        return jsonify({
+            'success': True,
+            'message': 'OTP sent successfully',
+            'phone_number': phone_number,
+            'message_id': message_id
+        }), 200
+
+    except SMSQueueFullError as e:
+        return busy_response(e)
+    except Exception as e:
+        log.exception('request_failed', route='send_otp')
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/sms-login', methods=['POST', 'OPTIONS'])
+async def sms_login():
+    if request.method == "OPTIONS":
+        return options_response()
+
+    try:
+        data = await read_json()
+        phone_number = data.get('phone_number')
+        if not phone_number:
+            return jsonify({'error': 'Phone number is required'}), 400
+
+        user = await mongo_repo.get_user_by_phone(phone_number)
+        if not user:
+            return jsonify({
+                'success': False,
+                'error': 'No user found with this phone number'
+            }), 404
+
+        email = user['email']
+        session.clear()
+        session['email'] = email
+        session['phone_number'] = phone_number
+        session['pending_2fa'] = True
+        session['auth_method'] = 'sms'
+        session['sms_login'] = True
+        await pending_verifications.put(email, phone_number)
+
+        message_id = await send_otp_use_case.dispatch(phone_number)
+        if message_id is None:
+            return jsonify({'error': 'Failed to send OTP'}), 500
+        return jsonify({
+            'success': True,
+            'message': 'OTP sent successfully',
+            'phone_number': phone_number,
+            'email': email,
+            'requires_otp': True,
+            'auth_method': 'sms',
+            'message_id': message_id
+        }), 200
+
+    except SMSQueueFullError as e:
+        return busy_response(e)
+    except Exception as e:
+        log.exception('request_failed', route='sms_login')
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/get-user-by-email', methods=['POST', 'OPTIONS'])
+async def get_user_by_email():
+    if request.method == "OPTIONS":
+        return options_response()
+
+    try:
+        data = await read_json()
+        email = data.get('email')
+        if not email:
+            return jsonify({'error': 'Email is required'}), 400
+
+        user = await mongo_repo.get_user(email)
+        if not user:
+            return jsonify({'error': 'User not found'}), 404
+        return jsonify({
+            'email': user['email'],
+            'phone_number': user.get('phone_number'),
+            'auth_method': user.get('auth_method', 'sms')
+        }), 200
+
+    except Exception as e:
+        log.exception('request_failed', route='get_user_by_email')
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/create-sms-session', methods=['POST', 'OPTIONS'])
+async def create_sms_session():
+    if request.method == "OPTIONS":
+        return options_response()
+
+    try:
+        data = await read_json()
+        email = data.get('email')
+        phone_number = data.get('phone_number')
+        if not email or not phone_number:
+            return jsonify({'error': 'Email and phone number are required'}), 400
+
+        session.clear()
+        session['email'] = email
+        session['phone_number'] = phone_number
+        session['pending_2fa'] = True
+        session['auth_method'] = 'sms'
+        session['sms_login'] = True
+        await pending_verifications.put(email, phone_number)
+
+        message_id = await send_otp_use_case.dispatch(phone_number)
+        if message_id is None:
+            return jsonify({
+                'success': False,
+                'error': 'Failed to generate OTP'
+            }), 500
+        return jsonify({
+            'success': True,
+            'message': 'SMS session created and OTP sent',
+            'email': email,
+            'message_id': message_id
+        }), 200
+
+    except SMSQueueFullError as e:
+        return busy_response(e)
+    except Exception as e:
+        log.exception('request_failed', route='create_sms_session')
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/user-info-sms', methods=['GET'])
+async def get_user_info():
+    email = session.get('email')
+    if not email:
+        return jsonify({'error': 'Not authenticated'}), 401
+
+    user = await mongo_repo.get_user(email)
+    if not user:
+        return jsonify({'error': 'User not found'}), 404
+    return jsonify({
+        'email': user['email'],
+        'first_name': user.get('first_name', ''),
+        'auth_method': user.get('auth_method', 'sms')
+    })
+
+if __name__ == '__main__':
+    print("🚀 Starting SMS OTP Service (asyncio) en http://localhost:8000")
+    app.run(host='0.0.0.0', port=8000)
@@ -0,0 +1,262 @@
+"""Comparación del servicio SMS OTP con Flask (hilos) y con Quart (asyncio).
+
+Arranca cada variante en su propio proceso y la carga con `--concurrency`
+clientes simultáneos en bucle cerrado durante `--duration` segundos:
+  - flask: main.py servido con un pool fijo de `--flask-threads` hilos (como
+    gunicorn --threads); cada petición en vuelo ocupa un hilo.
+  - async: async_main.py servido con hypercorn en un solo proceso.
+
+Escenarios:
+  - send:   POST /send-otp con el SMS enviado dentro de la petición
+            (SMS_DISPATCH_WORKERS=0) y latencia simulada del proveedor
+  - verify: POST /verify-otp con un código incorrecto para usuarios ya
+            registrados (get_user + find_one_and_update)
+  - mixed:  mitad y mitad
+
+Por defecto MongoDB es mongomock:// (sin mongod). Ojo: mongomock recorre la
+colección entera en cada update_many, así que con muchos OTPs guardados el
+servidor acaba limitado por CPU y no por esperas; para ver la diferencia de
+verdad hay que subir la latencia del SMS o usar --mongo-uri con un servidor real.
+Informa de peticiones/s, latencias p50/p95/p99, errores y memoria/hilos del
+proceso servidor.
+
+Uso (desde sms_otp/):
+    python benchmarks/compare_async_flask.py --concurrency 500 --sms-latency lognormal:median_ms=400,sigma=0.4
+    python benchmarks/compare_async_flask.py --scenario verify --mongo-uri mongodb://localhost:27017
+    python benchmarks/compare_async_flask.py --only async --concurrency 2000
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import time
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+service_dir = os.path.dirname(current_dir)
+
+
+# --- servidores (se ejecutan en el subproceso) -----------------------------
+
+def serve_flask(port, threads):
+    from concurrent.futures import ThreadPoolExecutor
+    from werkzeug.serving import BaseWSGIServer
+
+    class PooledWSGIServer(BaseWSGIServer):
+        """Servidor WSGI con un número fijo de hilos (como gunicorn --threads)"""
+        multithread = True
+        request_queue_size = 4096
+
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            self.pool = ThreadPoolExecutor(max_workers=threads)
+
+        def process_request(self, request, client_address):
+            self.pool.submit(self._process, request, client_address)
+
+        def _process(self, request, client_address):
+            try:
+                self.finish_request(request, client_address)
+            except Exception:
+                self.handle_error(request, client_address)
+            finally:
+                self.shutdown_request(request)
+
+    from main import app
+    PooledWSGIServer('127.0.0.1', port, app).serve_forever()
+
+
+def serve_async(port):
+    from hypercorn.asyncio import serve
+    from hypercorn.config import Config
+
+    from async_main import app
+    config = Config()
+    config.bind = [f"127.0.0.1:{port}"]
+    config.backlog = 4096
+    config.accesslog = None
+    asyncio.run(serve(app, config))
+
+
+# --- cliente de carga ------------------------------------------------------
+
+async def http_post(port, path, payload):
+    """POST con una conexión nueva por petición (igual para ambos servidores)"""
+    body = json.dumps(payload).encode()
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    try:
+        writer.write(
+            f"POST {path} HTTP/1.1\r\nHost: 127.0.0.1\r\nContent-Type: application/json\r\n"
+            f"Content-Length: {len(body)}\r\nConnection: close\r\n\r\n".encode() + body
+        )
+        await writer.drain()
+        response = await reader.read()
+    finally:
+        writer.close()
+    return int(response.split(b' ', 2)[1])
+
+
+async def http_get_status(port, path):
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    try:
+        writer.write(f"GET {path} HTTP/1.1\r\nHost: 127.0.0.1\r\nConnection: close\r\n\r\n".encode())
+        await writer.drain()
+        response = await reader.read()
+    finally:
+        writer.close()
+    return int(response.split(b' ', 2)[1])
+
+
+def phone(i):
+    return f"+3460{i:07d}"
+
+
+async def seed_users(port, users):
+    """Usuarios registrados para el escenario verify (cada alta envía un SMS)"""
+    semaphore = asyncio.Semaphore(50)
+
+    async def register(i):
+        async with semaphore:
+            await http_post(port, '/register', {
+                'email': f"bench{i}@example.com", 'password': 'x', 'phone_number': phone(i)
+            })
+    await asyncio.gather(*(register(i) for i in range(users)))
+
+
+async def run_load(port, scenario, concurrency, duration, users):
+    latencies = []
+    errors = {}
+    deadline = time.perf_counter() + duration
+
+    async def client(worker):
+        rng = random.Random(worker)
+        while time.perf_counter() < deadline:
+            i = rng.randrange(users)
+            kind = scenario if scenario != 'mixed' else rng.choice(('send', 'verify'))
+            if kind == 'send':
+                path, payload, expected = '/send-otp', {'phone_number': phone(i)}, 200
+            else:
+                path, payload, expected = '/verify-otp', {'email': f"bench{i}@example.com", 'otp': '000000'}, 400
+            start = time.perf_counter()
+            try:
+                status = await http_post(port, path, payload)
+            except OSError as e:
+                status = type(e).__name__
+            latencies.append(time.perf_counter() - start)
+            if status != expected:
+                errors[status] = errors.get(status, 0) + 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(client(w) for w in range(concurrency)))
+    return latencies, errors, time.perf_counter() - started
+
+
+def process_info(pid):
+    info = {}
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                key, _, value = line.partition(':')
+                if key in ('VmRSS', 'VmHWM', 'Threads'):
+                    info[key] = value.strip()
+    except OSError:
+        pass
+    return info
+
+
+def percentile(sorted_values, p):
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * p))]
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def benchmark(variant, args):
+    port = free_port()
+    env = dict(os.environ,
+               MONGO_URI=args.mongo_uri,
+               MONGO_DB_NAME=f"autentication_bench_{variant}",
+               SMS_PROVIDER='simulated',
+               SMS_SIM_LATENCY=args.sms_latency,
+               SMS_DISPATCH_WORKERS='0',
+               RATE_LIMIT_ENABLED='0',
+               MONGO_MAX_POOL_SIZE=str(args.pool_size))
+    command = [sys.executable, os.path.abspath(__file__), '--serve', variant, '--port', str(port),
+               '--flask-threads', str(args.flask_threads)]
+    server = subprocess.Popen(command, cwd=service_dir, env=env,
+                              stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL if not args.verbose else None)
+    try:
+        loop = asyncio.new_event_loop()
+        for _ in range(200):
+            try:
+                if loop.run_until_complete(http_get_status(port, '/health')) == 200:
+                    break
+            except OSError:
+                time.sleep(0.1)
+        else:
+            raise RuntimeError(f"El servidor {variant} no arrancó")
+
+        if args.scenario in ('verify', 'mixed'):
+            loop.run_until_complete(seed_users(port, args.users))
+        latencies, errors, elapsed = loop.run_until_complete(
+            run_load(port, args.scenario, args.concurrency, args.duration, args.users))
+        info = process_info(server.pid)
+        loop.close()
+    finally:
+        server.terminate()
+        server.wait(timeout=10)
+
+    latencies.sort()
+    label = f"flask ({args.flask_threads} hilos)" if variant == 'flask' else "async (hypercorn)"
+    print(f"{label:<22} {len(latencies) / elapsed:9.1f} req/s  "
+          f"p50 {percentile(latencies, 0.50) * 1000:7.1f} ms  "
+          f"p95 {percentile(latencies, 0.95) * 1000:7.1f} ms  "
+          f"p99 {percentile(latencies, 0.99) * 1000:7.1f} ms  "
+          f"errores {sum(errors.values())}  "
+          f"RSS {info.get('VmRSS', '?')}  hilos {info.get('Threads', '?')}")
+    if errors:
+        print(f"   {errors}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--scenario', choices=['send', 'verify', 'mixed'], default='send')
+    parser.add_argument('--concurrency', type=int, default=200, help="clientes simultáneos")
+    parser.add_argument('--duration', type=float, default=10.0)
+    parser.add_argument('--users', type=int, default=200)
+    parser.add_argument('--flask-threads', type=int, default=32)
+    parser.add_argument('--sms-latency', default="lognormal:median_ms=120,sigma=0.5")
+    parser.add_argument('--mongo-uri', default="mongomock://")
+    parser.add_argument('--pool-size', type=int, default=100, help="MONGO_MAX_POOL_SIZE de los servidores")
+    parser.add_argument('--only', choices=['flask', 'async'])
+    parser.add_argument('--verbose', action='store_true', help="mostrar stderr de los servidores")
+    parser.add_argument('--serve', choices=['flask', 'async'], help=argparse.SUPPRESS)
+    parser.add_argument('--port', type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve:
+        sys.path.insert(0, service_dir)
+        sys.path.append(os.path.dirname(service_dir))
+        if args.serve == 'flask':
+            serve_flask(args.port, args.flask_threads)
+        else:
+            serve_async(args.port)
+        return
+
+    print(f"Escenario {args.scenario}: {args.concurrency} clientes, {args.duration}s, "
+          f"SMS {args.sms_latency}, MongoDB {args.mongo_uri}")
+    for variant in ('flask', 'async'):
+        if args.only in (None, variant):
+            benchmark(variant, args)
+
+
+if __name__ == '__main__':
+    main()
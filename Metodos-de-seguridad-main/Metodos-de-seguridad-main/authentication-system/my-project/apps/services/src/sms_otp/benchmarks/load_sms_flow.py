@@ -0,0 +1,156 @@
+"""Generador de carga para el flujo register -> envío SMS -> verify-otp de sms_otp.
+
+Carga main.py dentro del proceso con SMS_PROVIDER=simulated (y por defecto
+MONGO_URI=mongomock://, sin mongod) y lanza usuarios a un ritmo fijo
+(`--rps`, bucle abierto: una llegada cada 1/rps segundos aunque el servidor
+se retrase). Cada usuario se registra, espera a que el gateway simulado
+entregue su SMS y verifica el código. Informa p50/p95/p99 de cada paso.
+
+Uso (desde sms_otp/):
+    python benchmarks/load_sms_flow.py --rps 50 --duration 20
+    SMS_SIM_LATENCY="uniform:min_ms=50,max_ms=400" SMS_SIM_ERROR_RATE=0.05 \\
+        python benchmarks/load_sms_flow.py --rps 100 --duration 30 --json informe.json
+    python benchmarks/load_sms_flow.py --mongo-uri mongodb://localhost:27017
+"""
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+service_dir = os.path.dirname(current_dir)
+sys.path.insert(0, service_dir)
+
+
+def percentiles(values):
+    if not values:
+        return None
+    array = np.array(values)
+    return {
+        'count': len(values),
+        'p50_ms': round(float(np.percentile(array, 50)), 2),
+        'p95_ms': round(float(np.percentile(array, 95)), 2),
+        'p99_ms': round(float(np.percentile(array, 99)), 2),
+        'max_ms': round(float(array.max()), 2)
+    }
+
+
+class FlowRunner:
+    def __init__(self, main_module, sms_timeout):
+        self.main = main_module
+        self.gateway = main_module.sms_service
+        self.sms_timeout = sms_timeout
+        self.local = threading.local()
+        self.lock = threading.Lock()
+        self.timings = {'register': [], 'sms_delivery': [], 'verify': [], 'end_to_end': []}
+        self.errors = {}
+
+    def client(self):
+        if not hasattr(self.local, 'client'):
+            self.local.client = self.main.app.test_client()
+        return self.local.client
+
+    def _error(self, step):
+        with self.lock:
+            self.errors[step] = self.errors.get(step, 0) + 1
+
+    def run_user(self, scheduled_at):
+        client = self.client()
+        suffix = uuid.uuid4().int % 10**9
+        email = f"carga{suffix}@example.com"
+        phone = f"+3460{suffix:09d}"
+
+        start = time.perf_counter()
+        response = client.post('/register', json={
+            'email': email, 'password': 'carga', 'first_name': 'Carga',
+            'auth_method': 'sms', 'phone_number': phone
+        })
+        registered = time.perf_counter()
+        if response.status_code != 200:
+            return self._error(f"register_{response.status_code}")
+
+        otp = None
+        while time.perf_counter() - registered < self.sms_timeout:
+            otp = self.gateway.last_otp(phone)
+            if otp:
+                break
+            time.sleep(0.005)
+        delivered = time.perf_counter()
+        if not otp:
+            return self._error('sms_timeout')
+
+        response = client.post('/verify-otp', json={'otp': otp, 'email': email})
+        verified = time.perf_counter()
+        if response.status_code != 200 or not response.get_json().get('valid'):
+            return self._error(f"verify_{response.status_code}")
+
+        with self.lock:
+            self.timings['register'].append((registered - start) * 1000)
+            self.timings['sms_delivery'].append((delivered - registered) * 1000)
+            self.timings['verify'].append((verified - delivered) * 1000)
+            # desde la llegada programada: incluye la espera si el generador va retrasado
+            self.timings['end_to_end'].append((verified - scheduled_at) * 1000)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rps', type=float, default=20)
+    parser.add_argument('--duration', type=float, default=10, help="segundos de generación de carga")
+    parser.add_argument('--concurrency', type=int, default=64, help="hilos cliente máximos")
+    parser.add_argument('--sms-timeout', type=float, default=30)
+    parser.add_argument('--mongo-uri', default=os.environ.get("MONGO_URI", "mongomock://"))
+    parser.add_argument('--json', help="guardar el informe en este fichero")
+    args = parser.parse_args()
+
+    os.environ["MONGO_URI"] = args.mongo_uri
+    os.environ.setdefault("SMS_PROVIDER", "simulated")
+    # Todas las peticiones salen de la misma IP: el limitador cortaría la carga
+    os.environ.setdefault("RATE_LIMIT_ENABLED", "0")
+    # main.py imprime mucho por petición; se silencia durante la carga
+    real_stdout = sys.stdout
+    sys.stdout = open(os.devnull, 'w')
+    try:
+        import main as sms_main
+        runner = FlowRunner(sms_main, args.sms_timeout)
+
+        total = int(args.rps * args.duration)
+        interval = 1.0 / args.rps
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+            for i in range(total):
+                scheduled_at = started + i * interval
+                delay = scheduled_at - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+                executor.submit(runner.run_user, scheduled_at)
+        elapsed = time.perf_counter() - started
+    finally:
+        sys.stdout.close()
+        sys.stdout = real_stdout
+
+    completed = len(runner.timings['end_to_end'])
+    report = {
+        'target_rps': args.rps,
+        'achieved_rps': round(completed / elapsed, 2),
+        'users': total,
+        'completed': completed,
+        'errors': runner.errors,
+        'sms_provider': os.environ["SMS_PROVIDER"],
+        'latency': {step: percentiles(values) for step, values in runner.timings.items()},
+        'gateway': sms_main.sms_service.stats() if hasattr(sms_main.sms_service, 'stats') else None,
+        'dispatch': sms_main.dispatch_queue.stats() if sms_main.dispatch_queue is not None else None
+    }
+    print(json.dumps(report, indent=2))
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,102 @@
+"""Comprobación de carrera: dos verificaciones simultáneas del mismo código.
+
+En cada ronda se genera un código y `--parallel` hilos lo verifican a la vez
+(sincronizados con una barrera). Con MongoOTPStore sólo una verificación por
+ronda puede tener éxito. Con --legacy se reproduce el esquema anterior
+(find_one y después update_one) para comparar.
+
+Uso (desde sms_otp/):
+    python benchmarks/race_verify_otp.py --rounds 500 --parallel 2
+    python benchmarks/race_verify_otp.py --rounds 500 --legacy
+    python benchmarks/race_verify_otp.py --mock
+"""
+import argparse
+import os
+import sys
+import threading
+from datetime import datetime, timedelta, timezone
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+service_dir = os.path.dirname(current_dir)
+sys.path.insert(0, service_dir)
+sys.path.append(os.path.dirname(service_dir))
+
+from infrastructure.mongo_otp_store import MongoOTPStore
+from shared.mongo_connection import MONGO_URI
+from shared.mongo_indexes import INDEXES, ensure_indexes
+
+
+class LegacyOTPStore(MongoOTPStore):
+    """Verificación en dos pasos como hacía SMSOTPGenerator antes del cambio"""
+
+    def consume_code(self, phone_number, otp, now):
+        record = self.collection.find_one({'phone_number': phone_number, 'used': False, 'otp': otp})
+        if not record or record['expires_at'].replace(tzinfo=timezone.utc) <= now:
+            return False
+        self.collection.update_one({'_id': record['_id']}, {'$set': {'used': True}})
+        return True
+
+
+def race_round(store, phone_number, parallel):
+    otp = '123456'
+    store.save_code(phone_number, otp, datetime.now(timezone.utc) + timedelta(minutes=5))
+
+    barrier = threading.Barrier(parallel)
+    results = []
+    lock = threading.Lock()
+
+    def verify():
+        barrier.wait()
+        ok = store.consume_code(phone_number, otp, datetime.now(timezone.utc))
+        with lock:
+            results.append(ok)
+
+    threads = [threading.Thread(target=verify) for _ in range(parallel)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return sum(results)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--uri', default=MONGO_URI)
+    parser.add_argument('--db', default="autentication_race_check")
+    parser.add_argument('--rounds', type=int, default=200)
+    parser.add_argument('--parallel', type=int, default=2)
+    parser.add_argument('--legacy', action='store_true', help="usar la verificación antigua en dos pasos")
+    parser.add_argument('--mock', action='store_true', help="mongomock (no reproduce la concurrencia real del servidor)")
+    args = parser.parse_args()
+
+    if args.mock:
+        import mongomock
+        client = mongomock.MongoClient(tz_aware=True)
+    else:
+        from pymongo import MongoClient
+        client = MongoClient(args.uri, tz_aware=True)
+    db = client[args.db]
+    db['otps'].drop()
+    ensure_indexes(db, {'otps': INDEXES['otps']})
+
+    store = (LegacyOTPStore if args.legacy else MongoOTPStore)(db)
+    double_success = 0
+    no_success = 0
+    for i in range(args.rounds):
+        successes = race_round(store, f"+3460000{i:04d}", args.parallel)
+        if successes > 1:
+            double_success += 1
+        elif successes == 0:
+            no_success += 1
+
+    name = "legacy (find_one + update_one)" if args.legacy else "find_one_and_update"
+    print(f"{name}: {args.rounds} rondas x {args.parallel} verificaciones simultáneas")
+    print(f"  rondas con más de un éxito: {double_success}")
+    print(f"  rondas sin ningún éxito:    {no_success}")
+    if not args.mock:
+        client.drop_database(args.db)
+    sys.exit(1 if double_success or no_success else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,69 +1,66 @@
 import random
-import time
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
+
+from shared.metrics import outcome, stage_timer
+from shared.structured_logging import get_logger
+
+log = get_logger('sms_otp.generator')
+
+OTP_STORE = stage_timer('sms_otp', 'otp_store')
+OTP_VERIFY = stage_timer('sms_otp', 'otp_verify')
+VERIFY_VALID = outcome('sms_otp', 'verify', 'valid')
+VERIFY_INVALID = outcome('sms_otp', 'verify', 'invalid')
 
 class SMSOTPGenerator:
-    def __init__(self, mongo_repository, length: int = 6, expiry_minutes: int = 5):
+    def __init__(self, otp_store, length: int = 6, expiry_minutes: int = 5):
         self.length = length
         self.expiry_minutes = expiry_minutes
-        self.mongo_repo = mongo_repository
+        self.otp_store = otp_store
 
-    def generate_otp(self, phone_number: str) -> str:
+    def new_code(self):
+        """(código, expiración en UTC) sin guardarlo"""
         otp = ''.join([str(random.randint(0, 9)) for _ in range(self.length)])
-        expiry_time = datetime.now() + timedelta(minutes=self.expiry_minutes)
-        
-        # Guardar OTP en MongoDB
-        otp_data = {
-            'phone_number': phone_number,
-            'otp': otp,
-            'expires_at': expiry_time,
-            'created_at': datetime.now(),
-            'used': False
-        }
-        
-        # Guardar en colección de OTPs
-        self.mongo_repo.db['otps'].update_one(
-            {'phone_number': phone_number},
-            {'$set': otp_data},
-            upsert=True
-        )
-        
-        print(f"🔐 OTP generado para {phone_number}: {otp} (expira: {expiry_time})")
+        return otp, datetime.now(timezone.utc) + timedelta(minutes=self.expiry_minutes)
+
+    def generate_otp(self, phone_number: str) -> str:
+        otp, expiry_time = self.new_code()
+        self.store_code(phone_number, otp, expiry_time)
         return otp
 
+    def store_code(self, phone_number: str, otp: str, expiry_time=None):
+        """Guarda `otp` como código vigente; sin `expiry_time`, caduca a contar desde ahora"""
+        expiry_time = expiry_time or datetime.now(timezone.utc) + timedelta(minutes=self.expiry_minutes)
+        # Cada código es un documento nuevo; los anteriores quedan invalidados
+        with OTP_STORE.time():
+            self.otp_store.save_code(phone_number, otp, expiry_time)
+        log.info('otp_generated', phone_number=phone_number, expires_at=expiry_time.isoformat())
+
     def verify_otp(self, phone_number: str, otp: str) -> bool:
-        print(f"🔍 Verificando OTP {otp} para {phone_number}")
-        
-        # Buscar OTP en MongoDB
-        otp_record = self.mongo_repo.db['otps'].find_one({
-            'phone_number': phone_number,
-            'used': False
-        })
-        
-        if not otp_record:
-            print(f"❌ No hay OTP pendiente para {phone_number}")
-            return False
-        
-        stored_otp = otp_record['otp']
-        expiry_time = otp_record['expires_at']
-        
-        if datetime.now() > expiry_time:
-            print(f"❌ OTP expirado para {phone_number}")
-            # Marcar como expirado
-            self.mongo_repo.db['otps'].update_one(
-                {'phone_number': phone_number},
-                {'$set': {'used': True}}
-            )
-            return False
-        
-        if stored_otp == otp:
-            print(f"✅ OTP válido para {phone_number}")
-            # Marcar como usado
-            self.mongo_repo.db['otps'].update_one(
-                {'phone_number': phone_number},
-                {'$set': {'used': True}}
-            )
-            return True
-        else:
-            print(f"❌ OTP incorrecto para {phone_number}")
-            return False
\ No newline at end of file
+        # Teléfono, código, no usado y no expirado se comprueban en una sola operación
+        with OTP_VERIFY.time():
+            valid = self.otp_store.consume_code(phone_number, otp, datetime.now(timezone.utc))
+        (VERIFY_VALID if valid else VERIFY_INVALID).inc()
+        log.info('otp_verified', phone_number=phone_number, valid=valid)
+        return valid
+
+
+class AsyncSMSOTPGenerator(SMSOTPGenerator):
+    """Misma lógica sobre un AsyncOTPStorePort"""
+
+    async def generate_otp(self, phone_number: str) -> str:
+        otp, expiry_time = self.new_code()
+        await self.store_code(phone_number, otp, expiry_time)
+        return otp
+
+    async def store_code(self, phone_number: str, otp: str, expiry_time=None):
+        expiry_time = expiry_time or datetime.now(timezone.utc) + timedelta(minutes=self.expiry_minutes)
+        with OTP_STORE.time():
+            await self.otp_store.save_code(phone_number, otp, expiry_time)
+        log.info('otp_generated', phone_number=phone_number, expires_at=expiry_time.isoformat())
+
+    async def verify_otp(self, phone_number: str, otp: str) -> bool:
+        with OTP_VERIFY.time():
+            valid = await self.otp_store.consume_code(phone_number, otp, datetime.now(timezone.utc))
+        (VERIFY_VALID if valid else VERIFY_INVALID).inc()
+        log.info('otp_verified', phone_number=phone_number, valid=valid)
+        return valid
@@ -0,0 +1,43 @@
+from datetime import datetime
+
+from shared.metrics import repository_timer, timed_async
+
+try:
+    from ports.async_otp_store_port import AsyncOTPStorePort
+except ImportError:
+    from ..ports.async_otp_store_port import AsyncOTPStorePort
+
+
+class AsyncMongoOTPStore(AsyncOTPStorePort):
+    """MongoOTPStore para el cliente asíncrono: mismas consultas y mismo índice TTL"""
+
+    def __init__(self, db, collection_name="otps"):
+        self.collection = db[collection_name]
+
+    @timed_async(repository_timer('sms_otp', 'save_code'))
+    async def save_code(self, phone_number: str, otp: str, expires_at: datetime) -> None:
+        await self.collection.update_many(
+            {'phone_number': phone_number, 'used': False},
+            {'$set': {'used': True}}
+        )
+        await self.collection.insert_one({
+            'phone_number': phone_number,
+            'otp': otp,
+            'expires_at': expires_at,
+            'created_at': datetime.now(expires_at.tzinfo),
+            'used': False
+        })
+
+    @timed_async(repository_timer('sms_otp', 'consume_code'))
+    async def consume_code(self, phone_number: str, otp: str, now: datetime) -> bool:
+        record = await self.collection.find_one_and_update(
+            {
+                'phone_number': phone_number,
+                'otp': otp,
+                'used': False,
+                'expires_at': {'$gt': now}
+            },
+            {'$set': {'used': True, 'used_at': now}},
+            projection={'_id': 1}
+        )
+        return record is not None
@@ -0,0 +1,33 @@
+from shared.mongo_connection import get_async_mongo_client, MONGO_DB_NAME
+from shared.metrics import repository_timer, timed_async
+
+class AsyncMongoDBUserRepository:
+    """MongoDBUserRepository sobre el cliente asíncrono de pymongo"""
+
+    def __init__(self, uri=None, db_name=MONGO_DB_NAME):
+        self.client = get_async_mongo_client(uri)
+        self.db = self.client[db_name]
+        self.collection = self.db["users"]
+
+    @timed_async(repository_timer('sms_otp', 'save_user'))
+    async def save_user(self, email, user_data):
+        """Guarda o actualiza un usuario"""
+        result = await self.collection.update_one({'email': email}, {'$set': user_data}, upsert=True)
+        return result.upserted_id or result.modified_count > 0
+
+    @timed_async(repository_timer('sms_otp', 'get_user'))
+    async def get_user(self, email):
+        return await self.collection.find_one({'email': email})
+
+    @timed_async(repository_timer('sms_otp', 'get_user_by_phone'))
+    async def get_user_by_phone(self, phone_number):
+        return await self.collection.find_one({'phone_number': phone_number})
+
+    @timed_async(repository_timer('sms_otp', 'update_user'))
+    async def update_user(self, email, updates):
+        result = await self.collection.update_one({'email': email}, {'$set': updates})
+        return result.modified_count > 0
+
+    @timed_async(repository_timer('sms_otp', 'user_exists'))
+    async def user_exists(self, email):
+        return await self.collection.count_documents({'email': email}, limit=1) > 0
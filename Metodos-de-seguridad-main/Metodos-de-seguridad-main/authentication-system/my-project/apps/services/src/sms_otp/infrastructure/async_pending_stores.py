@@ -0,0 +1,86 @@
+from datetime import datetime, timedelta, timezone
+
+try:
+    from ports.async_pending_verification_store_port import AsyncPendingVerificationStorePort
+    from infrastructure.in_memory_pending_store import InMemoryPendingVerificationStore
+except ImportError:
+    from ..ports.async_pending_verification_store_port import AsyncPendingVerificationStorePort
+    from .in_memory_pending_store import InMemoryPendingVerificationStore
+
+
+class AsyncInMemoryPendingVerificationStore(AsyncPendingVerificationStorePort):
+    """InMemoryPendingVerificationStore detrás de la interfaz asíncrona (no bloquea: todo en memoria)"""
+
+    def __init__(self, max_size=10000, ttl_seconds=900):
+        self.store = InMemoryPendingVerificationStore(max_size=max_size, ttl_seconds=ttl_seconds)
+
+    async def put(self, email, phone_number):
+        self.store.put(email, phone_number)
+
+    async def get(self, email):
+        return self.store.get(email)
+
+    async def remove(self, email):
+        return self.store.remove(email)
+
+    async def count(self):
+        return len(self.store)
+
+    async def stats(self):
+        return self.store.stats()
+
+    async def snapshot(self, limit=100):
+        return self.store.snapshot(limit)
+
+
+class AsyncMongoPendingVerificationStore(AsyncPendingVerificationStorePort):
+    """MongoPendingVerificationStore para el cliente asíncrono (un documento por email)"""
+
+    def __init__(self, db, ttl_seconds=900, collection_name="pending_verifications"):
+        self.collection = db[collection_name]
+        self.ttl_seconds = ttl_seconds
+        # Un solo bucle de eventos: los contadores no necesitan lock
+        self.hits = 0
+        self.misses = 0
+
+    async def put(self, email, phone_number):
+        now = datetime.now(timezone.utc)
+        await self.collection.update_one(
+            {'_id': email},
+            {'$set': {'phone_number': phone_number, 'expires_at': now + timedelta(seconds=self.ttl_seconds)}},
+            upsert=True
+        )
+
+    async def get(self, email):
+        entry = await self.collection.find_one(
+            {'_id': email, 'expires_at': {'$gt': datetime.now(timezone.utc)}},
+            {'phone_number': 1}
+        )
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return entry['phone_number']
+
+    async def remove(self, email):
+        return (await self.collection.delete_one({'_id': email})).deleted_count > 0
+
+    async def count(self):
+        return await self.collection.count_documents({'expires_at': {'$gt': datetime.now(timezone.utc)}})
+
+    async def stats(self):
+        return {
+            'backend': 'mongo',
+            'size': await self.count(),
+            'ttl_seconds': self.ttl_seconds,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': None,
+            'expirations': None
+        }
+
+    async def snapshot(self, limit=100):
+        cursor = self.collection.find(
+            {'expires_at': {'$gt': datetime.now(timezone.utc)}}, {'phone_number': 1}
+        ).sort('expires_at', -1).limit(limit)
+        return {entry['_id']: entry['phone_number'] async for entry in cursor}
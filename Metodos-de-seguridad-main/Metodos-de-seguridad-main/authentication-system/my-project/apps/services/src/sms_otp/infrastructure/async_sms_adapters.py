@@ -0,0 +1,31 @@
+import asyncio
+
+try:
+    from ports.async_sms_service_port import AsyncSMSServicePort
+    from infrastructure.simulated_sms_gateway import SimulatedSMSGateway
+except ImportError:
+    from ..ports.async_sms_service_port import AsyncSMSServicePort
+    from .simulated_sms_gateway import SimulatedSMSGateway
+
+
+class ThreadedSMSAdapter(AsyncSMSServicePort):
+    """Adapta un SMSServicePort síncrono (Twilio, en memoria) ejecutando cada
+    envío en el pool de hilos por defecto del bucle"""
+
+    def __init__(self, sms_service):
+        self.sms_service = sms_service
+
+    async def send_otp(self, phone_number, otp):
+        return await asyncio.to_thread(self.sms_service.send_otp, phone_number, otp)
+
+    def stats(self):
+        return self.sms_service.stats() if hasattr(self.sms_service, 'stats') else None
+
+
+class AsyncSimulatedSMSGateway(SimulatedSMSGateway, AsyncSMSServicePort):
+    """SimulatedSMSGateway cuya latencia se espera con asyncio.sleep en lugar de
+    time.sleep: miles de envíos simultáneos sin un hilo por envío"""
+
+    async def send_otp(self, phone_number, otp):
+        await asyncio.sleep(self._start_send())
+        return self._complete_send(phone_number, otp)
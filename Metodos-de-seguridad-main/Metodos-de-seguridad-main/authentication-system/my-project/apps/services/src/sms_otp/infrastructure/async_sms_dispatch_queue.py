@@ -0,0 +1,196 @@
+import asyncio
+import random
+import time
+import uuid
+from collections import OrderedDict, deque
+
+from shared.metrics import outcome, stage_timer
+from shared.structured_logging import get_logger
+
+try:
+    from ports.async_sms_service_port import AsyncSMSServicePort
+    from infrastructure.sms_dispatch_queue import SMSQueueFullError, mask_phone
+except ImportError:
+    from ..ports.async_sms_service_port import AsyncSMSServicePort
+    from .sms_dispatch_queue import SMSQueueFullError, mask_phone
+
+# Un intento por observación; los reintentos cuentan aparte
+SMS_SEND = stage_timer('sms_otp', 'sms_send')
+SMS_SENT = outcome('sms_otp', 'sms', 'sent')
+SMS_RETRIED = outcome('sms_otp', 'sms', 'retried')
+SMS_FAILED = outcome('sms_otp', 'sms', 'failed')
+
+log = get_logger('sms_otp.dispatch')
+
+
+class AsyncSMSDispatchQueue:
+    """SMSDispatchQueue para el servicio asyncio: mismos estados, reintentos y
+    estadísticas, con tareas del bucle en lugar de hilos.
+
+    `workers` acota los envíos simultáneos al proveedor; los reintentos esperan
+    su backoff en una tarea propia sin ocupar un worker. start() y stop() se
+    llaman desde el bucle (before_serving / after_serving).
+    """
+
+    def __init__(self, sms_service: AsyncSMSServicePort, workers=64, max_queue=10000, max_attempts=4,
+                 base_delay=0.5, max_delay=30.0, max_statuses=10000, max_dead_letters=1000):
+        self.sms_service = sms_service
+        self.workers = workers
+        self.max_queue = max_queue
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.max_statuses = max_statuses
+
+        self._queue = None
+        self._tasks = []
+        self._retry_tasks = set()
+        self._statuses = OrderedDict()
+        self.dead_letters = deque(maxlen=max_dead_letters)
+        self._stopping = False
+
+        self.enqueued = 0
+        self.sent = 0
+        self.failed = 0
+        self.retried = 0
+        self.rejected = 0
+        self.in_flight = 0
+
+    async def start(self):
+        if self._tasks:
+            return self
+        self._stopping = False
+        self._queue = asyncio.Queue(maxsize=self.max_queue)
+        self._tasks = [asyncio.create_task(self._work(), name=f"sms-dispatch-{i}") for i in range(self.workers)]
+        return self
+
+    async def stop(self, timeout=5):
+        """Espera a que se vacíe la cola y cancela los workers y los reintentos pendientes"""
+        if self._queue is not None:
+            try:
+                await asyncio.wait_for(self._queue.join(), timeout)
+            except asyncio.TimeoutError:
+                pass
+        self._stopping = True
+        for task in [*self._tasks, *self._retry_tasks]:
+            task.cancel()
+        await asyncio.gather(*self._tasks, *self._retry_tasks, return_exceptions=True)
+        self._tasks = []
+        self._retry_tasks.clear()
+
+    # --- API -------------------------------------------------------------
+
+    def enqueue(self, phone_number, otp, before_send=None):
+        """Encola un envío y devuelve su message_id (no espera al proveedor).
+        `before_send()` (opcional) devuelve una corrutina que se espera antes del primer envío"""
+        message_id = uuid.uuid4().hex
+        job = {'message_id': message_id, 'phone_number': phone_number, 'otp': otp, 'attempts': 0,
+               'before_send': before_send}
+        self._set_status(message_id, 'queued', phone=mask_phone(phone_number), attempts=0)
+        try:
+            self._queue.put_nowait(job)
+        except asyncio.QueueFull:
+            self.rejected += 1
+            self._statuses.pop(message_id, None)
+            raise SMSQueueFullError("Cola de SMS llena. Intenta de nuevo.")
+        self.enqueued += 1
+        return message_id
+
+    def status(self, message_id):
+        status = self._statuses.get(message_id)
+        return dict(status) if status else None
+
+    def stats(self):
+        return {
+            'workers': self.workers,
+            'queued': self._queue.qsize() if self._queue is not None else 0,
+            'scheduled_retries': len(self._retry_tasks),
+            'in_flight': self.in_flight,
+            'enqueued': self.enqueued,
+            'sent': self.sent,
+            'failed': self.failed,
+            'retried': self.retried,
+            'rejected': self.rejected,
+            'dead_letters': len(self.dead_letters)
+        }
+
+    # --- workers ---------------------------------------------------------
+
+    async def _work(self):
+        while True:
+            job = await self._queue.get()
+            try:
+                await self._attempt(job)
+            except Exception:
+                log.exception('sms_dispatch_failed', message_id=job['message_id'])
+            finally:
+                self._queue.task_done()
+
+    async def _attempt(self, job):
+        job['attempts'] += 1
+        self.in_flight += 1
+        self._set_status(job['message_id'], 'sending', attempts=job['attempts'], next_attempt_in=None)
+
+        error = None
+        retry_after = 0
+        try:
+            if job.get('before_send') is not None:
+                # p. ej. guardar el OTP: sólo una vez, y se reintenta como el envío si falla
+                await job['before_send']()
+                job['before_send'] = None
+            with SMS_SEND.time():
+                delivered = await self.sms_service.send_otp(job['phone_number'], job['otp'])
+            if not delivered:
+                error = "El proveedor SMS rechazó el envío"
+        except Exception as e:
+            error = str(e)
+            retry_after = getattr(e, 'retry_after', 0) or 0
+        finally:
+            self.in_flight -= 1
+
+        if error is None:
+            self.sent += 1
+            SMS_SENT.inc()
+            self._set_status(job['message_id'], 'sent', error=None)
+            return
+
+        if job['attempts'] >= self.max_attempts or self._stopping:
+            self.failed += 1
+            SMS_FAILED.inc()
+            self._set_status(job['message_id'], 'failed', error=error)
+            self.dead_letters.append({
+                'message_id': job['message_id'],
+                'phone': mask_phone(job['phone_number']),
+                'attempts': job['attempts'],
+                'error': error,
+                'failed_at': time.time()
+            })
+            return
+
+        delay = max(self._backoff(job['attempts']), retry_after)
+        self.retried += 1
+        SMS_RETRIED.inc()
+        self._set_status(job['message_id'], 'retrying', error=error, next_attempt_in=round(delay, 3))
+        task = asyncio.create_task(self._retry_later(job, delay))
+        self._retry_tasks.add(task)
+        task.add_done_callback(self._retry_tasks.discard)
+
+    async def _retry_later(self, job, delay):
+        await asyncio.sleep(delay)
+        # Si la cola está llena se espera sitio: el reintento ya fue aceptado
+        await self._queue.put(job)
+
+    def _backoff(self, attempts):
+        delay = min(self.base_delay * (2 ** (attempts - 1)), self.max_delay)
+        return delay * random.uniform(0.5, 1.0)
+
+    def _set_status(self, message_id, state, **fields):
+        status = self._statuses.get(message_id)
+        if status is None:
+            status = {'message_id': message_id}
+            self._statuses[message_id] = status
+            while len(self._statuses) > self.max_statuses:
+                self._statuses.popitem(last=False)
+        status.update(fields)
+        status['status'] = state
+        status['updated_at'] = time.time()
@@ -0,0 +1,90 @@
+import threading
+import time
+from collections import OrderedDict
+
+try:
+    from ports.pending_verification_store_port import PendingVerificationStorePort
+except ImportError:
+    from ..ports.pending_verification_store_port import PendingVerificationStorePort
+
+
+class InMemoryPendingVerificationStore(PendingVerificationStorePort):
+    """Almacén en proceso con caducidad (TTL) y expulsión LRU al superar `max_size`.
+
+    Sólo sirve para un único proceso; con varios workers de gunicorn o varios
+    nodos hay que usar MongoPendingVerificationStore.
+    """
+
+    def __init__(self, max_size=10000, ttl_seconds=900):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def put(self, email, phone_number):
+        with self._lock:
+            self._entries[email] = (phone_number, time.monotonic() + self.ttl_seconds)
+            self._entries.move_to_end(email)
+            self._purge_expired()
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def get(self, email):
+        with self._lock:
+            entry = self._entries.get(email)
+            if entry is None:
+                self.misses += 1
+                return None
+            phone_number, expires_at = entry
+            if expires_at <= time.monotonic():
+                del self._entries[email]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(email)
+            self.hits += 1
+            return phone_number
+
+    def remove(self, email):
+        with self._lock:
+            return self._entries.pop(email, None) is not None
+
+    def _purge_expired(self):
+        # El orden LRU no es el de caducidad, pero las más antiguas por uso suelen
+        # ser también las más viejas: se revisa desde el principio hasta la primera vigente
+        now = time.monotonic()
+        while self._entries:
+            email, (_, expires_at) = next(iter(self._entries.items()))
+            if expires_at > now:
+                break
+            del self._entries[email]
+            self.expirations += 1
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'backend': 'memory',
+                'size': len(self._entries),
+                'max_size': self.max_size,
+                'ttl_seconds': self.ttl_seconds,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'expirations': self.expirations
+            }
+
+    def snapshot(self, limit=100):
+        now = time.monotonic()
+        with self._lock:
+            items = [(email, phone) for email, (phone, expires_at) in reversed(self._entries.items())
+                     if expires_at > now]
+        return dict(items[:limit])
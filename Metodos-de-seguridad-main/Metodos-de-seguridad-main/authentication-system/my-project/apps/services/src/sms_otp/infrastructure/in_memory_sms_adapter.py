@@ -0,0 +1,44 @@
+import threading
+
+from shared.structured_logging import get_logger
+
+try:
+    from ports.sms_service_port import SMSServicePort
+except ImportError:
+    from ..ports.sms_service_port import SMSServicePort
+
+log = get_logger('sms_otp.sms_memory')
+
+
+class InMemorySMSAdapter(SMSServicePort):
+    """Proveedor SMS falso para desarrollo y pruebas: no envía nada, guarda los mensajes.
+
+    Con `fail_times` los primeros N envíos fallan (para probar reintentos).
+    """
+
+    def __init__(self, fail_times=0):
+        self.fail_times = fail_times
+        self.messages = []
+        self.attempts = 0
+        self._lock = threading.Lock()
+
+    def send_otp(self, phone_number: str, otp: str) -> bool:
+        with self._lock:
+            self.attempts += 1
+            if self.attempts <= self.fail_times:
+                return False
+            self.messages.append({'phone_number': phone_number, 'otp': otp})
+        log.debug('sms_memory_sent', sample=1, phone_number=phone_number)
+        return True
+
+    def last_otp(self, phone_number):
+        with self._lock:
+            for message in reversed(self.messages):
+                if message['phone_number'] == phone_number:
+                    return message['otp']
+        return None
+
+    def clear(self):
+        with self._lock:
+            self.messages.clear()
+            self.attempts = 0
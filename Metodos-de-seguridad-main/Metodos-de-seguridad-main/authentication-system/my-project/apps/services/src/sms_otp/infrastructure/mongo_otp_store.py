@@ -0,0 +1,50 @@
+from datetime import datetime
+
+from shared.metrics import repository_timer, timed
+
+try:
+    from ports.otp_store_port import OTPStorePort
+except ImportError:
+    from ..ports.otp_store_port import OTPStorePort
+
+
+class MongoOTPStore(OTPStorePort):
+    """Un documento por código, escrito una sola vez.
+
+    La limpieza la hace el índice TTL sobre `expires_at` (ver
+    shared/mongo_indexes); la caducidad se comprueba en la propia consulta, así
+    que no depende de cuándo pase el monitor TTL. Las fechas se guardan en UTC.
+    """
+
+    def __init__(self, db, collection_name="otps"):
+        self.collection = db[collection_name]
+
+    @timed(repository_timer('sms_otp', 'save_code'))
+    def save_code(self, phone_number: str, otp: str, expires_at: datetime) -> None:
+        # Sólo vale el último código enviado a cada teléfono
+        self.collection.update_many(
+            {'phone_number': phone_number, 'used': False},
+            {'$set': {'used': True}}
+        )
+        self.collection.insert_one({
+            'phone_number': phone_number,
+            'otp': otp,
+            'expires_at': expires_at,
+            'created_at': datetime.now(expires_at.tzinfo),
+            'used': False
+        })
+
+    @timed(repository_timer('sms_otp', 'consume_code'))
+    def consume_code(self, phone_number: str, otp: str, now: datetime) -> bool:
+        # Comprobación y marca en un único find_one_and_update atómico
+        record = self.collection.find_one_and_update(
+            {
+                'phone_number': phone_number,
+                'otp': otp,
+                'used': False,
+                'expires_at': {'$gt': now}
+            },
+            {'$set': {'used': True, 'used_at': now}},
+            projection={'_id': 1}
+        )
+        return record is not None
@@ -0,0 +1,69 @@
+import threading
+from datetime import datetime, timedelta, timezone
+
+try:
+    from ports.pending_verification_store_port import PendingVerificationStorePort
+except ImportError:
+    from ..ports.pending_verification_store_port import PendingVerificationStorePort
+
+
+class MongoPendingVerificationStore(PendingVerificationStorePort):
+    """Almacén compartido entre workers y nodos: un documento por email (`_id`).
+
+    La caducidad se comprueba en cada lectura y el índice TTL sobre `expires_at`
+    (ver shared/mongo_indexes) borra las entradas vencidas. No hay expulsión
+    LRU: el tamaño lo acota el TTL.
+    """
+
+    def __init__(self, db, ttl_seconds=900, collection_name="pending_verifications"):
+        self.collection = db[collection_name]
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def put(self, email, phone_number):
+        now = datetime.now(timezone.utc)
+        self.collection.update_one(
+            {'_id': email},
+            {'$set': {'phone_number': phone_number, 'expires_at': now + timedelta(seconds=self.ttl_seconds)}},
+            upsert=True
+        )
+
+    def get(self, email):
+        entry = self.collection.find_one(
+            {'_id': email, 'expires_at': {'$gt': datetime.now(timezone.utc)}},
+            {'phone_number': 1}
+        )
+        with self._lock:
+            if entry is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+        return entry['phone_number']
+
+    def remove(self, email):
+        return self.collection.delete_one({'_id': email}).deleted_count > 0
+
+    def __len__(self):
+        return self.collection.count_documents({'expires_at': {'$gt': datetime.now(timezone.utc)}})
+
+    def stats(self):
+        with self._lock:
+            hits, misses = self.hits, self.misses
+        return {
+            'backend': 'mongo',
+            'size': len(self),
+            'ttl_seconds': self.ttl_seconds,
+            'hits': hits,
+            'misses': misses,
+            # Las expulsiones las hace el monitor TTL de MongoDB y no se cuentan aquí
+            'evictions': None,
+            'expirations': None
+        }
+
+    def snapshot(self, limit=100):
+        cursor = self.collection.find(
+            {'expires_at': {'$gt': datetime.now(timezone.utc)}}, {'phone_number': 1}
+        ).sort('expires_at', -1).limit(limit)
+        return {entry['_id']: entry['phone_number'] for entry in cursor}
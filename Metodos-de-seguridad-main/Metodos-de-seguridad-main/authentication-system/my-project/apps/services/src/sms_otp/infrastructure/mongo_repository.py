@@ -1,16 +1,19 @@
-from pymongo import MongoClient
 import os
 from dotenv import load_dotenv
 
 load_dotenv()
 
+from shared.mongo_connection import get_mongo_client, MONGO_DB_NAME
+from shared.metrics import repository_timer, timed
+
 class MongoDBUserRepository:
-    def __init__(self, uri="mongodb://localhost:27017", db_name="autentication"): # <-- CORREGIDO
-        self.client = MongoClient(uri)
+    def __init__(self, uri=None, db_name=MONGO_DB_NAME):
+        self.client = get_mongo_client(uri)
         self.db = self.client[db_name]
         self.collection = self.db["users"]
         print("✅ Conectado a MongoDB: otp_db.users")
 
+    @timed(repository_timer('sms_otp', 'save_user'))
     def save_user(self, email, user_data):
         """Guarda o actualiza un usuario"""
         result = self.collection.update_one(
@@ -20,10 +23,12 @@ class MongoDBUserRepository:
         )
         return result.upserted_id or result.modified_count > 0
 
+    @timed(repository_timer('sms_otp', 'get_user'))
     def get_user(self, email):
         """Obtiene un usuario por email"""
         return self.collection.find_one({'email': email})
 
+    @timed(repository_timer('sms_otp', 'update_user'))
     def update_user(self, email, updates):
         """Actualiza un usuario"""
         result = self.collection.update_one(
@@ -32,6 +37,7 @@ class MongoDBUserRepository:
         )
         return result.modified_count > 0
 
+    @timed(repository_timer('sms_otp', 'user_exists'))
     def user_exists(self, email):
         """Verifica si un usuario existe"""
         return self.collection.count_documents({'email': email}) > 0
\ No newline at end of file
@@ -0,0 +1,140 @@
+import os
+import random
+import threading
+import time
+
+try:
+    from infrastructure.in_memory_sms_adapter import InMemorySMSAdapter
+except ImportError:
+    from .in_memory_sms_adapter import InMemorySMSAdapter
+
+
+class SMSThrottledError(Exception):
+    """Respuesta 429 simulada del proveedor; la cola de envíos respeta retry_after"""
+
+    def __init__(self, retry_after):
+        super().__init__(f"Proveedor SMS limitando envíos (reintentar en {retry_after}s)")
+        self.retry_after = retry_after
+
+
+class SMSGatewayError(Exception):
+    """Error 5xx simulado del proveedor"""
+
+
+def parse_latency(spec):
+    """"lognormal:median_ms=120,sigma=0.6" -> ('lognormal', {'median_ms': 120.0, 'sigma': 0.6})"""
+    name, _, params = spec.partition(':')
+    options = {}
+    for pair in filter(None, params.split(',')):
+        key, _, value = pair.partition('=')
+        options[key.strip()] = float(value)
+    return name.strip(), options
+
+
+class SimulatedSMSGateway(InMemorySMSAdapter):
+    """Proveedor SMS simulado para pruebas de carga, sin credenciales ni red.
+
+    Cada envío espera una latencia sacada de la distribución configurada y
+    puede fallar (`error_rate`) o ser limitado (`throttle_rate`, lanza
+    SMSThrottledError). Los mensajes entregados quedan en `messages` como en
+    InMemorySMSAdapter. Con `max_per_second` además se limita el caudal real.
+
+    Distribuciones: fixed(ms), uniform(min_ms, max_ms), normal(mean_ms, std_ms),
+    lognormal(median_ms, sigma), exponential(mean_ms).
+    """
+
+    def __init__(self, latency="fixed:ms=0", error_rate=0.0, throttle_rate=0.0,
+                 throttle_retry_after=1.0, max_per_second=None, seed=None):
+        super().__init__()
+        self.latency_name, self.latency_options = parse_latency(latency) if isinstance(latency, str) else latency
+        self.error_rate = error_rate
+        self.throttle_rate = throttle_rate
+        self.throttle_retry_after = throttle_retry_after
+        self.max_per_second = max_per_second
+        self._rng = random.Random(seed)
+        self._rng_lock = threading.Lock()
+        self._window_start = time.monotonic()
+        self._window_count = 0
+
+        self.errors = 0
+        self.throttled = 0
+
+    @classmethod
+    def from_env(cls):
+        max_per_second = os.environ.get("SMS_SIM_MAX_PER_SECOND")
+        return cls(
+            latency=os.environ.get("SMS_SIM_LATENCY", "lognormal:median_ms=120,sigma=0.5"),
+            error_rate=float(os.environ.get("SMS_SIM_ERROR_RATE", 0.0)),
+            throttle_rate=float(os.environ.get("SMS_SIM_THROTTLE_RATE", 0.0)),
+            throttle_retry_after=float(os.environ.get("SMS_SIM_THROTTLE_RETRY_AFTER", 1.0)),
+            max_per_second=float(max_per_second) if max_per_second else None,
+            seed=int(os.environ["SMS_SIM_SEED"]) if os.environ.get("SMS_SIM_SEED") else None
+        )
+
+    def sample_latency(self):
+        """Latencia en segundos según la distribución configurada"""
+        o = self.latency_options
+        with self._rng_lock:
+            if self.latency_name == 'fixed':
+                ms = o.get('ms', 0.0)
+            elif self.latency_name == 'uniform':
+                ms = self._rng.uniform(o.get('min_ms', 0.0), o.get('max_ms', 100.0))
+            elif self.latency_name == 'normal':
+                ms = self._rng.gauss(o.get('mean_ms', 100.0), o.get('std_ms', 20.0))
+            elif self.latency_name == 'lognormal':
+                ms = o.get('median_ms', 100.0) * self._rng.lognormvariate(0.0, o.get('sigma', 0.5))
+            elif self.latency_name == 'exponential':
+                ms = self._rng.expovariate(1.0 / o.get('mean_ms', 100.0))
+            else:
+                raise ValueError(f"Distribución de latencia desconocida: {self.latency_name}")
+        return max(ms, 0.0) / 1000.0
+
+    def _roll(self):
+        with self._rng_lock:
+            return self._rng.random()
+
+    def _over_rate_limit(self):
+        if not self.max_per_second:
+            return False
+        with self._lock:
+            now = time.monotonic()
+            if now - self._window_start >= 1.0:
+                self._window_start = now
+                self._window_count = 0
+            self._window_count += 1
+            return self._window_count > self.max_per_second
+
+    def send_otp(self, phone_number: str, otp: str) -> bool:
+        time.sleep(self._start_send())
+        return self._complete_send(phone_number, otp)
+
+    # El envío síncrono y el asíncrono (AsyncSimulatedSMSGateway) sólo se
+    # diferencian en cómo esperan la latencia devuelta por _start_send
+
+    def _start_send(self):
+        with self._lock:
+            self.attempts += 1
+        return self.sample_latency()
+
+    def _complete_send(self, phone_number, otp):
+        if self._over_rate_limit() or self._roll() < self.throttle_rate:
+            with self._lock:
+                self.throttled += 1
+            raise SMSThrottledError(self.throttle_retry_after)
+        if self._roll() < self.error_rate:
+            with self._lock:
+                self.errors += 1
+            raise SMSGatewayError("Error simulado del proveedor SMS (503)")
+
+        with self._lock:
+            self.messages.append({'phone_number': phone_number, 'otp': otp, 'sent_at': time.time()})
+        return True
+
+    def stats(self):
+        with self._lock:
+            return {
+                'latency': f"{self.latency_name}:{self.latency_options}",
+                'delivered': len(self.messages),
+                'errors': self.errors,
+                'throttled': self.throttled
+            }
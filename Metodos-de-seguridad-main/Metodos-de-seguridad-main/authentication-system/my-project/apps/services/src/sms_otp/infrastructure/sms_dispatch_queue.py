@@ -0,0 +1,241 @@
+import heapq
+import queue
+import random
+import threading
+import time
+import uuid
+from collections import OrderedDict, deque
+
+from shared.metrics import outcome, stage_timer
+
+try:
+    from ports.sms_service_port import SMSServicePort
+except ImportError:
+    from ..ports.sms_service_port import SMSServicePort
+
+# Un intento por observación; los reintentos cuentan aparte
+SMS_SEND = stage_timer('sms_otp', 'sms_send')
+SMS_SENT = outcome('sms_otp', 'sms', 'sent')
+SMS_RETRIED = outcome('sms_otp', 'sms', 'retried')
+SMS_FAILED = outcome('sms_otp', 'sms', 'failed')
+
+
+class SMSQueueFullError(Exception):
+    """La cola de envíos está llena (el controlador responde 503)"""
+
+
+def mask_phone(phone_number):
+    """+34600123456 -> +34*****3456 (para estados y dead letters)"""
+    if not phone_number or len(phone_number) <= 7:
+        return phone_number
+    return phone_number[:3] + '*' * (len(phone_number) - 7) + phone_number[-4:]
+
+
+class SMSDispatchQueue:
+    """Cola de envíos SMS con un pool acotado de hilos.
+
+    Los endpoints encolan el mensaje y responden enseguida; los workers llaman
+    al proveedor (`SMSServicePort`). Un envío fallido se reintenta con backoff
+    exponencial con jitter hasta `max_attempts`; después pasa a la lista de
+    dead letters. El estado de cada mensaje se puede consultar por id mientras
+    no salga del histórico (`max_statuses` entradas más recientes).
+    """
+
+    def __init__(self, sms_service: SMSServicePort, workers=4, max_queue=1000, max_attempts=4,
+                 base_delay=0.5, max_delay=30.0, max_statuses=10000, max_dead_letters=1000):
+        self.sms_service = sms_service
+        self.workers = workers
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.max_statuses = max_statuses
+
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._retries = []
+        self._retry_cond = threading.Condition()
+        self._lock = threading.Lock()
+        self._statuses = OrderedDict()
+        self.dead_letters = deque(maxlen=max_dead_letters)
+        self._threads = []
+        self._stopping = threading.Event()
+
+        self.enqueued = 0
+        self.sent = 0
+        self.failed = 0
+        self.retried = 0
+        self.rejected = 0
+        self.in_flight = 0
+
+    def start(self):
+        if self._threads:
+            return self
+        self._stopping.clear()
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._work, name=f"sms-dispatch-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        scheduler = threading.Thread(target=self._schedule_retries, name="sms-dispatch-retries", daemon=True)
+        scheduler.start()
+        self._threads.append(scheduler)
+        return self
+
+    def stop(self, timeout=5):
+        """Deja de aceptar reintentos y espera a que se vacíe la cola"""
+        deadline = time.time() + timeout
+        while self._queue.unfinished_tasks and time.time() < deadline:
+            time.sleep(0.05)
+        self._stopping.set()
+        with self._retry_cond:
+            self._retry_cond.notify_all()
+        for _ in range(self.workers):
+            try:
+                self._queue.put_nowait(None)
+            except queue.Full:
+                break
+        for thread in self._threads:
+            thread.join(timeout=max(deadline - time.time(), 0.1))
+        self._threads = []
+
+    # --- API -------------------------------------------------------------
+
+    def enqueue(self, phone_number, otp, before_send=None):
+        """Encola un envío y devuelve su message_id. `before_send()` (opcional) se
+        ejecuta en el worker justo antes del primer envío"""
+        message_id = uuid.uuid4().hex
+        job = {'message_id': message_id, 'phone_number': phone_number, 'otp': otp, 'attempts': 0,
+               'before_send': before_send}
+        self._set_status(message_id, 'queued', phone=mask_phone(phone_number), attempts=0)
+        try:
+            self._queue.put_nowait(job)
+        except queue.Full:
+            with self._lock:
+                self.rejected += 1
+                self._statuses.pop(message_id, None)
+            raise SMSQueueFullError("Cola de SMS llena. Intenta de nuevo.")
+        with self._lock:
+            self.enqueued += 1
+        return message_id
+
+    def status(self, message_id):
+        with self._lock:
+            status = self._statuses.get(message_id)
+            return dict(status) if status else None
+
+    def stats(self):
+        with self._lock:
+            return {
+                'workers': self.workers,
+                'queued': self._queue.qsize(),
+                'scheduled_retries': len(self._retries),
+                'in_flight': self.in_flight,
+                'enqueued': self.enqueued,
+                'sent': self.sent,
+                'failed': self.failed,
+                'retried': self.retried,
+                'rejected': self.rejected,
+                'dead_letters': len(self.dead_letters)
+            }
+
+    # --- workers ---------------------------------------------------------
+
+    def _work(self):
+        while True:
+            job = self._queue.get()
+            if job is None:
+                self._queue.task_done()
+                return
+            try:
+                self._attempt(job)
+            finally:
+                self._queue.task_done()
+
+    def _attempt(self, job):
+        job['attempts'] += 1
+        with self._lock:
+            self.in_flight += 1
+        self._set_status(job['message_id'], 'sending', attempts=job['attempts'], next_attempt_in=None)
+
+        error = None
+        retry_after = 0
+        try:
+            if job.get('before_send') is not None:
+                # p. ej. guardar el OTP: sólo una vez, y se reintenta como el envío si falla
+                job['before_send']()
+                job['before_send'] = None
+            with SMS_SEND.time():
+                delivered = self.sms_service.send_otp(job['phone_number'], job['otp'])
+            if not delivered:
+                error = "El proveedor SMS rechazó el envío"
+        except Exception as e:
+            error = str(e)
+            # p. ej. un 429 del proveedor que indica cuándo reintentar
+            retry_after = getattr(e, 'retry_after', 0) or 0
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+
+        if error is None:
+            with self._lock:
+                self.sent += 1
+            SMS_SENT.inc()
+            self._set_status(job['message_id'], 'sent', error=None)
+            return
+
+        if job['attempts'] >= self.max_attempts or self._stopping.is_set():
+            with self._lock:
+                self.failed += 1
+            SMS_FAILED.inc()
+            self._set_status(job['message_id'], 'failed', error=error)
+            self.dead_letters.append({
+                'message_id': job['message_id'],
+                'phone': mask_phone(job['phone_number']),
+                'attempts': job['attempts'],
+                'error': error,
+                'failed_at': time.time()
+            })
+            return
+
+        delay = max(self._backoff(job['attempts']), retry_after)
+        with self._lock:
+            self.retried += 1
+        SMS_RETRIED.inc()
+        self._set_status(job['message_id'], 'retrying', error=error, next_attempt_in=round(delay, 3))
+        with self._retry_cond:
+            heapq.heappush(self._retries, (time.time() + delay, job['message_id'], job))
+            self._retry_cond.notify()
+
+    def _backoff(self, attempts):
+        delay = min(self.base_delay * (2 ** (attempts - 1)), self.max_delay)
+        # jitter para que los reintentos de un corte del proveedor no lleguen todos juntos
+        return delay * random.uniform(0.5, 1.0)
+
+    def _schedule_retries(self):
+        """Devuelve a la cola los reintentos cuyo backoff ha vencido"""
+        with self._retry_cond:
+            while not self._stopping.is_set():
+                if not self._retries:
+                    self._retry_cond.wait()
+                    continue
+                due_at = self._retries[0][0]
+                wait = due_at - time.time()
+                if wait > 0:
+                    self._retry_cond.wait(wait)
+                    continue
+                _, _, job = heapq.heappop(self._retries)
+                try:
+                    self._queue.put_nowait(job)
+                except queue.Full:
+                    # Cola llena: se pospone en lugar de bloquear al planificador
+                    heapq.heappush(self._retries, (time.time() + self.base_delay, job['message_id'], job))
+
+    def _set_status(self, message_id, state, **fields):
+        with self._lock:
+            status = self._statuses.get(message_id)
+            if status is None:
+                status = {'message_id': message_id}
+                self._statuses[message_id] = status
+                while len(self._statuses) > self.max_statuses:
+                    self._statuses.popitem(last=False)
+            status.update(fields)
+            status['status'] = state
+            status['updated_at'] = time.time()
@@ -2,45 +2,38 @@ from twilio.rest import Client
 import os
 from dotenv import load_dotenv
 
+from shared.structured_logging import get_logger
+
 load_dotenv()
 
+log = get_logger('sms_otp.twilio')
+
 class TwilioSMSAdapter:
     def __init__(self):
         self.account_sid = os.getenv('TWILIO_ACCOUNT_SID', 'XXXXXXXXXXXXXXXXXXXXXXXX')
         self.auth_token = os.getenv('TWILIO_AUTH_TOKEN', 'XXXXXXXXXXXXXXXXXXXXX')
         self.phone_number = os.getenv('TWILIO_FROM_NUMBER', 'XXXXXXXXXXXXXXXXXXXXX')
         
-        print(f"🔧 Twilio Config:")
-        print(f"   Account SID: {self.account_sid}")
-        print(f"   Auth Token: {self.auth_token[:10]}...")
-        print(f"   Phone: {self.phone_number}")
-        
         if not all([self.account_sid, self.auth_token, self.phone_number]):
-            print("❌ FALTAN CREDENCIALES DE TWILIO")
+            log.error('twilio_missing_credentials')
             self.client = None
             return
         
         try:
             self.client = Client(self.account_sid, self.auth_token)
-            print("✅ Cliente Twilio inicializado correctamente")
-        except Exception as e:
-            print(f"❌ Error inicializando Twilio: {e}")
+            log.info('twilio_configured', account_sid=self.account_sid[:6] + '...', from_number=self.phone_number)
+        except Exception:
+            log.exception('twilio_init_failed')
             self.client = None
 
     def send_otp(self, phone_number: str, otp: str) -> bool:
         try:
             if not self.client:
-                print("❌ Cliente Twilio no disponible")
+                log.error('twilio_unavailable')
                 return False
                 
-            print("=" * 50)
-            print("📤 ENVIANDO SMS CON TWILIO:")
-            print(f"   FROM: {self.phone_number}")
-            print(f"   TO: {phone_number}")
-            print(f"   OTP: {otp}")
-            print("=" * 50)
-            
             if not self._is_valid_phone_number(phone_number):
+                log.warning('sms_invalid_phone', to_number=phone_number)
                 return False
             
             # ENVIAR SMS - VERSIÓN SIMPLIFICADA Y SEGURA
@@ -50,17 +43,13 @@ class TwilioSMSAdapter:
                 to=phone_number
             )
             
-            print(f"✅ SMS ENVIADO EXITOSAMENTE!")
-            print(f"   SID: {message.sid}")
-            print(f"   Status: {message.status}")
-            print("=" * 50)
+            log.info('twilio_sms_sent', to_number=phone_number, sid=message.sid, status=message.status)
             
             # RETORNAR TRUE SI SE ENVIÓ CORRECTAMENTE
             return True
             
         except Exception as e:
-            print(f"❌ ERROR ENVIANDO SMS: {e}")
-            print("=" * 50)
+            log.warning('twilio_sms_failed', to_number=phone_number, error=str(e))
             return False
     
     def _is_valid_phone_number(self, phone_number):
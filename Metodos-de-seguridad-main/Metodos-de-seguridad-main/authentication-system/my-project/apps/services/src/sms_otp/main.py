@@ -1,3 +1,4 @@
+import atexit
 import sys
 import os
 import secrets
@@ -6,36 +7,103 @@ from flask_cors import CORS
 
 current_dir = os.path.dirname(os.path.abspath(__file__))
 sys.path.insert(0, current_dir)
+# src/ para los módulos compartidos entre servicios (shared/)
+sys.path.append(os.path.dirname(current_dir))
 
 try:
     from application.sms_otp_usecases import SendOTPUseCase, VerifyOTPUseCase
-    from infrastructure.twilio_sms_adapter import TwilioSMSAdapter
     from infrastructure.mongo_repository import MongoDBUserRepository
+    from infrastructure.mongo_otp_store import MongoOTPStore
+    from infrastructure.sms_dispatch_queue import SMSDispatchQueue, SMSQueueFullError
+    from infrastructure.in_memory_sms_adapter import InMemorySMSAdapter
+    from infrastructure.simulated_sms_gateway import SimulatedSMSGateway
+    from infrastructure.in_memory_pending_store import InMemoryPendingVerificationStore
+    from infrastructure.mongo_pending_store import MongoPendingVerificationStore
+    from shared.metrics import install_metrics
+    from shared.mongo_connection import pool_stats
+    from shared.mongo_indexes import ensure_indexes_once
+    from shared.rate_limiter import RateLimiter, build_backend, install_rate_limiter, RATE_LIMIT_ENABLED
+    from shared.structured_logging import get_logger
+    from adapters.http.http_config import ALLOWED_ORIGINS, RATE_LIMIT_RULES
     print("✅ Módulos importados correctamente")
 except ImportError as e:
     print(f"❌ Error importando módulos: {e}")
     exit(1)
 
+log = get_logger('sms_otp.routes')
+
 app = Flask(__name__)
 app.secret_key = secrets.token_hex(32)
 
 # Configuración CORS completa
 CORS(app, resources={
     r"/*": {
-        "origins": ["http://127.0.0.1:5500", "http://localhost:5500"],
+        "origins": ALLOWED_ORIGINS,
         "methods": ["GET", "POST", "PUT", "DELETE", "OPTIONS"],
         "allow_headers": ["Content-Type", "Authorization"],
         "supports_credentials": True
     }
 })
+# GET /metrics (Prometheus) y latencia por endpoint
+install_metrics(app, 'sms_otp')
+
+def build_sms_service():
+    """SMS_PROVIDER: "twilio" (por defecto), "memory" (proveedor falso local) o
+    "simulated" (latencias y errores configurables con SMS_SIM_*, para pruebas de carga)"""
+    provider = os.environ.get("SMS_PROVIDER", "twilio")
+    if provider == "memory":
+        return InMemorySMSAdapter()
+    if provider == "simulated":
+        return SimulatedSMSGateway.from_env()
+    from infrastructure.twilio_sms_adapter import TwilioSMSAdapter
+    return TwilioSMSAdapter()
+
+def build_dispatch_queue(sms_service):
+    """SMS_DISPATCH_WORKERS=0 desactiva la cola y el SMS se envía dentro de la petición"""
+    workers = int(os.environ.get("SMS_DISPATCH_WORKERS", 4))
+    if workers <= 0:
+        return None
+    return SMSDispatchQueue(
+        sms_service,
+        workers=workers,
+        max_queue=int(os.environ.get("SMS_DISPATCH_QUEUE", 1000)),
+        max_attempts=int(os.environ.get("SMS_DISPATCH_MAX_ATTEMPTS", 4)),
+        base_delay=float(os.environ.get("SMS_DISPATCH_BASE_DELAY", 0.5))
+    ).start()
+
+def build_pending_store(db):
+    """PENDING_STORE: "memory" (un solo proceso) o "mongo" (varios workers o nodos)"""
+    ttl_seconds = int(os.environ.get("PENDING_TTL_SECONDS", 900))
+    if os.environ.get("PENDING_STORE", "memory") == "mongo":
+        return MongoPendingVerificationStore(db, ttl_seconds=ttl_seconds)
+    return InMemoryPendingVerificationStore(
+        max_size=int(os.environ.get("PENDING_MAX_SIZE", 10000)),
+        ttl_seconds=ttl_seconds
+    )
+
+def busy_response(e):
+    response = jsonify({'error': str(e)})
+    response.headers['Retry-After'] = '1'
+    return response, 503
 
 # INICIALIZAR MONGODB
 print("🔄 Conectando a MongoDB...")
 try:
     mongo_repo = MongoDBUserRepository()
-    sms_service = TwilioSMSAdapter()
-    send_otp_use_case = SendOTPUseCase(sms_service, mongo_repo)
-    verify_otp_use_case = VerifyOTPUseCase(mongo_repo)
+    sms_service = build_sms_service()
+    dispatch_queue = build_dispatch_queue(sms_service)
+    if dispatch_queue is not None:
+        atexit.register(dispatch_queue.stop)
+    otp_store = MongoOTPStore(mongo_repo.db)
+    send_otp_use_case = SendOTPUseCase(sms_service, otp_store, dispatch_queue)
+    verify_otp_use_case = VerifyOTPUseCase(otp_store)
+    # Verificaciones en curso (email -> teléfono), con caducidad y tamaño acotado
+    pending_verifications = build_pending_store(mongo_repo.db)
+    # Limitador de envíos y verificaciones (RATE_LIMIT_ENABLED=0 lo desactiva)
+    rate_limiter = None
+    if RATE_LIMIT_ENABLED:
+        rate_limiter = install_rate_limiter(app, RateLimiter(build_backend(mongo_repo.db), RATE_LIMIT_RULES))
+    ensure_indexes_once(mongo_repo.db)
     print("✅ MongoDB y servicios inicializados correctamente")
 except Exception as e:
     print(f"❌ Error crítico: {e}")
@@ -45,21 +113,6 @@ except Exception as e:
 from adapters.http.flask_controller import init_routes
 init_routes(app, mongo_repo)
 
-# INICIALIZAR MONGODB
-print("🔄 Conectando a MongoDB...")
-try:
-    mongo_repo = MongoDBUserRepository()
-    sms_service = TwilioSMSAdapter()
-    send_otp_use_case = SendOTPUseCase(sms_service, mongo_repo)
-    verify_otp_use_case = VerifyOTPUseCase(mongo_repo)
-    print("✅ MongoDB y servicios inicializados correctamente")
-except Exception as e:
-    print(f"❌ Error crítico: {e}")
-    exit(1)
-
-# Solo pending_verifications en memoria (sesiones activas)
-pending_verifications = {}
-
 @app.route('/health', methods=['GET'])
 def health_check():
     users_count = mongo_repo.collection.count_documents({})
@@ -68,9 +121,24 @@ def health_check():
         'service': 'SMS OTP Service',
         'mongo_connected': True,
         'total_users': users_count,
-        'pending_sessions': len(pending_verifications)
+        'pending_sessions': len(pending_verifications),
+        'pending_store': pending_verifications.stats(),
+        'rate_limiter': rate_limiter.stats() if rate_limiter is not None else None,
+        'mongo_pool': pool_stats(),
+        'sms_dispatch': dispatch_queue.stats() if dispatch_queue is not None else None,
+        'sms_provider': sms_service.stats() if hasattr(sms_service, 'stats') else None
     }), 200
 
+@app.route('/sms-status/<message_id>', methods=['GET'])
+def sms_status(message_id):
+    """Estado de entrega de un SMS encolado: queued, sending, retrying, sent o failed"""
+    if dispatch_queue is None:
+        return jsonify({'error': 'SMS dispatch queue disabled'}), 404
+    status = dispatch_queue.status(message_id)
+    if status is None:
+        return jsonify({'error': 'Unknown message id'}), 404
+    return jsonify(status), 200
+
 @app.route('/register', methods=['POST', 'OPTIONS'])
 def register():
     if request.method == "OPTIONS":
@@ -78,11 +146,7 @@ def register():
     
     try:
         data = request.get_json()
-        print("=" * 50)
-        print("📝 REGISTRO - Datos recibidos:")
-        print(f"   Email: {data.get('email')}")
-        print(f"   Teléfono: {data.get('phone_number')}")
-        print("=" * 50)
+        log.info('register', email=data.get('email'), phone_number=data.get('phone_number'))
         
         email = data.get('email')
         password = data.get('password')
@@ -115,31 +179,32 @@ def register():
         if not success:
             return jsonify({'error': 'Failed to save user'}), 500
         
-        print(f"✅ Usuario guardado en MongoDB: {email}")
+        log.info('user_registered', email=email, auth_method=auth_method)
         
         # Si es SMS, enviar OTP INMEDIATAMENTE
         if auth_method == 'sms':
-            print(f"📤 ENVIANDO OTP a: {phone_number}")
-            otp_sent = send_otp_use_case.execute(phone_number)
+            message_id = send_otp_use_case.dispatch(phone_number)
+            otp_sent = message_id is not None
             
             if otp_sent:
                 # Guardar en sesión y pending_verifications
-                pending_verifications[email] = phone_number
+                pending_verifications.put(email, phone_number)
                 session['email'] = email
                 session['phone_number'] = phone_number
                 session['pending_2fa'] = True
                 
-                print(f"✅ OTP enviado exitosamente a {phone_number}")
+                log.info('otp_dispatched', email=email, message_id=message_id)
                 
                 return jsonify({
                     'success': True,
                     'message': 'User registered. OTP sent to phone.',
                     'requires_otp': True,  # ✅ IMPORTANTE
                     'auth_method': 'sms',
-                    'email': email
+                    'email': email,
+                    'message_id': message_id
                 }), 200
             else:
-                print("❌ Falló el envío de OTP")
+                log.warning('otp_dispatch_failed', email=email)
                 return jsonify({'error': 'Failed to send OTP'}), 500
         
         # Para TOTP
@@ -149,8 +214,10 @@ def register():
             'requires_qr': True
         }), 200
         
+    except SMSQueueFullError as e:
+        return busy_response(e)
     except Exception as e:
-        print(f"❌ Error in register: {e}")
+        log.exception('request_failed', route='register')
         return jsonify({'error': str(e)}), 500
 
 @app.route('/login', methods=['POST', 'OPTIONS'])
@@ -160,10 +227,7 @@ def login():
     
     try:
         data = request.get_json()
-        print("=" * 50)
-        print("🔐 LOGIN - Datos recibidos:")
-        print(f"   Email: {data.get('email')}")
-        print("=" * 50)
+        log.info('login', email=data.get('email'))
         
         email = data.get('email')
         password = data.get('password')
@@ -184,27 +248,28 @@ def login():
         session['phone_number'] = user['phone_number']
         session['pending_2fa'] = True
         
-        print(f"✅ Login exitoso para: {email}")
+        log.info('login_ok', email=email, auth_method=user['auth_method'])
         
         if user['auth_method'] == 'sms':
             phone_number = user['phone_number']
-            print(f"📤 ENVIANDO OTP a: {phone_number}")
             
-            success = send_otp_use_case.execute(phone_number)
+            message_id = send_otp_use_case.dispatch(phone_number)
+            success = message_id is not None
             
             if success:
-                pending_verifications[email] = phone_number
-                print(f"✅ OTP enviado exitosamente")
+                pending_verifications.put(email, phone_number)
+                log.info('otp_dispatched', email=email, message_id=message_id)
                 
                 return jsonify({
                     'success': True,
                     'requires_otp': True,  # ✅ IMPORTANTE
                     'auth_method': 'sms',
                     'message': 'OTP sent to your phone',
-                    'email': email
+                    'email': email,
+                    'message_id': message_id
                 }), 200
             else:
-                print("❌ Falló el envío de OTP")
+                log.warning('otp_dispatch_failed', email=email)
                 return jsonify({'error': 'Failed to send OTP'}), 500
         
         return jsonify({
@@ -213,8 +278,10 @@ def login():
             'auth_method': 'totp'
         }), 200
         
+    except SMSQueueFullError as e:
+        return busy_response(e)
     except Exception as e:
-        print(f"❌ Error in login: {e}")
+        log.exception('request_failed', route='login')
         return jsonify({'error': str(e)}), 500
 
 @app.route('/resend-otp', methods=['POST', 'OPTIONS'])
@@ -224,11 +291,7 @@ def resend_otp():
     
     try:
         data = request.get_json()
-        print("=" * 50)
-        print("🔄 RESEND OTP - Datos recibidos:")
-        print(f"   Email en body: {data.get('email')}")
-        print(f"   Email en sesión: {session.get('email')}")
-        print("=" * 50)
+        log.info('resend_otp', email=data.get('email'), session_email=session.get('email'))
         
         # BUSCAR EMAIL EN BODY O SESIÓN
         email = data.get('email') or session.get('email')
@@ -236,38 +299,39 @@ def resend_otp():
         if not email:
             return jsonify({'error': 'Email is required'}), 400
         
-        print(f"🔍 Buscando teléfono para: {email}")
         
         # BUSCAR PHONE_NUMBER
         phone_number = None
         
         # 1. Buscar en pending_verifications (sesión activa)
-        if email in pending_verifications:
-            phone_number = pending_verifications[email]
-            print(f"📱 Teléfono encontrado en pending: {phone_number}")
+        phone_number = pending_verifications.get(email)
+        if phone_number:
+            log.debug('phone_lookup', email=email, source='pending')
         # 2. Buscar en MONGODB (usuario registrado)
         else:
             user = mongo_repo.get_user(email)
             if user and user.get('phone_number'):
                 phone_number = user['phone_number']
-                pending_verifications[email] = phone_number  # Agregar a sesión activa
-                print(f"📱 Teléfono encontrado en MongoDB: {phone_number}")
+                pending_verifications.put(email, phone_number)  # Agregar a sesión activa
+                log.debug('phone_lookup', email=email, source='mongo')
             else:
-                print(f"❌ Usuario no encontrado en MongoDB: {email}")
+                log.warning('phone_lookup_failed', email=email)
                 return jsonify({'error': 'No pending verification found for this email'}), 400
         
-        print(f"📤 REENVIANDO OTP a: {phone_number}")
-        success = send_otp_use_case.execute(phone_number)
+        message_id = send_otp_use_case.dispatch(phone_number)
+        success = message_id is not None
         
         if success:
-            print(f"✅ OTP reenviado exitosamente")
-            return jsonify({'message': 'OTP resent successfully'}), 200
+            log.info('otp_dispatched', email=email, message_id=message_id)
+            return jsonify({'message': 'OTP resent successfully', 'message_id': message_id}), 200
         else:
-            print(f"❌ Falló el reenvío de OTP")
+            log.warning('otp_dispatch_failed', email=email)
             return jsonify({'error': 'Failed to resend OTP'}), 500
             
+    except SMSQueueFullError as e:
+        return busy_response(e)
     except Exception as e:
-        print(f"❌ Error in resend_otp: {e}")
+        log.exception('request_failed', route='resend_otp')
         return jsonify({'error': str(e)}), 500
 
 @app.route('/verify-otp', methods=['POST', 'OPTIONS'])
@@ -277,13 +341,7 @@ def verify_otp():
     
     try:
         data = request.get_json()
-        print("=" * 50)
-        print("🔍 VERIFICACIÓN OTP:")
-        print(f"   OTP recibido: {data.get('otp')}")
-        print(f"   Email recibido en body: {data.get('email')}")
-        print(f"   Email en sesión: {session.get('email')}")
-        print(f"   Datos completos recibidos: {data}")
-        print("=" * 50)
+        log.info('verify_otp', email=data.get('email'), session_email=session.get('email'))
         
         otp = data.get('otp')
         email_from_body = data.get('email')  # ✅ CORREGIDO: Leer email del body
@@ -296,7 +354,7 @@ def verify_otp():
         email = email_from_body or email_from_session
         
         if not email:
-            print("❌ No se pudo obtener email ni del body ni de la sesión")
+            log.warning('verify_otp_no_email')
             return jsonify({'error': 'No active session. Please login again.'}), 400
         
         # Obtener phone_number de la sesión o MongoDB
@@ -307,12 +365,11 @@ def verify_otp():
             if user and user.get('phone_number'):
                 phone_number = user['phone_number']
                 session['phone_number'] = phone_number
-                print(f"📱 Teléfono recuperado de MongoDB: {phone_number}")
+                log.debug('phone_lookup', email=email, source='mongo')
             else:
-                print(f"❌ No se encontró teléfono para el usuario: {email}")
+                log.warning('phone_lookup_failed', email=email)
                 return jsonify({'error': 'No phone number found'}), 400
         
-        print(f"🔐 Verificando OTP: {otp} para teléfono: {phone_number}, email: {email}")
         is_valid = verify_otp_use_case.execute(phone_number, otp)
         
         if is_valid:
@@ -323,24 +380,23 @@ def verify_otp():
             session['authenticated'] = True
             
             # Limpiar sesión activa
-            if email in pending_verifications:
-                del pending_verifications[email]
+            pending_verifications.remove(email)
             
-            print("✅ OTP verificado exitosamente")
+            log.info('verify_otp_ok', email=email)
             return jsonify({
                 'valid': True,
                 'message': 'OTP verified successfully',
                 'email': email
             }), 200
         else:
-            print("❌ OTP inválido o expirado")
+            log.info('verify_otp_rejected', email=email)
             return jsonify({
                 'valid': False,
                 'error': 'Invalid or expired OTP'
             }), 400
             
     except Exception as e:
-        print(f"❌ Error in verify_otp: {e}")
+        log.exception('request_failed', route='verify_otp')
         return jsonify({'error': str(e)}), 500
 
 @app.route('/debug', methods=['GET'])
@@ -348,7 +404,8 @@ def debug():
     users_from_mongo = list(mongo_repo.collection.find({}, {'password': 0}))
     return jsonify({
         'mongo_users': [user['email'] for user in users_from_mongo],
-        'pending_verifications': pending_verifications,
+        'pending_verifications': pending_verifications.snapshot(),
+        'pending_store': pending_verifications.stats(),
         'session': dict(session),
         'total_users': len(users_from_mongo)
     }), 200
@@ -360,32 +417,32 @@ def send_otp():
     
     try:
         data = request.get_json()
-        print("=" * 50)
-        print("📤 SEND OTP - Datos recibidos:")
-        print(f"   Teléfono: {data.get('phone_number')}")
-        print("=" * 50)
+        log.info('send_otp', phone_number=data.get('phone_number'))
         
         phone_number = data.get('phone_number')
         
         if not phone_number:
             return jsonify({'error': 'Phone number is required'}), 400
         
-        print(f"📤 ENVIANDO OTP a: {phone_number}")
-        success = send_otp_use_case.execute(phone_number)
+        message_id = send_otp_use_case.dispatch(phone_number)
+        success = message_id is not None
         
         if success:
-            print(f"✅ OTP enviado exitosamente a {phone_number}")
+            log.info('otp_dispatched', phone_number=phone_number, message_id=message_id)
             return jsonify({
                 'success': True,
                 'message': 'OTP sent successfully',
-                'phone_number': phone_number
+                'phone_number': phone_number,
+                'message_id': message_id
             }), 200
         else:
-            print("❌ Falló el envío de OTP")
+            log.warning('otp_dispatch_failed', phone_number=phone_number)
             return jsonify({'error': 'Failed to send OTP'}), 500
             
+    except SMSQueueFullError as e:
+        return busy_response(e)
     except Exception as e:
-        print(f"❌ Error in send_otp: {e}")
+        log.exception('request_failed', route='send_otp')
         return jsonify({'error': str(e)}), 500
 
 @app.route('/sms-login', methods=['POST', 'OPTIONS'])
@@ -395,10 +452,7 @@ def sms_login():
     
     try:
         data = request.get_json()
-        print("=" * 50)
-        print("📱 SMS LOGIN - Datos recibidos:")
-        print(f"   Teléfono: {data.get('phone_number')}")
-        print("=" * 50)
+        log.info('sms_login', phone_number=data.get('phone_number'))
         
         phone_number = data.get('phone_number')
         
@@ -415,7 +469,6 @@ def sms_login():
             }), 404
         
         email = user['email']
-        print(f"✅ Usuario encontrado: {email}")
         
         # CONFIGURAR SESIÓN ESPECÍFICA PARA SMS LOGIN
         session.clear()  # Limpiar sesión anterior
@@ -426,31 +479,33 @@ def sms_login():
         session['sms_login'] = True  # ✅ Bandera específica para SMS login
         
         # Agregar a pending_verifications
-        pending_verifications[email] = phone_number
+        pending_verifications.put(email, phone_number)
         
-        print(f"💾 Sesión SMS-LOGIN configurada para: {email}")
-        print(f"📱 Datos de sesión: {dict(session)}")
+        log.debug('sms_session_created', email=email, sms_login=True)
         
         # ENVIAR OTP
-        print(f"📤 ENVIANDO OTP a: {phone_number}")
-        success = send_otp_use_case.execute(phone_number)
+        message_id = send_otp_use_case.dispatch(phone_number)
+        success = message_id is not None
         
         if success:
-            print(f"✅ OTP enviado exitosamente")
+            log.info('otp_dispatched', email=email, message_id=message_id)
             return jsonify({
                 'success': True,
                 'message': 'OTP sent successfully',
                 'phone_number': phone_number,
                 'email': email,
                 'requires_otp': True,
-                'auth_method': 'sms'
+                'auth_method': 'sms',
+                'message_id': message_id
             }), 200
         else:
-            print("❌ Falló el envío de OTP")
+            log.warning('otp_dispatch_failed', phone_number=phone_number)
             return jsonify({'error': 'Failed to send OTP'}), 500
             
+    except SMSQueueFullError as e:
+        return busy_response(e)
     except Exception as e:
-        print(f"❌ Error in sms_login: {e}")
+        log.exception('request_failed', route='sms_login')
         return jsonify({'error': str(e)}), 500
     
     # ✅ NUEVOS ENDPOINTS PARA LOGIN NORMAL + SMS
@@ -461,10 +516,7 @@ def get_user_by_email():
     
     try:
         data = request.get_json()
-        print("=" * 50)
-        print("🔍 GET USER BY EMAIL:")
-        print(f"   Email: {data.get('email')}")
-        print("=" * 50)
+        log.info('get_user_by_email', email=data.get('email'))
         
         email = data.get('email')
         
@@ -477,7 +529,6 @@ def get_user_by_email():
         if not user:
             return jsonify({'error': 'User not found'}), 404
         
-        print(f"✅ Usuario encontrado: {user['email']}")
         return jsonify({
             'email': user['email'],
             'phone_number': user.get('phone_number'),
@@ -485,7 +536,7 @@ def get_user_by_email():
         }), 200
             
     except Exception as e:
-        print(f"❌ Error in get_user_by_email: {e}")
+        log.exception('request_failed', route='get_user_by_email')
         return jsonify({'error': str(e)}), 500
 
 @app.route('/create-sms-session', methods=['POST', 'OPTIONS'])
@@ -495,11 +546,7 @@ def create_sms_session():
     
     try:
         data = request.get_json()
-        print("=" * 50)
-        print("📱 CREATE SMS SESSION:")
-        print(f"   Email: {data.get('email')}")
-        print(f"   Teléfono: {data.get('phone_number')}")
-        print("=" * 50)
+        log.info('create_sms_session', email=data.get('email'), phone_number=data.get('phone_number'))
         
         email = data.get('email')
         phone_number = data.get('phone_number')
@@ -516,31 +563,33 @@ def create_sms_session():
         session['sms_login'] = True
         
         # Agregar a pending_verifications
-        pending_verifications[email] = phone_number
+        pending_verifications.put(email, phone_number)
         
-        print(f"💾 Sesión SMS creada para: {email}")
-        print(f"📱 Datos de sesión: {dict(session)}")
+        log.debug('sms_session_created', email=email, sms_login=True)
         
         # ✅ IMPORTANTE: GENERAR Y ENVIAR OTP
-        print(f"📤 GENERANDO OTP para: {phone_number}")
-        success = send_otp_use_case.execute(phone_number)
+        message_id = send_otp_use_case.dispatch(phone_number)
+        success = message_id is not None
         
         if success:
-            print(f"✅ OTP generado y enviado exitosamente")
+            log.info('otp_dispatched', email=email, message_id=message_id)
             return jsonify({
                 'success': True,
                 'message': 'SMS session created and OTP sent',
-                'email': email
+                'email': email,
+                'message_id': message_id
             }), 200
         else:
-            print(f"❌ Error generando OTP")
+            log.warning('otp_dispatch_failed', email=email)
             return jsonify({
                 'success': False,
                 'error': 'Failed to generate OTP'
             }), 500
             
+    except SMSQueueFullError as e:
+        return busy_response(e)
     except Exception as e:
-        print(f"❌ Error in create_sms_session: {e}")
+        log.exception('request_failed', route='create_sms_session')
         return jsonify({'error': str(e)}), 500
     
 if __name__ == '__main__':
@@ -554,6 +603,7 @@ if __name__ == '__main__':
     print("   - POST /verify-otp")
     print("   - POST /resend-otp")
     print("   - GET  /health")
+    print("   - GET  /sms-status/<message_id>")
     print("   - GET  /debug")
     print("   - POST /send-otp")
     print("   - POST /sms-login")
@@ -0,0 +1,17 @@
+from abc import ABC, abstractmethod
+from datetime import datetime
+
+
+class AsyncOTPStorePort(ABC):
+    """OTPStorePort con operaciones asíncronas (mismo contrato)"""
+
+    @abstractmethod
+    async def save_code(self, phone_number: str, otp: str, expires_at: datetime) -> None:
+        """Guarda un código nuevo e invalida los pendientes del mismo teléfono"""
+        pass
+
+    @abstractmethod
+    async def consume_code(self, phone_number: str, otp: str, now: datetime) -> bool:
+        """Marca el código como usado si existe, no está usado y no ha expirado.
+        Debe ser atómico: dos verificaciones concurrentes no pueden tener éxito ambas"""
+        pass
@@ -0,0 +1,31 @@
+from abc import ABC, abstractmethod
+
+
+class AsyncPendingVerificationStorePort(ABC):
+    """PendingVerificationStorePort con operaciones asíncronas (email -> teléfono)"""
+
+    @abstractmethod
+    async def put(self, email: str, phone_number: str) -> None:
+        pass
+
+    @abstractmethod
+    async def get(self, email: str):
+        """Teléfono pendiente para el email, o None si no hay o ha expirado"""
+        pass
+
+    @abstractmethod
+    async def remove(self, email: str) -> bool:
+        pass
+
+    @abstractmethod
+    async def count(self) -> int:
+        pass
+
+    @abstractmethod
+    async def stats(self) -> dict:
+        pass
+
+    @abstractmethod
+    async def snapshot(self, limit: int = 100) -> dict:
+        """Muestra de entradas vigentes para /debug"""
+        pass
@@ -0,0 +1,8 @@
+from abc import ABC, abstractmethod
+
+class AsyncSMSServicePort(ABC):
+    """SMSServicePort para el servicio asyncio: el envío no bloquea el bucle"""
+
+    @abstractmethod
+    async def send_otp(self, phone_number: str, otp: str) -> bool:
+        pass
@@ -0,0 +1,15 @@
+from abc import ABC, abstractmethod
+from datetime import datetime
+
+
+class OTPStorePort(ABC):
+    @abstractmethod
+    def save_code(self, phone_number: str, otp: str, expires_at: datetime) -> None:
+        """Guarda un código nuevo e invalida los pendientes del mismo teléfono"""
+        pass
+
+    @abstractmethod
+    def consume_code(self, phone_number: str, otp: str, now: datetime) -> bool:
+        """Marca el código como usado si existe, no está usado y no ha expirado.
+        Debe ser atómico: dos verificaciones concurrentes no pueden tener éxito ambas"""
+        pass
@@ -0,0 +1,31 @@
+from abc import ABC, abstractmethod
+
+
+class PendingVerificationStorePort(ABC):
+    """Verificaciones SMS en curso: email -> teléfono al que se envió el OTP"""
+
+    @abstractmethod
+    def put(self, email: str, phone_number: str) -> None:
+        pass
+
+    @abstractmethod
+    def get(self, email: str):
+        """Teléfono pendiente para el email, o None si no hay o ha expirado"""
+        pass
+
+    @abstractmethod
+    def remove(self, email: str) -> bool:
+        pass
+
+    @abstractmethod
+    def __len__(self) -> int:
+        pass
+
+    @abstractmethod
+    def stats(self) -> dict:
+        pass
+
+    @abstractmethod
+    def snapshot(self, limit: int = 100) -> dict:
+        """Muestra de entradas vigentes para /debug"""
+        pass
@@ -0,0 +1,10 @@
+import os
+import sys
+
+# sms_otp se importa como paquete desde src/ (sus módulos caen en los imports
+# relativos), así que no choca con los módulos sin paquete de totp y faceid
+src_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+if src_dir not in sys.path:
+    sys.path.insert(0, src_dir)
+
+os.environ.setdefault("LOG_LEVEL", "OFF")
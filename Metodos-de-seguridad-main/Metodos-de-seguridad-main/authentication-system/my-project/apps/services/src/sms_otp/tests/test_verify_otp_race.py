@@ -0,0 +1,84 @@
+"""Un OTP verificado varias veces a la vez se acepta exactamente una vez.
+
+mongomock no es seguro entre hilos: SerializedCollection ejecuta cada operación
+de la colección bajo un cerrojo, que es la garantía de MongoDB (cada operación
+sobre un documento es atómica) y nada más. La verificación sólo es correcta si
+comprobar y consumir el código es una única operación (find_one_and_update);
+con find_one seguido de update_one varios hilos lo darían por bueno.
+"""
+import threading
+import uuid
+from datetime import datetime, timedelta, timezone
+
+import mongomock
+import pytest
+
+from sms_otp.application.sms_otp_usecases import VerifyOTPUseCase
+from sms_otp.infrastructure.mongo_otp_store import MongoOTPStore
+
+PARALLEL = 8
+ROUNDS = 50
+
+
+class SerializedCollection:
+    """Colección de mongomock con una operación a la vez"""
+
+    def __init__(self, collection):
+        self._collection = collection
+        self._lock = threading.Lock()
+
+    def __getattr__(self, name):
+        attr = getattr(self._collection, name)
+        if not callable(attr):
+            return attr
+
+        def call(*args, **kwargs):
+            with self._lock:
+                return attr(*args, **kwargs)
+        return call
+
+
+@pytest.fixture
+def store():
+    db = mongomock.MongoClient(tz_aware=True)[f"sms_race_{uuid.uuid4().hex}"]
+    store = MongoOTPStore(db)
+    store.collection = SerializedCollection(store.collection)
+    return store
+
+
+def race(store, phone_number, otp):
+    barrier = threading.Barrier(PARALLEL)
+    results = []
+    lock = threading.Lock()
+
+    def verify():
+        # Un caso de uso por hilo, como peticiones en workers distintos
+        use_case = VerifyOTPUseCase(store)
+        barrier.wait()
+        ok = use_case.execute(phone_number, otp)
+        with lock:
+            results.append(ok)
+
+    threads = [threading.Thread(target=verify) for _ in range(PARALLEL)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+def test_concurrent_verifications_accept_otp_once(store):
+    for i in range(ROUNDS):
+        phone_number = f"+3460000{i:04d}"
+        store.save_code(phone_number, '123456', datetime.now(timezone.utc) + timedelta(minutes=5))
+
+        results = race(store, phone_number, '123456')
+
+        assert results.count(True) == 1, f"ronda {i}: {results}"
+        assert not VerifyOTPUseCase(store).execute(phone_number, '123456')
+
+
+def test_expired_otp_is_never_accepted(store):
+    store.save_code('+34600009999', '654321', datetime.now(timezone.utc) - timedelta(seconds=1))
+
+    assert race(store, '+34600009999', '654321').count(True) == 0
@@ -1,12 +1,29 @@
+import hmac
+import io
+import json
 import os
 from flask import Flask, Response, request, jsonify, session, make_response
+from pymongo.errors import DuplicateKeyError
 from application.generate_qr_usecase import GenerateQRUseCase
 from application.validate_otp_usecase import ValidateOTPUseCase
 from application.register_user_usecase import RegisterUserUseCase
+from application.bulk_provision_usecase import BulkProvisionUseCase
 from adapters.http.qr_generator_adapter import QRGeneratorAdapter
 from infraestructure.mongo_user_repository import MongoUserRepository
+from infraestructure.totp_verifier_cache import TOTPVerifierCache
+from infraestructure.totp_replay_guard import TOTPReplayGuard
+from infraestructure.qr_image_cache import QRImageCache
+from infraestructure.qr_batch_renderer import QRBatchRenderer
+from ports.qr_service_port import QR_FORMATS
+from ports.user_repository_port import DuplicateEmailError
+from shared.metrics import gauge, install_metrics
+from shared.mongo_connection import pool_stats
+from shared.rate_limiter import RateLimiter, rule, build_backend, install_rate_limiter, RATE_LIMIT_ENABLED, SLIDING_WINDOW
+from shared.structured_logging import get_logger
 from flask_cors import CORS
 
+log = get_logger('totp.routes')
+
 app = Flask(__name__)
 app.config["SECRET_KEY"] = os.environ.get("FLASK_SECRET_KEY", "clave-local-segura")
 
@@ -16,11 +33,35 @@ app.config["SESSION_COOKIE_SECURE"] = False
 
 CORS(app, supports_credentials=True,
      resources={r"/*": {"origins": "http://127.0.0.1:5500"}})
+# GET /metrics (Prometheus) y latencia por endpoint
+install_metrics(app, 'totp')
 
 user_repo = MongoUserRepository()
 qr_adapter = QRGeneratorAdapter()
-generate_qr_usecase = GenerateQRUseCase(qr_adapter)
-register_usecase = RegisterUserUseCase(user_repo)
+qr_cache = QRImageCache.from_env(qr_adapter)
+generate_qr_usecase = GenerateQRUseCase(qr_adapter, qr_cache)
+verifier_cache = TOTPVerifierCache.from_env(user_repo)
+replay_guard = TOTPReplayGuard.from_env(user_repo)
+register_usecase = RegisterUserUseCase(user_repo, verifier_cache, replay_guard)
+validate_usecase = ValidateOTPUseCase(verifier_cache, replay_guard)
+bulk_provision_usecase = BulkProvisionUseCase(user_repo, verifier_cache, replay_guard)
+qr_batch_renderer = QRBatchRenderer.from_env()
+gauge('totp_qr_cache_entries', 'Imágenes QR en la caché').set_function(lambda: qr_cache.stats()['size'])
+# Sin token configurado el alta masiva está desactivada (puede regenerar secretos)
+PROVISIONING_TOKEN = os.environ.get("TOTP_PROVISIONING_TOKEN")
+# Máximo de usuarios por petición de alta masiva: secretos y QR se generan en el
+# hilo de la petición (los lotes mayores se trocean en el cliente)
+PROVISIONING_MAX_USERS = int(os.environ.get("TOTP_PROVISIONING_MAX_USERS", 1000))
+
+RATE_LIMIT_RULES = [
+    rule('totp_validate_email', ['/validate'], 'email', limit=10, window_seconds=300, algorithm=SLIDING_WINDOW),
+    rule('totp_validate_ip', ['/validate'], 'ip', limit=60, window_seconds=300, algorithm=SLIDING_WINDOW),
+    rule('totp_login_email', ['/login'], 'email', limit=10, window_seconds=300),
+    rule('totp_auth_ip', ['/login', '/register'], 'ip', limit=30, window_seconds=60),
+]
+rate_limiter = None
+if RATE_LIMIT_ENABLED:
+    rate_limiter = install_rate_limiter(app, RateLimiter(build_backend(user_repo.db), RATE_LIMIT_RULES))
 
 @app.route('/register', methods=['POST'])
 def register():
@@ -54,12 +95,19 @@ def register():
                 "phone_number": phone_number,
                 "secret": None
             })
+            verifier_cache.invalidate(email)
             session['email'] = email
             session['first_name'] = first_name
             session['auth_method'] = 'sms'
             session['phone_number'] = phone_number
             return jsonify({'message': 'Registro exitoso', 'requires_otp': True}), 200
+    except (DuplicateEmailError, DuplicateKeyError):
+        # DuplicateKeyError: el alta SMS inserta directamente en la colección
+        return jsonify({'error': 'El email ya está registrado'}), 409
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
+        log.exception('request_failed', route='register')
         return jsonify({'error': str(e)}), 500
 
 
@@ -115,11 +163,25 @@ def qr():
     if not email:
         return jsonify({'error': 'No hay sesión activa'}), 401
 
-    secret = user_repo.get_secret_by_email(email)
-    if not secret:
+    fmt = request.args.get('format', 'png')
+    if fmt not in QR_FORMATS:
+        return jsonify({'error': 'Formato no soportado', 'formats': list(QR_FORMATS)}), 400
+
+    # El verificador en caché ya tiene el secreto: sin find_one en cada /qr
+    verifier = verifier_cache.get(email)
+    if verifier is None:
         return jsonify({'error': 'Usuario no registrado'}), 404
-    img_bytes = generate_qr_usecase.execute(secret, email, 'MyApp')
-    return Response(img_bytes, mimetype='image/png')
+
+    etag = generate_qr_usecase.etag(verifier.secret, email, 'MyApp', fmt)
+    if request.if_none_match.contains(etag):
+        response = Response(status=304)
+    else:
+        image = generate_qr_usecase.render(verifier.secret, email, 'MyApp', fmt)
+        response = Response(image.body, mimetype=image.mimetype)
+    response.set_etag(etag)
+    # La imagen contiene el secreto TOTP: sólo la caché del navegador, revalidando siempre
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return response
 
 @app.route('/validate', methods=['POST'])
 def validate():
@@ -133,16 +195,58 @@ def validate():
     if not code or len(code) != 6:
         return jsonify({'valid': False, 'error': 'Código inválido'}), 400
 
-    secret = user_repo.get_secret_by_email(email)
-    if not secret:
+    is_valid = validate_usecase.execute(email, code)
+    if is_valid is None:
         return jsonify({'valid': False, 'error': 'Usuario no registrado'}), 404
-
-    validate_usecase = ValidateOTPUseCase(secret)
-    is_valid = validate_usecase.execute(code)
     return jsonify({'valid': is_valid})
 
+@app.route('/provision/batch', methods=['POST'])
+def provision_batch():
+    """Alta masiva TOTP: JSON {"users": [...], "overwrite": false, "qr": "zip"|"ndjson", "format": "png"}
+    o NDJSON (un usuario por línea, opciones en la query string)"""
+    token = request.headers.get('X-Provisioning-Token', '')
+    if not PROVISIONING_TOKEN or not hmac.compare_digest(token, PROVISIONING_TOKEN):
+        return jsonify({'error': 'No autorizado'}), 403
+
+    if request.mimetype in ('application/x-ndjson', 'application/jsonl'):
+        try:
+            records = [json.loads(line) for line in request.get_data(as_text=True).splitlines() if line.strip()]
+        except json.JSONDecodeError as e:
+            return jsonify({'error': f'NDJSON inválido: {e}'}), 400
+        options = request.args
+    else:
+        data = request.get_json(silent=True) or {}
+        records = data.get('users') if isinstance(data, dict) else data
+        options = data if isinstance(data, dict) else request.args
+
+    if not isinstance(records, list) or not records:
+        return jsonify({'error': 'Se requiere una lista de usuarios'}), 400
+    if len(records) > PROVISIONING_MAX_USERS:
+        return jsonify({'error': f'El lote supera el máximo de {PROVISIONING_MAX_USERS} usuarios'}), 413
+    qr_output = options.get('qr')
+    fmt = options.get('format', 'png')
+    if qr_output not in (None, 'zip', 'ndjson') or fmt not in QR_FORMATS:
+        return jsonify({'error': 'Opciones de QR no soportadas', 'qr': ['zip', 'ndjson'], 'formats': list(QR_FORMATS)}), 400
+    overwrite = str(options.get('overwrite', 'false')).lower() in ('1', 'true')
+
+    report = bulk_provision_usecase.execute(records, overwrite=overwrite)
+    if qr_output is None:
+        return jsonify(report), 200
+
+    qr_batch_renderer.render_report(report, fmt)
+    if qr_output == 'ndjson':
+        return Response(qr_batch_renderer.iter_ndjson(report), mimetype='application/x-ndjson')
+    buffer = io.BytesIO()
+    qr_batch_renderer.write_zip(report, buffer, fmt)
+    response = Response(buffer.getvalue(), mimetype='application/zip')
+    response.headers['Content-Disposition'] = 'attachment; filename="totp_provisioning.zip"'
+    return response
+
 @app.after_request
 def add_no_cache_headers(response):
+    if response.headers.get('ETag'):
+        # Respuestas con ETag (/qr) se revalidan con If-None-Match en lugar de no guardarse
+        return response
     response.headers['Cache-Control'] = 'no-store, no-cache, must-revalidate, max-age=0'
     response.headers['Pragma'] = 'no-cache'
     response.headers['Expires'] = '0'
@@ -160,6 +264,18 @@ def logout():
 def session_check():
     return jsonify({"logged_in": bool(session.get('email'))})
 
+@app.route('/health', methods=['GET'])
+def health():
+    return jsonify({
+        'status': 'OK',
+        'service': 'TOTP Service',
+        'mongo_pool': pool_stats(),
+        'verifier_cache': verifier_cache.stats(),
+        'qr_cache': qr_cache.stats(),
+        'replay_guard': replay_guard.stats() if replay_guard is not None else None,
+        'rate_limiter': rate_limiter.stats() if rate_limiter is not None else None
+    }), 200
+
 @app.route('/ping-db')
 def ping_db():
     try:
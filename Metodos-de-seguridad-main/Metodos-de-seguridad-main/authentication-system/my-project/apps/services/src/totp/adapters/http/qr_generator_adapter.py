@@ -1,12 +1,70 @@
+import os
 import qrcode
 from qrcode.image.pil import PilImage
 from io import BytesIO
-from ports.qr_service_port import QRServicePort
+from PIL import Image
+from ports.qr_service_port import QRServicePort, QR_FORMATS
+
+QR_SMALL_BOX_SIZE = int(os.environ.get("QR_SMALL_BOX_SIZE", 4))
+# Máscara fija para png-small y svg: evaluar las 8 máscaras es lo más caro de
+# construir la matriz y cualquier lector decodifica cualquiera de ellas
+QR_MASK_PATTERN = int(os.environ.get("QR_MASK_PATTERN", 0))
 
 class QRGeneratorAdapter(QRServicePort):
+    def __init__(self, small_box_size=QR_SMALL_BOX_SIZE, border=4, mask_pattern=QR_MASK_PATTERN):
+        self.small_box_size = small_box_size
+        self.border = border
+        self.mask_pattern = mask_pattern
+        self.signature = f"box={small_box_size},border={border},mask={mask_pattern}"
+
     def generate_qr_image(self, uri: str) -> bytes:
         buffer = BytesIO()
         img = qrcode.make(uri, image_factory=PilImage)
         img.save(buffer, format="PNG")
         buffer.seek(0)
-        return buffer.getvalue()
\ No newline at end of file
+        return buffer.getvalue()
+
+    def render(self, uri: str, fmt: str) -> bytes:
+        if fmt == 'png':
+            return self.generate_qr_image(uri)
+        if fmt == 'png-small':
+            return self.generate_qr_small_png(uri)
+        if fmt == 'svg':
+            return self.generate_qr_svg(uri)
+        raise ValueError(f"Formato de QR no soportado: {fmt} (válidos: {', '.join(QR_FORMATS)})")
+
+    def generate_qr_small_png(self, uri: str) -> bytes:
+        """PNG en blanco y negro de 1 bit con `small_box_size` px por módulo (~500 bytes)"""
+        matrix = self._matrix(uri)
+        size = len(matrix)
+        img = Image.new('1', (size, size))
+        img.putdata([0 if dark else 1 for row in matrix for dark in row])
+        img = img.resize((size * self.small_box_size, size * self.small_box_size), Image.NEAREST)
+        buffer = BytesIO()
+        img.save(buffer, format="PNG", optimize=True)
+        return buffer.getvalue()
+
+    def generate_qr_svg(self, uri: str) -> bytes:
+        """SVG escalable con un único path (un rectángulo por tramo de módulos oscuros)"""
+        matrix = self._matrix(uri)
+        size = len(matrix)
+        parts = []
+        for y, row in enumerate(matrix):
+            x = 0
+            while x < size:
+                if not row[x]:
+                    x += 1
+                    continue
+                start = x
+                while x < size and row[x]:
+                    x += 1
+                parts.append(f"M{start} {y}h{x - start}v1h-{x - start}z")
+        return (f'<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 {size} {size}" '
+                f'shape-rendering="crispEdges"><rect width="{size}" height="{size}" fill="#fff"/>'
+                f'<path d="{"".join(parts)}" fill="#000"/></svg>').encode()
+
+    def _matrix(self, uri):
+        qr = qrcode.QRCode(border=self.border, mask_pattern=self.mask_pattern)
+        qr.add_data(uri)
+        qr.make(fit=True)
+        return qr.get_matrix()
@@ -0,0 +1,95 @@
+import time
+
+from domain.otp_generator import OTPGenerator
+from ports.user_repository_port import UserRepositoryPort
+
+class BulkProvisionUseCase:
+    """Alta o migración masiva a TOTP: genera los secretos y escribe por bloques
+    con bulk_write no ordenado. Informa del resultado de cada usuario."""
+
+    def __init__(self, user_repository: UserRepositoryPort, verifier_cache=None, replay_guard=None,
+                 chunk_size=1000, issuer_name="Mi App"):
+        self.user_repository = user_repository
+        self.verifier_cache = verifier_cache
+        self.replay_guard = replay_guard
+        self.chunk_size = chunk_size
+        self.issuer_name = issuer_name
+
+    def execute(self, records, overwrite=False):
+        """records: dicts con email y, para usuarios nuevos, password y first_name.
+        Con overwrite=True se regenera el secreto de quien ya tenía TOTP."""
+        start = time.perf_counter()
+        records = list(records)
+        results = [{'index': i, 'email': r.get('email') if isinstance(r, dict) else None, 'success': False}
+                   for i, r in enumerate(records)]
+
+        # 1. Validación y duplicados dentro del propio lote
+        candidates = []
+        seen = set()
+        for i, record in enumerate(records):
+            email = record.get('email') if isinstance(record, dict) else None
+            if not email:
+                results[i]['error'] = 'Email requerido'
+            elif not isinstance(email, str):
+                # Listas o dicts no son hashables y un número acabaría como usuario
+                results[i]['email'] = None
+                results[i]['error'] = 'Email inválido'
+            elif email in seen:
+                results[i]['error'] = 'Email duplicado en el lote'
+            else:
+                seen.add(email)
+                candidates.append((i, record))
+
+        # 2. Qué usuarios existen y cuáles ya tienen TOTP, en una sola consulta
+        status = self.user_repository.find_totp_status(seen) if seen else {}
+        to_write = []
+        for i, record in candidates:
+            email = record['email']
+            existing = email in status
+            if existing and status[email] and not overwrite:
+                results[i]['error'] = 'El usuario ya tiene TOTP configurado'
+            elif not existing and not record.get('password'):
+                results[i]['error'] = 'Contraseña requerida para usuarios nuevos'
+            else:
+                otp = OTPGenerator(secret=None)
+                to_write.append((i, {
+                    'email': email,
+                    'secret': otp.secret,
+                    'password': record.get('password'),
+                    'first_name': record.get('first_name'),
+                    'existing': existing
+                }, otp.generate_uri(email, self.issuer_name)))
+
+        # 3. Escritura por bloques
+        write_start = time.perf_counter()
+        for offset in range(0, len(to_write), self.chunk_size):
+            chunk = to_write[offset:offset + self.chunk_size]
+            errors = self.user_repository.provision_users_bulk([user for _, user, _ in chunk])
+            for (i, user, uri), error in zip(chunk, errors):
+                if error:
+                    results[i]['error'] = error
+                    continue
+                results[i]['success'] = True
+                results[i]['action'] = 'updated' if user['existing'] else 'created'
+                results[i]['otp_uri'] = uri
+                if self.verifier_cache is not None:
+                    self.verifier_cache.invalidate(user['email'])
+                if self.replay_guard is not None:
+                    self.replay_guard.forget(user['email'])
+        write_seconds = time.perf_counter() - write_start
+
+        elapsed = time.perf_counter() - start
+        succeeded = sum(1 for r in results if r['success'])
+        return {
+            'results': results,
+            'stats': {
+                'total': len(records),
+                'succeeded': succeeded,
+                'failed': len(records) - succeeded,
+                'created': sum(1 for r in results if r.get('action') == 'created'),
+                'updated': sum(1 for r in results if r.get('action') == 'updated'),
+                'elapsed_s': round(elapsed, 3),
+                'write_s': round(write_seconds, 3),
+                'records_per_s': round(len(records) / elapsed, 2) if elapsed > 0 else None
+            }
+        }
@@ -1,10 +1,31 @@
 from domain.otp_generator import OTPGenerator
+from ports.qr_service_port import QRImage, QR_FORMATS, qr_etag
+from shared.metrics import stage_timer
+
+# Incluye los aciertos de la caché de imágenes (cuestan microsegundos)
+QR_RENDER = stage_timer('totp', 'qr_render')
 
 class GenerateQRUseCase:
-    def __init__(self, qr_service):
+    def __init__(self, qr_service, image_cache=None):
         self.qr_service = qr_service
+        self.image_cache = image_cache
 
     def execute(self, secret, email, issuer):
-        otp = OTPGenerator(secret=secret)
-        uri = otp.generate_uri(usr_email=email,issuer_name=issuer)
-        return self.qr_service.generate_qr_image(uri)
\ No newline at end of file
+        with QR_RENDER.time():
+            return self.qr_service.generate_qr_image(self._uri(secret, email, issuer))
+
+    def etag(self, secret, email, issuer, fmt="png"):
+        """ETag de la imagen sin renderizarla (para responder 304)"""
+        return qr_etag(self._uri(secret, email, issuer), fmt, self.qr_service.signature)
+
+    def render(self, secret, email, issuer, fmt="png"):
+        """QRImage(body, mimetype, etag) en el formato pedido, desde la caché si la hay"""
+        uri = self._uri(secret, email, issuer)
+        with QR_RENDER.time():
+            if self.image_cache is not None:
+                return self.image_cache.get(uri, fmt)
+            return QRImage(self.qr_service.render(uri, fmt), QR_FORMATS[fmt],
+                           qr_etag(uri, fmt, self.qr_service.signature))
+
+    def _uri(self, secret, email, issuer):
+        return OTPGenerator(secret=secret).generate_uri(usr_email=email, issuer_name=issuer)
@@ -1,12 +1,19 @@
 from domain.otp_generator import OTPGenerator
 
 class RegisterUserUseCase:
-    def __init__(self, user_repository):
+    def __init__(self, user_repository, verifier_cache=None, replay_guard=None):
         self.user_repository = user_repository
+        self.verifier_cache = verifier_cache
+        self.replay_guard = replay_guard
 
     def execute(self, email, password,first_name, issuer_name="Mi App"):
         otp = OTPGenerator(secret=None)
-        secret = otp.generate_secret()
+        # El secreto guardado tiene que ser el mismo que va en la URI del QR
+        secret = otp.secret
         uri = otp.generate_uri(email, issuer_name)
         self.user_repository.save_user(email, secret, password, first_name)
-        return uri
\ No newline at end of file
+        if self.verifier_cache is not None:
+            self.verifier_cache.invalidate(email)
+        if self.replay_guard is not None:
+            self.replay_guard.forget(email)
+        return uri
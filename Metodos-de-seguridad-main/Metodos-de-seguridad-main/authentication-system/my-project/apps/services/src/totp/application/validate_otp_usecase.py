@@ -1,9 +1,41 @@
-from domain.otp_generator import OTPGenerator
+from shared.metrics import outcome, stage_timer
+from shared.structured_logging import get_logger
+
+log = get_logger('totp.validate')
+
+SECRET_LOOKUP = stage_timer('totp', 'secret_lookup')
+VERIFY = stage_timer('totp', 'verify')
+REPLAY_CHECK = stage_timer('totp', 'replay_check')
+VALID = outcome('totp', 'validate', 'valid')
+INVALID = outcome('totp', 'validate', 'invalid')
+REPLAY = outcome('totp', 'validate', 'replay')
+UNKNOWN_USER = outcome('totp', 'validate', 'unknown_user')
+
 
 class ValidateOTPUseCase:
-    def __init__(self, secret):
-        self.secret = secret
+    def __init__(self, verifier_cache, replay_guard=None):
+        self.verifier_cache = verifier_cache
+        self.replay_guard = replay_guard
 
-    def execute(self, code: str) -> bool:
-        otp = OTPGenerator(secret=self.secret)
-        return otp.verify_code(code)
\ No newline at end of file
+    def execute(self, email: str, code: str):
+        """True/False según el código, o None si el usuario no tiene TOTP registrado"""
+        with SECRET_LOOKUP.time():
+            verifier = self.verifier_cache.get(email)
+        if verifier is None:
+            UNKNOWN_USER.inc()
+            return None
+        with VERIFY.time():
+            step = verifier.match_step(code)
+        if step is None:
+            INVALID.inc()
+            return False
+        # Un código sólo se acepta una vez (ni siquiera dentro de su ventana de 30 s)
+        if self.replay_guard is not None:
+            with REPLAY_CHECK.time():
+                accepted = self.replay_guard.accept(email, step)
+            if not accepted:
+                REPLAY.inc()
+                log.warning('totp_replay_rejected', email=email, step=step)
+                return False
+        VALID.inc()
+        return True
@@ -0,0 +1,62 @@
+"""Renderizados de QR por segundo y tamaño de la respuesta para cada formato de /qr.
+
+Modos:
+  - png:        qrcode.make + PilImage (el renderizador de siempre, 10 px por módulo)
+  - png-small:  PNG de 1 bit con QR_SMALL_BOX_SIZE px por módulo y máscara fija
+  - svg:        un único path SVG con máscara fija
+  - caché:      QRImageCache con la imagen ya generada (lo normal tras el primer /qr)
+
+Cada iteración usa una URI distinta (--users secretos) para que los modos sin
+caché no se beneficien de nada; el modo caché recorre las mismas URIs ya calientes.
+
+Uso (desde totp/):
+    python benchmarks/bench_qr_render.py --seconds 3
+"""
+import argparse
+import os
+import sys
+import time
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(current_dir))
+
+import pyotp
+
+from adapters.http.qr_generator_adapter import QRGeneratorAdapter
+from infraestructure.qr_image_cache import QRImageCache
+from ports.qr_service_port import QR_FORMATS
+
+
+def run(name, render, uris, seconds):
+    count = 0
+    size = 0
+    start = time.perf_counter()
+    while time.perf_counter() - start < seconds:
+        size = len(render(uris[count % len(uris)]))
+        count += 1
+    elapsed = time.perf_counter() - start
+    print(f"{name:<22} {count / elapsed:12,.1f} renders/s  {size:7,} bytes")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--users', type=int, default=200)
+    parser.add_argument('--seconds', type=float, default=2.0, help="duración de cada modo")
+    args = parser.parse_args()
+
+    uris = [pyotp.TOTP(pyotp.random_base32()).provisioning_uri(f"user{i}@example.com", "MyApp")
+            for i in range(args.users)]
+    adapter = QRGeneratorAdapter()
+
+    for fmt in QR_FORMATS:
+        run(fmt, lambda uri, fmt=fmt: adapter.render(uri, fmt), uris, args.seconds)
+
+    cache = QRImageCache(adapter, max_entries=args.users * len(QR_FORMATS))
+    for uri in uris:
+        cache.get(uri, 'png')
+    run("png (caché)", lambda uri: cache.get(uri, 'png').body, uris, args.seconds)
+    print(f"caché: {cache.stats()}")
+
+
+if __name__ == '__main__':
+    main()
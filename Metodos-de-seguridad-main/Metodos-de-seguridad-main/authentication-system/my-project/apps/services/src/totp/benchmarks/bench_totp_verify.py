@@ -0,0 +1,88 @@
+"""Microbenchmark de verificaciones TOTP por segundo.
+
+Compara:
+  - antes: find_one + ValidateOTPUseCase + OTPGenerator + pyotp.TOTP por petición
+  - TOTPVerifier recién creado en cada llamada (sin caché)
+  - ValidateOTPUseCase con TOTPVerifierCache (caso normal de /validate)
+
+El repositorio es un diccionario en memoria (--lookup-us simula la latencia
+del find_one en microsegundos) para medir sólo la parte de CPU.
+
+Uso (desde totp/):
+    python benchmarks/bench_totp_verify.py --users 1000 --iterations 100000
+"""
+import argparse
+import os
+import sys
+import time
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(current_dir))
+sys.path.append(os.path.dirname(os.path.dirname(current_dir)))
+
+import pyotp
+
+from application.validate_otp_usecase import ValidateOTPUseCase
+from domain.totp_verifier import TOTPVerifier
+from infraestructure.totp_verifier_cache import TOTPVerifierCache
+
+
+class DictRepository:
+    def __init__(self, secrets, lookup_us):
+        self.secrets = secrets
+        self.lookup_s = lookup_us / 1e6
+        self.lookups = 0
+
+    def get_secret_by_email(self, email):
+        self.lookups += 1
+        if self.lookup_s:
+            deadline = time.perf_counter() + self.lookup_s
+            while time.perf_counter() < deadline:
+                pass
+        return self.secrets.get(email)
+
+
+def run(name, verify, requests):
+    start = time.perf_counter()
+    accepted = sum(1 for email, code in requests if verify(email, code))
+    elapsed = time.perf_counter() - start
+    print(f"{name:<42} {len(requests) / elapsed:12,.0f} verificaciones/s  ({accepted} aceptadas)")
+    return len(requests) / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--users', type=int, default=1000)
+    parser.add_argument('--iterations', type=int, default=50000)
+    parser.add_argument('--lookup-us', type=float, default=0.0, help="latencia simulada del find_one")
+    args = parser.parse_args()
+
+    secrets = {f"user{i}@example.com": pyotp.random_base32() for i in range(args.users)}
+    emails = list(secrets)
+    # mitad de códigos correctos, mitad incorrectos
+    requests = []
+    for i in range(args.iterations):
+        email = emails[i % len(emails)]
+        code = pyotp.TOTP(secrets[email]).now() if i % 2 == 0 else '000000'
+        requests.append((email, code))
+
+    repo = DictRepository(secrets, args.lookup_us)
+
+    def legacy(email, code):
+        secret = repo.get_secret_by_email(email)
+        return pyotp.TOTP(secret).verify(code)
+
+    def uncached(email, code):
+        return TOTPVerifier(repo.get_secret_by_email(email)).verify(code)
+
+    use_case = ValidateOTPUseCase(TOTPVerifierCache(repo, max_entries=args.users))
+
+    base = run("antes (find_one + pyotp.TOTP por petición)", legacy, requests)
+    run("TOTPVerifier sin caché", uncached, requests)
+    repo.lookups = 0
+    cached = run("ValidateOTPUseCase + TOTPVerifierCache", use_case.execute, requests)
+    print(f"\nAceleración con caché: {cached / base:.1f}x  |  lecturas al repositorio con caché: {repo.lookups}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,101 @@
+"""Comprobación de carrera: el mismo código TOTP enviado varias veces a la vez.
+
+En cada ronda `--parallel` hilos validan el mismo código del mismo usuario
+(sincronizados con una barrera). Cada hilo usa su propio TOTPReplayGuard,
+como si fueran workers distintos, así que sólo la actualización condicional
+en MongoDB decide: debe haber exactamente una aceptación por ronda. Después
+se reenvía el código ganador y debe rechazarse. Con --no-guard se ve el
+comportamiento anterior (todas las peticiones aceptadas).
+
+Uso (desde totp/):
+    python benchmarks/race_totp_replay.py --rounds 200 --parallel 8
+    python benchmarks/race_totp_replay.py --mock
+"""
+import argparse
+import os
+import sys
+import threading
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+service_dir = os.path.dirname(current_dir)
+sys.path.insert(0, service_dir)
+sys.path.append(os.path.dirname(service_dir))
+
+import pyotp
+
+from application.validate_otp_usecase import ValidateOTPUseCase
+from infraestructure.mongo_user_repository import MongoUserRepository
+from infraestructure.totp_replay_guard import TOTPReplayGuard
+from infraestructure.totp_verifier_cache import TOTPVerifierCache
+from shared.mongo_connection import MONGO_URI
+from shared.mongo_indexes import INDEXES, ensure_indexes
+
+
+def race_round(usecases, email, code):
+    barrier = threading.Barrier(len(usecases))
+    results = []
+    lock = threading.Lock()
+
+    def validate(usecase):
+        barrier.wait()
+        ok = usecase.execute(email, code)
+        with lock:
+            results.append(ok)
+
+    threads = [threading.Thread(target=validate, args=(usecase,)) for usecase in usecases]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return sum(1 for ok in results if ok)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--uri', default=MONGO_URI)
+    parser.add_argument('--db', default="autentication_replay_check")
+    parser.add_argument('--rounds', type=int, default=200)
+    parser.add_argument('--parallel', type=int, default=4)
+    parser.add_argument('--no-guard', action='store_true', help="validar sin protección contra reutilización")
+    parser.add_argument('--mock', action='store_true', help="mongomock (no reproduce la concurrencia real del servidor)")
+    args = parser.parse_args()
+
+    repo = MongoUserRepository("mongomock://" if args.mock else args.uri, args.db)
+    repo.collection.drop()
+    ensure_indexes(repo.db, {'users': INDEXES['users']})
+
+    usecases = []
+    for _ in range(args.parallel):
+        guard = None if args.no_guard else TOTPReplayGuard(repo)
+        usecases.append(ValidateOTPUseCase(TOTPVerifierCache(repo), guard))
+
+    double_accept = 0
+    no_accept = 0
+    replay_accepted = 0
+    for i in range(args.rounds):
+        email = f"replay{i}@example.com"
+        secret = pyotp.random_base32()
+        repo.save_user(email, secret, "x", "Replay")
+        code = pyotp.TOTP(secret).now()
+
+        accepted = race_round(usecases, email, code)
+        if accepted > 1:
+            double_accept += 1
+        elif accepted == 0:
+            # el código pudo caducar entre now() y la validación (cambio de paso)
+            no_accept += 1
+        if usecases[0].execute(email, code):
+            replay_accepted += 1
+
+    mode = "sin protección" if args.no_guard else "TOTPReplayGuard (update_one condicional)"
+    print(f"{mode}: {args.rounds} rondas x {args.parallel} validaciones simultáneas")
+    print(f"  rondas con más de una aceptación: {double_accept}")
+    print(f"  rondas sin ninguna aceptación:    {no_accept}")
+    print(f"  reenvíos posteriores aceptados:   {replay_accepted}")
+    if not args.mock:
+        repo.client.drop_database(args.db)
+    sys.exit(1 if double_accept or replay_accepted or no_accept > 1 else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,5 +1,7 @@
 import pyotp
 
+from domain.totp_verifier import TOTPVerifier
+
 class OTPGenerator:
     def __init__(self, secret=None):
         self.secret = secret or pyotp.random_base32()
@@ -12,5 +14,4 @@ class OTPGenerator:
         return totp.provisioning_uri(usr_email, issuer_name)
 
     def verify_code(self, code: str) -> bool:
-        totp = pyotp.TOTP(self.secret)
-        return totp.verify(code)
\ No newline at end of file
+        return TOTPVerifier(self.secret).verify(code)
\ No newline at end of file
@@ -0,0 +1,62 @@
+import base64
+import hashlib
+import hmac
+import os
+import struct
+import time
+
+# Pasos de 30 s de tolerancia a cada lado (0 = sólo el paso actual, como pyotp.TOTP.verify)
+VALID_WINDOW = int(os.environ.get("TOTP_VALID_WINDOW", 0))
+
+
+class TOTPVerifier:
+    """Verificador TOTP (RFC 6238, SHA1, 6 dígitos, 30 s) para un secreto.
+
+    Decodifica el base32 y prepara el HMAC una sola vez; los códigos de la
+    ventana actual ±drift se calculan una vez por paso de tiempo y se
+    reutilizan en las verificaciones siguientes del mismo paso.
+    Compatible con los códigos de pyotp.TOTP.
+    """
+
+    def __init__(self, secret, digits=6, interval=30, valid_window=VALID_WINDOW):
+        self.secret = secret
+        self.digits = digits
+        self.interval = interval
+        self.valid_window = valid_window
+        padded = secret + '=' * (-len(secret) % 8)
+        self._mac = hmac.new(base64.b32decode(padded, casefold=True), digestmod=hashlib.sha1)
+        self._modulo = 10 ** digits
+        self._window = (None, {})
+
+    def timestep(self, for_time=None):
+        return int((time.time() if for_time is None else for_time) // self.interval)
+
+    def code_at(self, step):
+        mac = self._mac.copy()
+        mac.update(struct.pack('>Q', step))
+        digest = mac.digest()
+        offset = digest[-1] & 0x0F
+        value = struct.unpack('>I', digest[offset:offset + 4])[0] & 0x7FFFFFFF
+        return str(value % self._modulo).zfill(self.digits)
+
+    def _codes(self, step):
+        center, codes = self._window
+        if center != step:
+            codes = {s: self.code_at(s) for s in range(step - self.valid_window, step + self.valid_window + 1)}
+            # Se sustituye la tupla entera: lectura/escritura atómica entre hilos
+            self._window = (step, codes)
+        return codes
+
+    def match_step(self, code, for_time=None):
+        """Paso de tiempo al que corresponde el código, o None si no es válido"""
+        # En bytes: compare_digest con str lanza TypeError si no es ASCII ("ñññññ1")
+        code = str(code).encode('utf-8')
+        matched = None
+        for step, expected in self._codes(self.timestep(for_time)).items():
+            # Se comparan todos para no filtrar por tiempo qué paso coincidió
+            if hmac.compare_digest(code, expected.encode('ascii')):
+                matched = step
+        return matched
+
+    def verify(self, code, for_time=None):
+        return self.match_step(code, for_time) is not None
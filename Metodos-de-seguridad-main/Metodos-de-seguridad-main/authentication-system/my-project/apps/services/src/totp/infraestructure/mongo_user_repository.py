@@ -1,22 +1,83 @@
-from pymongo import MongoClient
-from ports.user_repository_port import UserRepositoryPort
+from pymongo import InsertOne, UpdateOne
+from pymongo.errors import BulkWriteError, DuplicateKeyError
+
+from ports.user_repository_port import DuplicateEmailError, UserRepositoryPort
+from shared.mongo_connection import get_mongo_client, MONGO_DB_NAME
+from shared.metrics import repository_timer, timed
 
 class MongoUserRepository(UserRepositoryPort):
-    def __init__(self, uri="mongodb://localhost:27017", db_name="autentication"): # <-- CORREGIDO
-        self.client = MongoClient(uri)
+    def __init__(self, uri=None, db_name=MONGO_DB_NAME):
+        self.client = get_mongo_client(uri)
         self.db = self.client[db_name]
         self.collection = self.db["users"]
 
-    def save_user(self, email, secret, password, first_name, auth_method="totp"):
-        self.collection.insert_one({
+    def _build_user_document(self, email, secret, password, first_name, auth_method="totp"):
+        return {
             "email": email,
             "password": password,
             "first_name": first_name,
             "secret": secret,
             "auth_method": auth_method,
             "phone_number": None  # Para método SMS
-        })
-        
+        }
+
+    @timed(repository_timer('totp', 'save_user'))
+    def save_user(self, email, secret, password, first_name, auth_method="totp"):
+        # El índice único de email decide (sin find_one previo ni carrera entre altas)
+        try:
+            self.collection.insert_one(self._build_user_document(email, secret, password, first_name, auth_method))
+        except DuplicateKeyError:
+            raise DuplicateEmailError("El email ya está registrado")
+
+    @timed(repository_timer('totp', 'find_totp_status'))
+    def find_totp_status(self, emails):
+        cursor = self.collection.find({"email": {"$in": list(emails)}}, {"email": 1, "secret": 1, "_id": 0})
+        return {user["email"]: bool(user.get("secret")) for user in cursor}
+
+    @timed(repository_timer('totp', 'provision_users_bulk'))
+    def provision_users_bulk(self, users):
+        """Un único bulk_write no ordenado: InsertOne para los usuarios nuevos y
+        UpdateOne (nuevo secreto, auth_method=totp) para los que ya existen.
+
+        `users`: dicts con email, secret, existing y, para los nuevos, password
+        y first_name. Un fallo (p. ej. email duplicado) no detiene al resto.
+        """
+        operations = []
+        for u in users:
+            if u["existing"]:
+                # Con otro secreto el último paso usado ya no significa nada
+                operations.append(UpdateOne(
+                    {"email": u["email"]},
+                    {"$set": {"secret": u["secret"], "auth_method": "totp"}, "$unset": {"totp_last_step": ""}}
+                ))
+            else:
+                operations.append(InsertOne(
+                    self._build_user_document(u["email"], u["secret"], u.get("password"), u.get("first_name"))
+                ))
+        if not operations:
+            return []
+
+        errors = {}
+        try:
+            self.collection.bulk_write(operations, ordered=False)
+        except BulkWriteError as e:
+            for error in e.details.get("writeErrors", []):
+                message = "El email ya está registrado" if error.get("code") == 11000 else error.get("errmsg")
+                errors[error["index"]] = message
+        return [errors.get(i) for i in range(len(operations))]
+
+
+    @timed(repository_timer('totp', 'get_secret_by_email'))
     def get_secret_by_email(self, email):
         user = self.collection.find_one({"email": email})
-        return user["secret"] if user else None
\ No newline at end of file
+        return user["secret"] if user else None
+
+    @timed(repository_timer('totp', 'mark_step_used'))
+    def mark_step_used(self, email, step):
+        # Actualización condicional en un solo viaje: sólo gana una de varias
+        # peticiones simultáneas con el mismo código
+        result = self.collection.update_one(
+            {"email": email, "totp_last_step": {"$not": {"$gte": step}}},
+            {"$set": {"totp_last_step": step}}
+        )
+        return result.modified_count == 1
@@ -0,0 +1,93 @@
+import base64
+import json
+import os
+import re
+import time
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+
+from adapters.http.qr_generator_adapter import QRGeneratorAdapter
+from ports.qr_service_port import QR_FORMATS
+
+_EXTENSIONS = {'png': 'png', 'png-small': 'png', 'svg': 'svg'}
+
+_adapter = None
+
+
+def _render_chunk(job):
+    """Se ejecuta en los procesos del pool: un adaptador por proceso"""
+    global _adapter
+    if _adapter is None:
+        _adapter = QRGeneratorAdapter()
+    fmt, uris = job
+    return [_adapter.render(uri, fmt) for uri in uris]
+
+
+class QRBatchRenderer:
+    """Pre-renderizado de los QR de un alta masiva.
+
+    Con `workers` > 0 los QR se generan en un pool de procesos (la
+    construcción de la matriz es CPU pura y no suelta el GIL); con 0 se
+    generan en el propio proceso. Las imágenes se entregan en un zip (un
+    fichero por usuario + report.json) o como líneas NDJSON con la imagen en base64.
+    """
+
+    def __init__(self, workers=0, chunk_size=32):
+        self.workers = workers
+        self.chunk_size = chunk_size
+        self._executor = ProcessPoolExecutor(max_workers=workers) if workers > 0 else None
+
+    @classmethod
+    def from_env(cls):
+        """TOTP_QR_RENDER_WORKERS=0 (por defecto) renderiza en el propio hilo"""
+        return cls(workers=int(os.environ.get("TOTP_QR_RENDER_WORKERS", 0)))
+
+    def render(self, uris, fmt="png"):
+        """Imágenes en el mismo orden que `uris`"""
+        if fmt not in QR_FORMATS:
+            raise ValueError(f"Formato de QR no soportado: {fmt}")
+        uris = list(uris)
+        jobs = [(fmt, uris[i:i + self.chunk_size]) for i in range(0, len(uris), self.chunk_size)]
+        chunks = self._executor.map(_render_chunk, jobs) if self._executor else map(_render_chunk, jobs)
+        return [image for chunk in chunks for image in chunk]
+
+    def render_report(self, report, fmt="png"):
+        """Añade las imágenes a los resultados correctos del informe de BulkProvisionUseCase"""
+        start = time.perf_counter()
+        provisioned = [r for r in report['results'] if r['success']]
+        for result, image in zip(provisioned, self.render([r['otp_uri'] for r in provisioned], fmt)):
+            result['qr'] = image
+        report['stats']['render_s'] = round(time.perf_counter() - start, 3)
+        report['stats']['qr_format'] = fmt
+        return report
+
+    def write_zip(self, report, fileobj, fmt="png"):
+        """Un fichero <índice>_<email>.<ext> por usuario y report.json sin las imágenes"""
+        extension = _EXTENSIONS[fmt]
+        with zipfile.ZipFile(fileobj, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+            for result in report['results']:
+                if result.get('qr') is not None:
+                    name = re.sub(r'[^A-Za-z0-9@._-]', '_', result['email'])
+                    archive.writestr(f"{result['index']:06d}_{name}.{extension}", result['qr'])
+            archive.writestr('report.json', json.dumps(_without_images(report), ensure_ascii=False, indent=2))
+
+    def iter_ndjson(self, report):
+        """Una línea por usuario (con qr en base64 si lo hay) y una última línea con las estadísticas"""
+        for result in report['results']:
+            line = dict(result)
+            if line.get('qr') is not None:
+                line['qr'] = base64.b64encode(line['qr']).decode('ascii')
+            yield json.dumps(line, ensure_ascii=False) + '\n'
+        yield json.dumps({'stats': report['stats']}, ensure_ascii=False) + '\n'
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+
+def _without_images(report):
+    return {
+        'results': [{k: v for k, v in r.items() if k != 'qr'} for r in report['results']],
+        'stats': report['stats']
+    }
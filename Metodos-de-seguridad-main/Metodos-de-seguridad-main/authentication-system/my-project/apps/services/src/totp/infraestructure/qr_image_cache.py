@@ -0,0 +1,78 @@
+import os
+import threading
+from collections import OrderedDict
+
+from ports.qr_service_port import QRServicePort, QRImage, QR_FORMATS, qr_etag
+
+
+class QRImageCache:
+    """Caché LRU de imágenes QR ya renderizadas, direccionada por contenido.
+
+    La clave es el ETag (hash de formato + URI de aprovisionamiento), así que
+    no hace falta invalidar: al registrarse de nuevo cambia el secreto, cambia
+    la URI y la entrada vieja acaba saliendo por LRU. Acotada por número de
+    entradas y por bytes totales.
+    """
+
+    def __init__(self, qr_service: QRServicePort, max_entries=1000, max_bytes=16 * 1024 * 1024):
+        self.qr_service = qr_service
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @classmethod
+    def from_env(cls, qr_service):
+        return cls(
+            qr_service,
+            max_entries=int(os.environ.get("QR_CACHE_SIZE", 1000)),
+            max_bytes=int(os.environ.get("QR_CACHE_MAX_BYTES", 16 * 1024 * 1024))
+        )
+
+    def etag(self, uri, fmt):
+        return qr_etag(uri, fmt, self.qr_service.signature)
+
+    def get(self, uri, fmt):
+        etag = self.etag(uri, fmt)
+        with self._lock:
+            body = self._entries.get(etag)
+            if body is not None:
+                self._entries.move_to_end(etag)
+                self.hits += 1
+                return QRImage(body, QR_FORMATS[fmt], etag)
+            self.misses += 1
+
+        body = self.qr_service.render(uri, fmt)
+        if len(body) <= self.max_bytes:
+            with self._lock:
+                if etag not in self._entries:
+                    self._entries[etag] = body
+                    self._bytes += len(body)
+                while self._entries and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+                    _, evicted = self._entries.popitem(last=False)
+                    self._bytes -= len(evicted)
+                    self.evictions += 1
+        return QRImage(body, QR_FORMATS[fmt], etag)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._entries),
+                'bytes': self._bytes,
+                'max_entries': self.max_entries,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else None,
+                'evictions': self.evictions
+            }
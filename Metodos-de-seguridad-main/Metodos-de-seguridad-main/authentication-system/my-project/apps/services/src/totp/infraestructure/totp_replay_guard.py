@@ -0,0 +1,75 @@
+import os
+import threading
+from collections import OrderedDict
+
+from ports.user_repository_port import UserRepositoryPort
+
+
+class TOTPReplayGuard:
+    """Rechaza códigos TOTP ya usados guardando el último paso aceptado por usuario.
+
+    La fuente de verdad es `totp_last_step` en MongoDB, actualizado con un
+    update_one condicional (un viaje, atómico entre procesos). La caché local
+    opcional recuerda el último paso aceptado en este proceso y corta los
+    reintentos del mismo código sin ir a la base de datos.
+    """
+
+    def __init__(self, user_repository: UserRepositoryPort, front_cache=True, max_entries=10000):
+        self.user_repository = user_repository
+        self.front_cache = front_cache
+        self.max_entries = max_entries
+        self._last_steps = OrderedDict()
+        self._lock = threading.Lock()
+        self.accepted = 0
+        self.replays_blocked = 0
+        self.front_cache_blocks = 0
+
+    @classmethod
+    def from_env(cls, user_repository):
+        if os.environ.get("TOTP_REPLAY_PROTECTION", "1") == "0":
+            return None
+        return cls(
+            user_repository,
+            front_cache=os.environ.get("TOTP_REPLAY_FRONT_CACHE", "1") != "0",
+            max_entries=int(os.environ.get("TOTP_REPLAY_CACHE_SIZE", 10000))
+        )
+
+    def accept(self, email, step):
+        """True si es la primera vez que se acepta `step` (o uno posterior) para el usuario"""
+        if self.front_cache:
+            with self._lock:
+                last = self._last_steps.get(email)
+                if last is not None and last >= step:
+                    self.replays_blocked += 1
+                    self.front_cache_blocks += 1
+                    return False
+
+        accepted = self.user_repository.mark_step_used(email, step)
+        with self._lock:
+            if accepted:
+                self.accepted += 1
+            else:
+                self.replays_blocked += 1
+            if self.front_cache:
+                # También si lo ganó otro proceso: ese paso ya no vale aquí
+                if self._last_steps.get(email, -1) < step:
+                    self._last_steps[email] = step
+                self._last_steps.move_to_end(email)
+                while len(self._last_steps) > self.max_entries:
+                    self._last_steps.popitem(last=False)
+        return accepted
+
+    def forget(self, email):
+        """Nuevo registro del usuario: su documento empieza sin totp_last_step"""
+        with self._lock:
+            self._last_steps.pop(email, None)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'front_cache': self.front_cache,
+                'tracked_users': len(self._last_steps),
+                'accepted': self.accepted,
+                'replays_blocked': self.replays_blocked,
+                'front_cache_blocks': self.front_cache_blocks
+            }
@@ -0,0 +1,79 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from domain.totp_verifier import TOTPVerifier
+from ports.user_repository_port import UserRepositoryPort
+
+
+class TOTPVerifierCache:
+    """Caché LRU + TTL de verificadores TOTP por email.
+
+    Evita el find_one de get_secret_by_email y la decodificación del secreto
+    en cada /validate. Un nuevo registro del mismo email invalida la entrada;
+    el TTL acota cuánto puede tardar en verse un cambio hecho por otro proceso.
+    """
+
+    def __init__(self, user_repository: UserRepositoryPort, max_entries=10000, ttl_seconds=300):
+        self.user_repository = user_repository
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    @classmethod
+    def from_env(cls, user_repository):
+        return cls(
+            user_repository,
+            max_entries=int(os.environ.get("TOTP_VERIFIER_CACHE_SIZE", 10000)),
+            ttl_seconds=float(os.environ.get("TOTP_VERIFIER_CACHE_TTL", 300))
+        )
+
+    def get(self, email):
+        """Verificador del usuario, o None si no está registrado con TOTP"""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(email)
+            if entry is not None and entry[1] > now:
+                self._entries.move_to_end(email)
+                self.hits += 1
+                return entry[0]
+            self.misses += 1
+
+        secret = self.user_repository.get_secret_by_email(email)
+        if not secret:
+            return None
+
+        verifier = TOTPVerifier(secret)
+        with self._lock:
+            self._entries[email] = (verifier, now + self.ttl_seconds)
+            self._entries.move_to_end(email)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return verifier
+
+    def invalidate(self, email):
+        with self._lock:
+            if self._entries.pop(email, None) is not None:
+                self.invalidations += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._entries),
+                'max_entries': self.max_entries,
+                'ttl_seconds': self.ttl_seconds,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else None,
+                'invalidations': self.invalidations
+            }
@@ -1,4 +1,21 @@
-from adapters.http.flask_controller import app
+import os
+import sys
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, current_dir)
+# src/ para los módulos compartidos entre servicios (shared/)
+sys.path.append(os.path.dirname(current_dir))
+
+from adapters.http.flask_controller import app, user_repo
+from shared.mongo_indexes import ensure_indexes_once
+
+def start_services():
+    """Índices de MongoDB; también lo llama gateway.py"""
+    try:
+        ensure_indexes_once(user_repo.db)
+    except Exception as e:
+        print(f"❌ No se pudieron crear los índices de MongoDB: {e}")
 
 if __name__ == '__main__':
+    start_services()
     app.run(debug=False, use_reloader=False)
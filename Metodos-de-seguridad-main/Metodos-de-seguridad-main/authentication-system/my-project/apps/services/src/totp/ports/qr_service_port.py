@@ -1,6 +1,33 @@
+import hashlib
 from abc import ABC, abstractmethod
+from collections import namedtuple
+
+# Formatos de /qr?format=... y su tipo MIME
+QR_FORMATS = {
+    'png': 'image/png',
+    'png-small': 'image/png',
+    'svg': 'image/svg+xml',
+}
+
+QRImage = namedtuple('QRImage', ['body', 'mimetype', 'etag'])
+
+
+def qr_etag(uri, fmt, signature=""):
+    """ETag determinista del QR: depende sólo de la URI, el formato y la
+    configuración del renderizador, así que se puede comparar con
+    If-None-Match sin generar la imagen y es igual en todos los procesos"""
+    return hashlib.sha256(f"{fmt}\n{signature}\n{uri}".encode()).hexdigest()[:32]
+
 
 class QRServicePort(ABC):
+    # Identifica la configuración del renderizador (tamaños, máscara) en el ETag
+    signature = ""
+
     @abstractmethod
     def generate_qr_image(self, uri: str) -> bytes:
-        pass
\ No newline at end of file
+        pass
+
+    @abstractmethod
+    def render(self, uri: str, fmt: str) -> bytes:
+        """Imagen del QR en uno de los formatos de QR_FORMATS"""
+        pass
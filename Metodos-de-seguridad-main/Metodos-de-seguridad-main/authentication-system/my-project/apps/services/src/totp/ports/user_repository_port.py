@@ -1,5 +1,8 @@
 from abc import ABC, abstractmethod
 
+class DuplicateEmailError(Exception):
+    """save_user con un email que ya existe (el controlador responde 409)"""
+
 class UserRepositoryPort(ABC):
     @abstractmethod
     def save_user(self, email: str, secret: str, password: str):
@@ -7,4 +10,21 @@ class UserRepositoryPort(ABC):
 
     @abstractmethod
     def get_secret_by_email(self, email: str) -> str:
+        pass
+
+    @abstractmethod
+    def find_totp_status(self, emails) -> dict:
+        """{email: True si ya tiene secreto TOTP} para los emails que existen"""
+        pass
+
+    @abstractmethod
+    def provision_users_bulk(self, users) -> list:
+        """Crea o actualiza varios usuarios TOTP de una vez. Devuelve una lista
+        paralela con None o el mensaje de error de cada usuario"""
+        pass
+
+    @abstractmethod
+    def mark_step_used(self, email: str, step: int) -> bool:
+        """Registra `step` como último paso TOTP aceptado si es posterior al
+        anterior. Atómico: devuelve False si ya se usó ese paso (o uno más nuevo)"""
         pass
\ No newline at end of file
@@ -0,0 +1,101 @@
+"""Alta o migración masiva de usuarios a TOTP, sin pasar por HTTP.
+
+Entrada NDJSON, un usuario por línea:
+    {"email": "...", "password": "...", "first_name": "..."}
+(password y first_name sólo hacen falta para usuarios que todavía no existen).
+Los usuarios existentes sin TOTP reciben un secreto nuevo; con --overwrite
+también se regenera el de quienes ya lo tenían.
+
+Uso:
+    python provision_batch.py --ndjson usuarios.ndjson --report informe.json
+    python provision_batch.py --ndjson usuarios.ndjson --qr-zip qrs.zip --workers 8
+    cat usuarios.ndjson | python provision_batch.py --ndjson - --qr-ndjson - --format svg
+"""
+import argparse
+import json
+import os
+import sys
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, current_dir)
+sys.path.append(os.path.dirname(current_dir))
+
+from application.bulk_provision_usecase import BulkProvisionUseCase
+from infraestructure.mongo_user_repository import MongoUserRepository
+from infraestructure.qr_batch_renderer import QRBatchRenderer
+from ports.qr_service_port import QR_FORMATS
+from shared.mongo_connection import MONGO_URI, MONGO_DB_NAME
+
+
+def read_records(stream):
+    for line_number, line in enumerate(stream, 1):
+        if not line.strip():
+            continue
+        try:
+            yield json.loads(line)
+        except json.JSONDecodeError as e:
+            print(f"❌ Línea {line_number}: JSON inválido ({e})", file=sys.stderr)
+            yield {}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--ndjson', required=True, help="fichero NDJSON o '-' para stdin")
+    parser.add_argument('--uri', default=MONGO_URI)
+    parser.add_argument('--db', default=MONGO_DB_NAME)
+    parser.add_argument('--overwrite', action='store_true', help="regenerar también los secretos existentes")
+    parser.add_argument('--issuer', default="Mi App")
+    parser.add_argument('--chunk-size', type=int, default=1000, help="operaciones por bulk_write")
+    output = parser.add_mutually_exclusive_group()
+    output.add_argument('--qr-zip', help="guardar los QR en este zip")
+    output.add_argument('--qr-ndjson', help="escribir resultados + QR en base64 como NDJSON ('-' para stdout)")
+    parser.add_argument('--format', default='png', choices=list(QR_FORMATS))
+    parser.add_argument('--workers', type=int, default=os.cpu_count(), help="procesos para renderizar QR (0 = sin pool)")
+    parser.add_argument('--report', help="guardar el informe (sin imágenes) en este fichero JSON")
+    args = parser.parse_args()
+
+    stream = sys.stdin if args.ndjson == '-' else open(args.ndjson, encoding='utf-8')
+    with stream:
+        records = list(read_records(stream))
+
+    repo = MongoUserRepository(args.uri, args.db)
+    use_case = BulkProvisionUseCase(repo, chunk_size=args.chunk_size, issuer_name=args.issuer)
+    report = use_case.execute(records, overwrite=args.overwrite)
+
+    if args.qr_zip or args.qr_ndjson:
+        renderer = QRBatchRenderer(workers=args.workers)
+        try:
+            renderer.render_report(report, args.format)
+        finally:
+            renderer.shutdown()
+        if args.qr_zip:
+            with open(args.qr_zip, 'wb') as f:
+                renderer.write_zip(report, f, args.format)
+        else:
+            out = sys.stdout if args.qr_ndjson == '-' else open(args.qr_ndjson, 'w', encoding='utf-8')
+            with out:
+                out.writelines(renderer.iter_ndjson(report))
+
+    # Con --qr-ndjson - el stdout es para los datos: el resumen va a stderr
+    log = sys.stderr if args.qr_ndjson == '-' else sys.stdout
+    for result in report['results']:
+        if not result['success']:
+            print(f"❌ #{result['index']} {result['email']}: {result['error']}", file=log)
+
+    stats = report['stats']
+    print("=" * 60, file=log)
+    print(f"Total: {stats['total']}  OK: {stats['succeeded']} (nuevos {stats['created']}, "
+          f"actualizados {stats['updated']})  Fallidos: {stats['failed']}", file=log)
+    print(f"Tiempo: {stats['elapsed_s']}s (escritura {stats['write_s']}s"
+          + (f", QR {stats['render_s']}s" if 'render_s' in stats else "") + ")", file=log)
+    print(f"Rendimiento: {stats['records_per_s']} usuarios/s", file=log)
+    print("=" * 60, file=log)
+
+    if args.report:
+        with open(args.report, 'w', encoding='utf-8') as f:
+            json.dump({'results': [{k: v for k, v in r.items() if k != 'qr'} for r in report['results']],
+                       'stats': report['stats']}, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == '__main__':
+    main()
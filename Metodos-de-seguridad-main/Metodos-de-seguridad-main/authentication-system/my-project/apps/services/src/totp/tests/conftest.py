@@ -0,0 +1,9 @@
+import os
+import sys
+
+# Mismo sys.path que main.py: módulos de totp sin paquete (from domain...) y src/ para shared/
+service_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, service_dir)
+sys.path.append(os.path.dirname(service_dir))
+
+os.environ.setdefault("LOG_LEVEL", "OFF")
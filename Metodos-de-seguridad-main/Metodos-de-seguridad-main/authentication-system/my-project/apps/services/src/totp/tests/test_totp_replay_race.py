@@ -0,0 +1,93 @@
+"""Un código TOTP enviado varias veces a la vez se acepta exactamente una vez.
+
+Cada hilo tiene su propio TOTPReplayGuard, como si fueran workers distintos,
+así que decide la actualización condicional de MongoUserRepository.mark_step_used.
+mongomock no es seguro entre hilos: SerializedCollection ejecuta cada operación
+de la colección bajo un cerrojo, que es la garantía de MongoDB (cada operación
+sobre un documento es atómica) y nada más. Una comprobación en dos pasos
+(leer y luego escribir) seguiría pudiendo aceptar el código dos veces.
+"""
+import threading
+import uuid
+
+import pyotp
+import pytest
+
+from application.validate_otp_usecase import ValidateOTPUseCase
+from infraestructure.mongo_user_repository import MongoUserRepository
+from infraestructure.totp_replay_guard import TOTPReplayGuard
+from infraestructure.totp_verifier_cache import TOTPVerifierCache
+
+PARALLEL = 8
+ROUNDS = 50
+
+
+class SerializedCollection:
+    """Colección de mongomock con una operación a la vez"""
+
+    def __init__(self, collection):
+        self._collection = collection
+        self._lock = threading.Lock()
+
+    def __getattr__(self, name):
+        attr = getattr(self._collection, name)
+        if not callable(attr):
+            return attr
+
+        def call(*args, **kwargs):
+            with self._lock:
+                return attr(*args, **kwargs)
+        return call
+
+
+@pytest.fixture
+def repo():
+    repo = MongoUserRepository("mongomock://", f"totp_race_{uuid.uuid4().hex}")
+    repo.collection = SerializedCollection(repo.collection)
+    return repo
+
+
+def race(usecases, email, code):
+    barrier = threading.Barrier(len(usecases))
+    results = []
+    lock = threading.Lock()
+
+    def validate(usecase):
+        barrier.wait()
+        ok = usecase.execute(email, code)
+        with lock:
+            results.append(ok)
+
+    threads = [threading.Thread(target=validate, args=(usecase,)) for usecase in usecases]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+@pytest.mark.parametrize('front_cache', [True, False])
+def test_concurrent_validations_accept_code_once(repo, front_cache):
+    usecases = [ValidateOTPUseCase(TOTPVerifierCache(repo), TOTPReplayGuard(repo, front_cache=front_cache))
+                for _ in range(PARALLEL)]
+    for i in range(ROUNDS):
+        email = f"replay{i}@example.com"
+        secret = pyotp.random_base32()
+        repo.save_user(email, secret, "x", "Replay")
+        code = pyotp.TOTP(secret).now()
+
+        results = race(usecases, email, code)
+
+        assert results.count(True) == 1, f"ronda {i}: {results}"
+        assert not usecases[0].execute(email, code)
+
+
+def test_validations_without_guard_accept_every_copy(repo):
+    # Referencia: sin TOTPReplayGuard el mismo código vale en todas las peticiones
+    usecases = [ValidateOTPUseCase(TOTPVerifierCache(repo)) for _ in range(PARALLEL)]
+    secret = pyotp.random_base32()
+    repo.save_user("noguard@example.com", secret, "x", "Replay")
+
+    results = race(usecases, "noguard@example.com", pyotp.TOTP(secret).now())
+
+    assert results.count(True) == PARALLEL